@@ -0,0 +1,263 @@
+"""Times the phases of a frame on scalable synthetic scenes.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --compare results.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from simplephysicsengine import Hitbox
+
+from .scenes import SCENES
+
+
+DT = 1 / 120
+
+
+def _time(function, setup, repeats: int) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        setup()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _open_gl_context():
+    # Hidden window, so draw can be timed without showing anything
+    import pygame
+
+    from OpenGL.GL import GL_MODELVIEW, GL_PROJECTION, glMatrixMode, glLoadIdentity
+    from OpenGL.GLU import gluPerspective
+
+    pygame.init()
+    pygame.display.set_mode((800, 600), pygame.DOUBLEBUF | pygame.OPENGL | pygame.HIDDEN)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(45, 800 / 600, 0.1, 100.0)
+    glMatrixMode(GL_MODELVIEW)
+
+
+def benchmark_scene(builder, size: int, repeats: int, draw: bool) -> dict:
+    engine = builder(size)
+    hitboxes = [node for node in engine.descendants() if isinstance(node, Hitbox)]
+
+    def advance():
+        engine.advance(DT)
+
+    def positions():
+        for hitbox in hitboxes:
+            hitbox.get_position_within(engine)
+
+    phases = {
+        "update": _time(advance, lambda: None, repeats),
+        # Right after an update, so transforms have to be recomputed
+        "get_position_within": _time(positions, advance, repeats),
+        "check_collisions": _time(engine.check_collisions, advance, repeats),
+        # The whole step: integration, update, collisions and, where enabled,
+        # continuous collision and sleeping
+        "step": _time(lambda: engine.step(DT), lambda: None, repeats),
+    }
+    if draw:
+        from OpenGL.GL import glFinish
+
+        def draw_frame():
+            engine.draw()
+            glFinish()
+
+        phases["draw"] = _time(draw_frame, lambda: None, repeats)
+
+    return {
+        phase: {"median_s": statistics.median(timings), "min_s": min(timings)}
+        for phase, timings in phases.items()
+    }
+
+
+def measure_memory(builder, size: int, steps: int) -> dict:
+    # Bytes held per node once built and drawn from, and the most memory a
+    # single update allocates on top of that
+    # Built once untraced, so modules the builder imports lazily are not counted
+    builder(1)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        engine = builder(size)
+        nodes = list(engine.descendants())
+        for node in nodes:
+            node.get_world_matrix()
+        held = tracemalloc.get_traced_memory()[0] - before
+
+        peaks = []
+        for _ in range(steps):
+            engine.advance(DT)
+            for node in nodes:
+                node.get_world_matrix()
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            engine.advance(DT)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return {
+        "bytes_per_node": held / len(nodes),
+        "update_peak_bytes": statistics.median(peaks),
+    }
+
+
+_IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import simplephysicsengine
+elapsed = time.perf_counter() - start
+backend = any(name.split(".")[0] in ("pygame", "OpenGL") for name in sys.modules)
+print(elapsed, int(backend))
+"""
+
+
+def measure_import(repeats: int) -> dict:
+    # A fresh interpreter per sample, the cost every worker process pays
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root}
+    timings = []
+    backend = False
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=root,
+            env=env,
+        ).stdout.split()
+        timings.append(float(output[-2]))
+        backend |= output[-1] == "1"
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "loads_backend": backend,
+    }
+
+
+def run(
+    scenes: list[str],
+    sizes: list[int] | None,
+    repeats: int,
+    draw: bool,
+    imports: bool = True,
+    memory: bool = True,
+) -> dict:
+    if draw:
+        _open_gl_context()
+
+    results = []
+    if imports:
+        timing = measure_import(repeats)
+        results.append({"scene": "import", "size": 0, "phase": "import", **timing})
+        print(
+            f"{'import':>8} {0:>6} {'import':>20} {timing['median_s'] * 1e3:10.3f} ms"
+            + (" (loads pygame/OpenGL)" if timing["loads_backend"] else "")
+        )
+    for name in scenes:
+        builder, default_sizes = SCENES[name]
+        for size in sizes or default_sizes:
+            timings = benchmark_scene(builder, size, repeats, draw)
+            for phase, timing in timings.items():
+                results.append({"scene": name, "size": size, "phase": phase, **timing})
+                print(
+                    f"{name:>8} {size:>6} {phase:>20} {timing['median_s'] * 1e3:10.3f} ms"
+                )
+            if memory:
+                usage = measure_memory(builder, size, repeats)
+                results.append({"scene": name, "size": size, "phase": "memory", **usage})
+                print(
+                    f"{name:>8} {size:>6} {'memory':>20} "
+                    f"{usage['bytes_per_node']:10.0f} B/node "
+                    f"{usage['update_peak_bytes']:8.0f} B/update"
+                )
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[dict]:
+    # Entries whose median got slower than baseline * (1 + tolerance)
+    def key(entry):
+        return entry["scene"], entry["size"], entry["phase"]
+
+    baseline_entries = {key(entry): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in current["results"]:
+        reference = baseline_entries.get(key(entry))
+        # Memory entries are reported, not compared
+        if reference is None or reference.get("median_s", 0) <= 0:
+            continue
+        ratio = entry["median_s"] / reference["median_s"]
+        if ratio > 1 + tolerance:
+            regressions.append({**entry, "baseline_s": reference["median_s"], "ratio": ratio})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenes", nargs="+", choices=list(SCENES), default=list(SCENES))
+    parser.add_argument("--sizes", nargs="+", type=int, help="overrides the scene defaults")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--draw", action="store_true", help="also time draw in a hidden window")
+    parser.add_argument(
+        "--skip-import", action="store_true", help="do not time the package import"
+    )
+    parser.add_argument(
+        "--skip-memory", action="store_true", help="do not measure memory use"
+    )
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.scenes,
+        args.sizes,
+        args.repeats,
+        args.draw,
+        imports=not args.skip_import,
+        memory=not args.skip_memory,
+    )
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for entry in regressions:
+            print(
+                f"REGRESSION {entry['scene']} {entry['size']} {entry['phase']}: "
+                f"{entry['baseline_s'] * 1e3:.3f} ms -> {entry['median_s'] * 1e3:.3f} ms "
+                f"(x{entry['ratio']:.2f})"
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
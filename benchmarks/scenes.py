@@ -0,0 +1,59 @@
+import numpy as np
+
+from simplephysicsengine import Ball, CubeHitbox, Engine, World, glObject
+
+from examples.newton_cradle import StringyBall
+
+
+def newton_cradles(count: int, engine: Engine | None = None) -> Engine:
+    # count cradles of five pendulums side by side, the first ball raised
+    engine = engine or Engine(-10, 15, headless=True)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    for cradle in range(count):
+        for i in range(5):
+            stringy_ball = StringyBall(i * 7, 0, cradle * 10.0, 7, 30, 0.3)
+            world.add_child(stringy_ball)
+        world._children[-5].rotation_deg = (0, 0, -50)
+    engine.add_child(world)
+    return engine
+
+
+def deep_hierarchy(depth: int, engine: Engine | None = None) -> Engine:
+    # A single chain of rotating nodes with a ball at every level
+    engine = engine or Engine(0, 0, headless=True)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    parent = world
+    for level in range(depth):
+        node = glObject(1.0, 0.5, 0.0, 0.0, rotation_deg=(0.0, 0.0, 5.0))
+        node.assign_angular_velocity((0.0, 0.0, 10.0 + level % 7))
+        ball = Ball(0.0, -1.0, 0.0, 0.5, (0.0, 0.0, 0.0))
+        ball.add_child(CubeHitbox(0.0, 0.0, 0.0, 0.5))
+        node.add_child(ball)
+        parent.add_child(node)
+        parent = node
+    engine.add_child(world)
+    return engine
+
+
+def ball_cloud(count: int, engine: Engine | None = None, seed: int = 0) -> Engine:
+    # Constant density, a few overlapping neighbours per ball
+    engine = engine or Engine(0, 0, headless=True)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    rng = np.random.default_rng(seed)
+    half_side = count ** (1 / 3) / 2
+    for position in rng.uniform(-half_side, half_side, size=(count, 3)):
+        holder = glObject(*position, 0.0)
+        ball = Ball(0.0, 0.0, 0.0, 1.0, (0.0, 0.0, 0.0))
+        ball.add_child(CubeHitbox(0.0, 0.0, 0.0, 1.0))
+        holder.add_child(ball)
+        holder.assign_angular_velocity(tuple(rng.uniform(-10, 10, size=3)))
+        world.add_child(holder)
+    engine.add_child(world)
+    return engine
+
+
+SCENES = {
+    "cradles": (newton_cradles, [1, 10, 50]),
+    "deep": (deep_hierarchy, [10, 50, 200]),
+    "cloud": (ball_cloud, [100, 1000, 3000]),
+}
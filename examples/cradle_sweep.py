@@ -0,0 +1,26 @@
+from simplephysicsengine.ensemble import run_ensemble
+
+from examples.newton_cradle import build_cradle
+
+
+def build_headless_cradle(**params):
+    return build_cradle(headless=True, **params)
+
+
+if __name__ == "__main__":
+    grid = {
+        "first_angle": [-30.0, -50.0, -70.0],
+        "size": [5, 7],
+        "string_len": [20, 30, 40],
+    }
+
+    for result in run_ensemble(
+        build_headless_cradle, grid, steps=6000, dt=1 / 100, record_every=10
+    ):
+        print(
+            result.params,
+            "collisions:",
+            result.collision_count,
+            "final energy:",
+            result.metrics["kinetic_energy"][-1],
+        )
@@ -1,71 +1,118 @@
-from OpenGL.GL import *
-from OpenGL.GLU import *
 import numpy as np
 
-from simplephysicsengine import String, Ball, CubeHitbox, Engine, World, glObject
+from simplephysicsengine import String, Ball, CubeHitbox, Engine, Hinge, glObject
+from simplephysicsengine.scene_file import (
+    JSON_FORMAT,
+    VERSION,
+    Scene,
+    register_node_type,
+)
+
+
+# Swinging around z only, 100 deg/s^2 per unit of 9.81 / length, what keeps
+# the cradle lively
+GRAVITY = float(np.radians(981.0))
 
 
 class StringyBall(glObject):
+    __slots__ = ("length",)
+
     def __init__(self, x, y, z, size, length, thickness):
         super().__init__(
             x, y, z, size, rotation_deg=(0.0, 0.0, 0.0), color=(1.0, 0.0, 1.0)
         )
         self.length = length
 
-        self.string = String(
+        string = String(
             0, 0, 0, length, thickness, (0.0, 0.0, 0.0), color=(0.9, 0.2, 0.2)
         )
-        self.add_child(self.string)
+        self.add_child(string)
 
         ball = Ball(0, -length, 0, size, (0.0, 0.0, 0.0))
         hitbox = CubeHitbox(0, -length, 0, size)
 
         ball.add_child(hitbox)
-        self.string.add_child(ball)
-
-    def update(self, dt):
-        super().update(dt)
-
-        g = 9.81
-        theta = np.radians(self.rotation_deg[2])
-
-        # Angular acceleration (only for one axis)
-        alpha = -(g / self.length) * np.sin(theta)
-
-        # Update angular velocity
-        new_angular_velocity = self.angular_velocity[2] + alpha * 100 * dt
-        new_angular_velocity = new_angular_velocity * (1 - 0.1 * dt)
-        self.assign_angular_velocity(
-            (self.angular_velocity[0], self.angular_velocity[1], new_angular_velocity)
+        string.add_child(ball)
+
+        self.hinge = Hinge(axis=2, gravity=GRAVITY, damping=0.1)
+
+    @property
+    def string(self):
+        return self._children[0]
+
+
+register_node_type(StringyBall, ("length",))
+
+
+def cradle_scene(
+    first_angle=-50.0,
+    second_angle=-20.0,
+    count=5,
+    size=7,
+    string_len=30,
+    second_size=10,
+) -> dict:
+    # The first two pendulums raised, the second one with a bigger ball
+    pendulums = []
+    for i in range(count):
+        angle = {0: first_angle, 1: second_angle}.get(i, 0.0)
+        ball_size = second_size if i == 1 else size
+        hitbox = {
+            "type": "CubeHitbox",
+            "position": [0.0, -string_len, 0.0],
+            "size": ball_size,
+        }
+        ball = {
+            "type": "Ball",
+            "position": [0.0, -string_len, 0.0],
+            "size": ball_size,
+            "color": [1.0, 0.0, 0.0],
+            "children": [hitbox],
+        }
+        string = {
+            "type": "String",
+            "size": 0.3,
+            "length": string_len,
+            "color": [0.9, 0.2, 0.2],
+            "children": [ball],
+        }
+        pendulums.append(
+            {
+                "type": "StringyBall",
+                "position": [i * size, 0.0, 0.0],
+                "rotation": [0.0, 0.0, angle],
+                "size": size,
+                "color": [1.0, 0.0, 1.0],
+                "length": string_len,
+                "hinge": {"axis": 2, "gravity": GRAVITY, "damping": 0.1},
+                "children": [string],
+            }
         )
-
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(self.x, self.y, self.z)
-        glRotatef(self.rotation_deg[2], 0, 0, 1)
-
-        super().draw()
-
-        glPopMatrix()
+    return {
+        "format": JSON_FORMAT,
+        "version": VERSION,
+        "nodes": [{"type": "World", "children": pendulums}],
+    }
+
+
+def build_cradle(
+    first_angle=-50.0,
+    second_angle=-20.0,
+    count=5,
+    size=7,
+    string_len=30,
+    second_size=10,
+    *,
+    headless=False,
+    integrator=None,
+):
+    engine = Engine(-10, 15, debug=False, headless=headless, integrator=integrator)
+    scene = cradle_scene(
+        first_angle, second_angle, count, size, string_len, second_size
+    )
+    Scene.from_json(scene).build(engine)
+    return engine
 
 
 if __name__ == "__main__":
-    engine = Engine(-10, 15, debug=False)
-    world = World(0.0, 0.0, 0.0, 0.0)
-
-    size = 7
-    string_len = 30
-    for i in range(5):
-        stringyBall = StringyBall(i * size, 0, 0, size, string_len, 0.3)
-        world.add_child(stringyBall)
-
-    engine.add_child(world)
-
-    # Give initial parameters
-    engine._children[0]._children[0].rotation_deg = (0, 0, -50)
-    engine._children[0]._children[1].rotation_deg = (0, 0, -20)
-    engine._children[0]._children[1]._children[0]._children[0].size = 10
-    engine._children[0]._children[1]._children[0]._children[0]._children[0].size = 10
-    # engine._children[0]._children[0].assign_angular_velocity((0, 0, -50))
-
-    engine.run()
+    build_cradle().run()
@@ -3,7 +3,7 @@ from setuptools import setup, find_packages
 setup(
     name="SimplePhysicsEngine",
     version="0.1",
-    packages=find_packages(exclude=["tests"]),
+    packages=find_packages(exclude=["tests", "benchmarks"]),
     install_requires=[
         "pygame",
         "PyOpenGL",
@@ -1,11 +1,34 @@
 from .engine import Engine
 
 from .gl_object import glObject
+from .body_store import BodyStore
 
 from .objects.ball import Ball
 from .objects.string import String
 from .objects.world import World
 
-from .physics import Hitbox, CubeHitbox
+from .physics import Hitbox, CubeHitbox, Contacts
 
 from .mixins import HasCollisionMixin
+
+from .broadphase import (
+    BroadPhase,
+    BVHBroadPhase,
+    BruteForceBroadPhase,
+    SpatialHashBroadPhase,
+    SweepAndPruneBroadPhase,
+)
+
+from .sleeping import SleepManager
+from .ccd import ContinuousCollision
+from .spatial import SpatialIndex
+from .snapshots import Snapshot, SnapshotRing
+from .constraints import Hinge
+from .scene_file import Scene, load_scene, save_scene
+from .integrators import (
+    Integrator,
+    ExplicitEuler,
+    SemiImplicitEuler,
+    VelocityVerlet,
+    RK4,
+)
@@ -0,0 +1,96 @@
+from typing import List
+import numpy as np
+
+from .gl_object import glObject
+
+
+class BodyStore:
+    """Contiguous per-node state of a scene, integrated with one NumPy pass.
+
+    Row i of `state` holds the position, rotation, angular velocity, pending
+    angular velocity and size of `nodes[i]`; the node attributes are views
+    into it.
+    """
+
+    POSITION = 0
+    ROTATION = 1
+    ANGULAR_VELOCITY = 2
+    FUTURE_ANGULAR_VELOCITY = 3
+    SIZE = 4
+
+    def __init__(self, nodes: List[glObject]):
+        self.nodes = list(nodes)
+        self.state = np.zeros((len(self.nodes), 5, 3))
+
+        for i, node in enumerate(self.nodes):
+            if node._store is not None:
+                node._store.release()
+            self.state[i] = node._state
+            node._bind_state(self.state[i])
+            node._store = self
+            node._store_index = i
+
+        # Scratch for integrate, so stepping the whole store allocates nothing
+        # beyond the indices of the moving rows
+        self._increments = np.empty((len(self.nodes), 3))
+        self._moving = np.empty(len(self.nodes), dtype=bool)
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.state[:, self.POSITION]
+
+    @property
+    def rotations(self) -> np.ndarray:
+        return self.state[:, self.ROTATION]
+
+    @property
+    def angular_velocities(self) -> np.ndarray:
+        return self.state[:, self.ANGULAR_VELOCITY]
+
+    @property
+    def future_angular_velocities(self) -> np.ndarray:
+        return self.state[:, self.FUTURE_ANGULAR_VELOCITY]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self.state[:, self.SIZE, 0]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def integrate(self, dt: float, rows: np.ndarray | None = None):
+        # Every row, or only the given ones
+        velocities = self.angular_velocities
+        rotations = self.rotations
+        if rows is None:
+            # In place through the scratch buffers
+            np.copyto(velocities, self.future_angular_velocities)
+            np.any(velocities, axis=1, out=self._moving)
+            if not self._moving.any():
+                return
+            increments = self._increments
+            np.multiply(velocities, dt, out=increments)
+            np.add(rotations, increments, out=increments)
+            np.remainder(increments, 360, out=increments)
+            # Resting rows keep their rotation as it was set
+            np.copyto(rotations, increments, where=self._moving[:, None])
+            moving = np.flatnonzero(self._moving)
+        else:
+            velocities[rows] = self.future_angular_velocities[rows]
+            moving = rows[np.any(velocities[rows], axis=1)]
+            if len(moving) == 0:
+                return
+            rotations[moving] = (rotations[moving] + velocities[moving] * dt) % 360
+
+        nodes = self.nodes
+        for i in moving:
+            nodes[i].invalidate_transform()
+
+    def release(self):
+        # Give every node its own copy of its state again
+        for node in self.nodes:
+            if node._store is self:
+                node._bind_state(node._state.copy())
+                node._store = None
+                node._store_index = -1
+        self.nodes = []
@@ -0,0 +1,286 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+def _expand_ranges(owners: np.ndarray, starts: np.ndarray, stops: np.ndarray):
+    # Turns per-owner [start, stop) ranges into flat (owner, index) pairs
+    counts = np.maximum(stops - starts, 0)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    first = np.repeat(owners, counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    second = np.repeat(starts, counts) + offsets
+    return first, second
+
+
+def _finalize_pairs(
+    first: np.ndarray, second: np.ndarray, positions: np.ndarray, radii: np.ndarray
+) -> np.ndarray:
+    # Keeps the pairs whose world-space AABBs overlap, ordered like combinations()
+    if len(first) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    reach = radii[first] + radii[second]
+    overlap = np.all(
+        np.abs(positions[first] - positions[second]) <= reach[:, None], axis=1
+    )
+    first = first[overlap]
+    second = second[overlap]
+
+    pairs = np.stack([np.minimum(first, second), np.maximum(first, second)], axis=1)
+    order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+    return pairs[order]
+
+
+class BroadPhase(ABC):
+    """Finds candidate pairs of bodies whose world-space AABBs may overlap."""
+
+    @abstractmethod
+    def find_pairs(self, positions: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """Returns an (m, 2) array of index pairs i < j in lexicographic order."""
+        pass
+
+
+class BruteForceBroadPhase(BroadPhase):
+    """Reference mode: every pair is a candidate."""
+
+    def find_pairs(self, positions, radii):
+        first, second = np.triu_indices(len(radii), k=1)
+        return np.stack([first, second], axis=1).astype(np.int64)
+
+
+class SweepAndPruneBroadPhase(BroadPhase):
+    """Sorts the AABBs along the axis of largest spread and sweeps over it."""
+
+    def find_pairs(self, positions, radii):
+        n = len(radii)
+        if n < 2:
+            return np.empty((0, 2), dtype=np.int64)
+
+        axis = int(np.argmax(np.var(positions, axis=0)))
+        lower = positions[:, axis] - radii
+        upper = positions[:, axis] + radii
+
+        order = np.argsort(lower, kind="stable")
+        sorted_lower = lower[order]
+
+        # Every box after i in sweep order that starts before i ends overlaps i
+        owners = np.arange(n)
+        stops = np.searchsorted(sorted_lower, upper[order], side="right")
+        first, second = _expand_ranges(owners, owners + 1, stops)
+
+        return _finalize_pairs(order[first], order[second], positions, radii)
+
+
+class SpatialHashBroadPhase(BroadPhase):
+    """Uniform grid where each body is hashed into the cell holding its center.
+
+    The cell size is never smaller than the largest body diameter, so only the
+    neighbouring cells have to be visited.
+    """
+
+    # Same cell plus half of the 26 neighbours, so each pair of cells is visited once
+    _OFFSETS = [(0, 0, 0)] + [
+        (dx, dy, dz)
+        for dx in (-1, 0, 1)
+        for dy in (-1, 0, 1)
+        for dz in (-1, 0, 1)
+        if (dx, dy, dz) > (0, 0, 0)
+    ]
+
+    def __init__(self, cell_size: float | None = None):
+        self.cell_size = cell_size
+
+    def find_pairs(self, positions, radii):
+        n = len(radii)
+        if n < 2:
+            return np.empty((0, 2), dtype=np.int64)
+
+        cell_size = 2 * float(radii.max())
+        if self.cell_size is not None:
+            cell_size = max(cell_size, self.cell_size)
+        if cell_size <= 0:
+            cell_size = 1.0
+
+        cells = np.floor(positions / cell_size).astype(np.int64)
+        # Pad by one cell on each side so neighbour offsets never wrap around
+        cells -= cells.min(axis=0) - 1
+        dims = cells.max(axis=0) + 2
+
+        def hash_cells(c):
+            return (c[:, 0] * dims[1] + c[:, 1]) * dims[2] + c[:, 2]
+
+        keys = hash_cells(cells)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        sorted_cells = cells[order]
+
+        owners = np.arange(n)
+        firsts = []
+        seconds = []
+        for offset in self._OFFSETS:
+            neighbour_keys = hash_cells(sorted_cells + np.array(offset))
+            starts = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+            stops = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+            if offset == (0, 0, 0):
+                starts = owners + 1
+            first, second = _expand_ranges(owners, starts, stops)
+            firsts.append(first)
+            seconds.append(second)
+
+        first = order[np.concatenate(firsts)]
+        second = order[np.concatenate(seconds)]
+        return _finalize_pairs(first, second, positions, radii)
+
+
+class BVH:
+    """Bounding volume hierarchy over the AABBs of spheres.
+
+    Built top-down by splitting at the median along the axis of largest
+    spread, stored as flat arrays with every node covering the contiguous
+    range [start, stop) of `order`. refit recomputes the bounds for moved
+    spheres without changing the tree.
+    """
+
+    def __init__(self, positions: np.ndarray, radii: np.ndarray, leaf_size: int = 4):
+        self.leaf_size = leaf_size
+        self.build(positions, radii)
+
+    def __len__(self):
+        return len(self.order)
+
+    def build(self, positions: np.ndarray, radii: np.ndarray) -> None:
+        n = len(radii)
+        order = np.arange(n)
+        starts = [0]
+        stops = [n]
+        lefts = [-1]
+        rights = [-1]
+        depths = [0]
+
+        stack = [0] if n > self.leaf_size else []
+        while stack:
+            node = stack.pop()
+            start, stop = starts[node], stops[node]
+            items = order[start:stop]
+            centers = positions[items]
+            axis = int(np.argmax(np.ptp(centers, axis=0)))
+            middle = (stop - start) // 2
+            order[start:stop] = items[np.argpartition(centers[:, axis], middle)]
+
+            for first, last in ((start, start + middle), (start + middle, stop)):
+                child = len(starts)
+                starts.append(first)
+                stops.append(last)
+                lefts.append(-1)
+                rights.append(-1)
+                depths.append(depths[node] + 1)
+                if last - first > self.leaf_size:
+                    stack.append(child)
+            lefts[node] = len(starts) - 2
+            rights[node] = len(starts) - 1
+
+        self.order = order
+        self.start = np.array(starts)
+        self.stop = np.array(stops)
+        self.left = np.array(lefts)
+        self.right = np.array(rights)
+
+        depths = np.array(depths)
+        inner = self.left >= 0
+        # Leaves by position in order, inner nodes by depth for bottom-up refits
+        leaves = np.flatnonzero(~inner)
+        self.leaves = leaves[np.argsort(self.start[leaves])]
+        self.levels = [
+            np.flatnonzero(inner & (depths == depth))
+            for depth in range(depths.max(initial=0), -1, -1)
+        ]
+
+        self.lower = np.empty((len(starts), 3))
+        self.upper = np.empty((len(starts), 3))
+        self.refits = 0
+        self.refit(positions, radii)
+
+    def refit(self, positions: np.ndarray, radii: np.ndarray) -> None:
+        self.positions = positions
+        self.radii = radii
+        self.refits += 1
+        if len(radii) == 0:
+            return
+
+        lower = positions[self.order] - radii[self.order, None]
+        upper = positions[self.order] + radii[self.order, None]
+        self.lower[self.leaves] = np.minimum.reduceat(lower, self.start[self.leaves])
+        self.upper[self.leaves] = np.maximum.reduceat(upper, self.start[self.leaves])
+        for level in self.levels:
+            left = self.left[level]
+            right = self.right[level]
+            self.lower[level] = np.minimum(self.lower[left], self.lower[right])
+            self.upper[level] = np.maximum(self.upper[left], self.upper[right])
+
+    def find_pairs(self) -> np.ndarray:
+        # Every sphere descends the tree at once, one frontier of (sphere, node)
+        # pairs per level
+        positions = self.positions
+        radii = self.radii
+        lower = positions - radii[:, None]
+        upper = positions + radii[:, None]
+
+        spheres = np.arange(len(radii))
+        nodes = np.zeros(len(radii), dtype=int)
+        firsts = []
+        seconds = []
+        while len(spheres):
+            overlap = np.all(lower[spheres] <= self.upper[nodes], axis=1) & np.all(
+                upper[spheres] >= self.lower[nodes], axis=1
+            )
+            spheres = spheres[overlap]
+            nodes = nodes[overlap]
+
+            leaf = self.left[nodes] < 0
+            first, second = _expand_ranges(
+                spheres[leaf], self.start[nodes[leaf]], self.stop[nodes[leaf]]
+            )
+            second = self.order[second]
+            firsts.append(first[first < second])
+            seconds.append(second[first < second])
+
+            inner = nodes[~leaf]
+            spheres = np.concatenate([spheres[~leaf], spheres[~leaf]])
+            nodes = np.concatenate([self.left[inner], self.right[inner]])
+
+        if not firsts:
+            return np.empty((0, 2), dtype=np.int64)
+        return _finalize_pairs(
+            np.concatenate(firsts), np.concatenate(seconds), positions, radii
+        )
+
+
+class BVHBroadPhase(BroadPhase):
+    """Tests the AABBs against a BVH kept between steps.
+
+    The tree is refitted to the new positions every step and rebuilt when the
+    number of bodies changes or after `rebuild_interval` refits, as moving
+    bodies make its bounds grow loose. `bvh` is the tree of the last step,
+    the one spatial queries reuse (see SpatialIndex).
+    """
+
+    def __init__(self, rebuild_interval: int = 30, leaf_size: int = 4):
+        self.rebuild_interval = rebuild_interval
+        self.leaf_size = leaf_size
+        self.bvh: BVH | None = None
+
+    def find_pairs(self, positions, radii):
+        bvh = self.bvh
+        if (
+            bvh is None
+            or len(bvh) != len(radii)
+            or bvh.refits >= self.rebuild_interval
+        ):
+            self.bvh = bvh = BVH(positions, radii, self.leaf_size)
+        else:
+            bvh.refit(positions, radii)
+        return bvh.find_pairs()
@@ -0,0 +1,233 @@
+from math import ceil
+from typing import Dict, List
+import numpy as np
+
+from .gl_object import glObject
+from .physics import contact_geometry
+
+
+def time_of_impact(
+    offsets: np.ndarray, motions: np.ndarray, reach: np.ndarray
+) -> np.ndarray:
+    # First t in [0, 1] at which |offsets + t * motions| reaches reach, inf if
+    # the spheres never touch during the step
+    a = np.einsum("ij,ij->i", motions, motions)
+    b = np.einsum("ij,ij->i", offsets, motions)
+    c = np.einsum("ij,ij->i", offsets, offsets) - reach**2
+
+    discriminant = b * b - a * c
+    hit = (a > 0) & (discriminant >= 0)
+    toi = np.full(len(offsets), np.inf)
+    toi[hit] = (-b[hit] - np.sqrt(discriminant[hit])) / a[hit]
+    toi[(toi < 0) | (toi > 1)] = np.inf
+    return toi
+
+
+class ContinuousCollision:
+    """Catches the contacts fast bodies tunnel through within one step.
+
+    Hitboxes are swept as spheres from their position at the start of the step
+    to the one at its end. Pairs whose sweeps touch while neither end overlaps
+    have their two bodies rewound and resimulated in substeps of at most
+    `fraction` of the smaller radius, checking the pair after every substep.
+    Everything else keeps the full step.
+    """
+
+    def __init__(self, max_substeps: int = 32, fraction: float = 0.5):
+        self.max_substeps = max_substeps
+        self.fraction = fraction
+
+        self._hitboxes = None
+        self._start = None
+        self._bodies: Dict[glObject, int] = {}
+        self._rows: Dict[glObject, slice] = {}
+        self._nodes: List[glObject] = []
+        # Node offsets of the bodies in _nodes, for np.logical_or.reduceat
+        self._offsets = np.empty(0, dtype=int)
+        # Store rows of _nodes, and of those BodyStore.integrate advances per
+        # body, for the store and plan they were computed with
+        self._store = None
+        self._store_rows = None
+        self._plan = None
+        self._integrated = None
+        self._legacy_rows: Dict[glObject, np.ndarray] = {}
+        # State of the nodes of the bodies that could move this step
+        self._snapshot = None
+        self._moving = None
+
+    def reset(self) -> None:
+        # Forget where the hitboxes were, the next step cannot be swept
+        self._hitboxes = None
+
+    def begin_step(self, engine) -> None:
+        # Remembers where every hitbox starts the step from, and the state of
+        # the bodies that can move during it
+        hitboxes = engine.scene_index.hitboxes
+        if hitboxes is not self._hitboxes:
+            self._hitboxes = hitboxes
+            self._start = None
+            self._bodies = {}
+            self._rows = {}
+            self._nodes = []
+            self._store = None
+            self._plan = None
+            for body in dict.fromkeys(engine.scene_index.hitbox_bodies):
+                if body is not None:
+                    start = len(self._nodes)
+                    self._bodies[body] = len(self._bodies)
+                    self._nodes += [body, *body.descendants()]
+                    self._rows[body] = slice(start, len(self._nodes))
+            self._offsets = np.array(
+                [rows.start for rows in self._rows.values()], dtype=int
+            )
+        elif len(engine.hitbox_positions) == len(hitboxes):
+            self._start = engine.hitbox_positions
+
+        plan = engine._plan()
+        store = engine.body_store
+        if store is not self._store:
+            self._store = store
+            self._store_rows = None
+            self._legacy_rows = {}
+            if store is not None and all(node._store is store for node in self._nodes):
+                self._store_rows = np.array(
+                    [node._store_index for node in self._nodes], dtype=int
+                )
+        if plan is not self._plan or self._integrated is None:
+            self._plan = plan
+            self._legacy_rows = {}
+            self._integrated = np.array(
+                [node._integrated for node in self._nodes], dtype=bool
+            )
+
+        # Only nodes with a pending velocity or an integrator move, bodies with
+        # neither end the step where they start it
+        if not self._nodes:
+            self._moving = np.empty(0, dtype=bool)
+            return
+        if self._store_rows is not None:
+            states = store.state[self._store_rows]
+            moving = self._integrated | np.any(states[:, 3] != 0, axis=1)
+        else:
+            states = None
+            moving = self._integrated | np.array(
+                [node._state[3].any() for node in self._nodes], dtype=bool
+            )
+        self._moving = np.logical_or.reduceat(moving, self._offsets)
+
+        nodes = np.repeat(self._moving, np.diff(self._offsets, append=len(self._nodes)))
+        self._snapshot = np.empty((len(self._nodes), 5, 3))
+        if states is not None:
+            self._snapshot[nodes] = states[nodes]
+        else:
+            for i in np.flatnonzero(nodes):
+                self._snapshot[i] = self._nodes[i]._state
+
+    def resolve(self, engine, dt: float) -> list:
+        # Collisions found between the two ends of the step, already dispatched
+        hitboxes = engine.scene_index.hitboxes
+        start = self._start
+        if hitboxes is not self._hitboxes or start is None or len(hitboxes) < 2:
+            return []
+
+        end = engine.hitbox_positions
+        radii = np.array([hitbox.size for hitbox in hitboxes], dtype=float) / 2
+        travel = np.linalg.norm(end - start, axis=1)
+
+        pairs = engine.broad_phase.find_pairs((start + end) / 2, radii + travel / 2)
+        if len(pairs) == 0:
+            return []
+        first = pairs[:, 0]
+        second = pairs[:, 1]
+
+        offsets = start[second] - start[first]
+        motions = (end[second] - end[first]) - offsets
+        reach = radii[first] + radii[second]
+        smaller = np.minimum(radii[first], radii[second])
+
+        # Overlaps at either end are the discrete test's business
+        toi = time_of_impact(offsets, motions, reach)
+        toi[np.linalg.norm(offsets, axis=1) < reach] = np.inf
+        toi[np.linalg.norm(offsets + motions, axis=1) < reach] = np.inf
+        candidates = np.flatnonzero(np.isfinite(toi))
+
+        bodies = engine.scene_index.bodies
+        resolved = set()
+        collisions = []
+        for k in candidates[np.argsort(toi[candidates], kind="stable")]:
+            obj1 = hitboxes[first[k]]
+            obj2 = hitboxes[second[k]]
+            body1 = bodies[obj1]
+            body2 = bodies[obj2]
+            if body1 is None or body2 is None or body1 is body2:
+                continue
+            if body1 in resolved or body2 in resolved:
+                continue
+            resolved.update((body1, body2))
+
+            substeps = ceil(
+                np.linalg.norm(motions[k]) / (self.fraction * smaller[k])
+            )
+            substeps = min(max(substeps, 1), self.max_substeps)
+            if self._resimulate(engine, body1, body2, obj1, obj2, dt, substeps):
+                collisions.append((obj1, obj2))
+
+        # Hitboxes of the resimulated bodies ended up elsewhere, a new array
+        # tells the spatial index to refit
+        if resolved:
+            end = end.copy()
+            for i, hitbox in enumerate(hitboxes):
+                if bodies[hitbox] in resolved:
+                    end[i] = hitbox.get_position_within(engine)
+            engine.hitbox_positions = end
+        return collisions
+
+    def _resimulate(self, engine, body1, body2, obj1, obj2, dt, substeps) -> bool:
+        for body in (body1, body2):
+            if body.sleeping:
+                engine._on_wake(body)
+            if not self._moving[self._bodies[body]]:
+                continue
+            rows = self._rows[body]
+            for node, state in zip(self._nodes[rows], self._snapshot[rows]):
+                node._state[:] = state
+                node.invalidate_transform()
+
+        reach = np.array([(obj1.size + obj2.size) / 2])
+        hit = False
+        for _ in range(substeps):
+            for body in (body1, body2):
+                self._advance(engine, body, dt / substeps)
+            if not hit:
+                offset = np.subtract(
+                    obj2.get_position_within(engine), obj1.get_position_within(engine)
+                )
+                depths, normals = contact_geometry(offset[None], reach)
+                if depths[0] > 0:
+                    engine._dispatch_contacts([obj1], [obj2], depths, normals)
+                    hit = True
+        return hit
+
+    def _advance(self, engine, body: glObject, dt: float) -> None:
+        # What Engine.step does to the body, for a step of dt
+        store = body._store
+        if store is not None:
+            rows = self._legacy_rows.get(body)
+            if rows is None:
+                span = self._rows[body]
+                if self._store_rows is not None:
+                    rows = self._store_rows[span][~self._integrated[span]]
+                else:
+                    rows = np.array(
+                        [
+                            node._store_index
+                            for node in self._nodes[span]
+                            if not node._integrated
+                        ],
+                        dtype=int,
+                    )
+                self._legacy_rows[body] = rows
+            store.integrate(dt, rows)
+        if engine._integration_plan is not None:
+            engine._integration_plan.for_body(body).integrate(dt)
+        body.update(dt)
@@ -0,0 +1,170 @@
+from typing import List
+import numpy as np
+
+from .objects.string import String
+
+
+class Hinge:
+    """Swings a node around one of its axes like a pendulum under gravity.
+
+    The node's rotation around `axis` (0 for x, 2 for z) is the swing angle,
+    0 hanging straight down. `length` defaults to the length of the node when
+    it is a String, else of its first String child.
+
+    A hinge below another one on the same axis is a link of a chain, hanging
+    from the end of the link above with a bob of the same mass. The links of a
+    chain, or of a tree of them, swing together and their angles are relative
+    to the link above. Nodes between two links must not rotate around the axis.
+
+    Set it as glObject.hinge; every hinge advanced by one integrator is solved
+    in a single vectorized pass, see HingeKernel.
+    """
+
+    def __init__(
+        self,
+        axis: int = 2,
+        length: float | None = None,
+        *,
+        gravity: float = 9.81,
+        damping: float = 0.0,
+    ):
+        assert axis in (0, 2), "Gravity only swings hinges around x or z"
+        self.axis = axis
+        self.length = length
+        self.gravity = gravity
+        self.damping = damping
+
+    def length_of(self, node) -> float:
+        if self.length is not None:
+            return self.length
+        for candidate in [node, *node._children]:
+            if isinstance(candidate, String):
+                return candidate.length
+        raise ValueError(f"{node} has no String to take the hinge length from")
+
+
+class HingeKernel:
+    """Angular accelerations of the hinges among the nodes of one group.
+
+    `indices` are the rows of the hinged nodes in the group's arrays, ancestors
+    before their descendants. Single pendulums are solved in closed form, the
+    links of every chain or tree of hinges together, with one batched linear
+    solve per number of links, see _Chains.
+    """
+
+    def __init__(self, nodes: List, indices: np.ndarray):
+        hinges = [node.hinge for node in nodes]
+        axes = np.array([hinge.axis for hinge in hinges], dtype=int)
+        lengths = np.array(
+            [hinge.length_of(node) for node, hinge in zip(nodes, hinges)]
+        )
+        gravity = np.array([hinge.gravity for hinge in hinges])
+        damping = np.array([hinge.damping for hinge in hinges])
+
+        # Position in nodes of the link each hinge hangs from, -1 for the top
+        position = {node: k for k, node in enumerate(nodes)}
+        links = []
+        for node, hinge in zip(nodes, hinges):
+            above = node.parent
+            while above is not None and above.hinge is None:
+                above = above.parent
+            if above is None:
+                links.append(-1)
+                continue
+            if above not in position:
+                raise ValueError(
+                    f"{node} hangs from the hinge of {above}, which another "
+                    "integrator advances"
+                )
+            if above.hinge.axis != hinge.axis:
+                raise ValueError(
+                    f"{node} and {above} are linked hinges on different axes"
+                )
+            links.append(position[above])
+
+        # Members of every system of linked hinges, by the top one
+        systems = {}
+        for k, link in enumerate(links):
+            top = k
+            while links[top] != -1:
+                top = links[top]
+            systems.setdefault(top, []).append(k)
+
+        single = np.array(
+            [members[0] for members in systems.values() if len(members) == 1],
+            dtype=int,
+        )
+        self.indices = indices[single]
+        self.axes = axes[single]
+        self.stiffness = gravity[single] / lengths[single]
+        self.damping = damping[single]
+
+        by_size = {}
+        for members in systems.values():
+            if len(members) > 1:
+                by_size.setdefault(len(members), []).append(members)
+        self.chains = [
+            _Chains(members, links, indices, axes, damping, lengths, gravity)
+            for members in map(np.array, by_size.values())
+        ]
+
+    def __call__(self, rotations, velocities, accelerations) -> None:
+        # Adds to accelerations, all in degrees
+        angles = np.radians(rotations[self.indices, self.axes])
+        swing = np.degrees(-self.stiffness * np.sin(angles))
+        swing -= self.damping * velocities[self.indices, self.axes]
+        accelerations[self.indices, self.axes] += swing
+
+        for chains in self.chains:
+            chains(rotations, velocities, accelerations)
+
+
+class _Chains:
+    # Systems of n linked hinges, each link a massless rod with a unit mass at
+    # its end. In the angles phi of the links against the vertical, Lagrange
+    # gives for every link i
+    #   sum_j weights_ij (cos(phi_i - phi_j) phi_j'' + sin(phi_i - phi_j) phi_j'^2)
+    #     = -pull_i sin(phi_i)
+    # with weights_ij = l_i l_j times the number of bobs below both links and
+    # pull_i = l_i times the gravity on the bobs below link i. The hinge angles
+    # are relative to the link above, phi = paths @ angles
+
+    def __init__(self, members, links, indices, axes, damping, lengths, gravity):
+        # members are (systems, n) positions in the kernel's nodes, top first
+        count, n = members.shape
+        self.rows = indices[members]
+        self.axes = axes[members[:, 0]]
+        self.damping = damping[members]
+
+        # paths[b, i, j] is 1 when link j is link i or above it
+        order = {k: i for system in members.tolist() for i, k in enumerate(system)}
+        self.paths = np.zeros((count, n, n))
+        for b, system in enumerate(members.tolist()):
+            for i, k in enumerate(system):
+                while k != -1:
+                    self.paths[b, i, order[k]] = 1.0
+                    k = links[k]
+        self.unpaths = np.linalg.inv(self.paths)
+
+        below = np.einsum("bki,bkj->bij", self.paths, self.paths)
+        length = lengths[members]
+        self.weights = below * length[:, :, None] * length[:, None, :]
+        self.pull = np.einsum("bki,bk->bi", self.paths, gravity[members]) * length
+
+    def __call__(self, rotations, velocities, accelerations) -> None:
+        axes = self.axes[:, None]
+        angles = np.radians(rotations[self.rows, axes])
+        speeds = velocities[self.rows, axes]
+        phi = np.einsum("bij,bj->bi", self.paths, angles)
+        phi_speed = np.einsum("bij,bj->bi", self.paths, np.radians(speeds))
+
+        difference = phi[:, :, None] - phi[:, None, :]
+        inertia = self.weights * np.cos(difference)
+        forces = -self.pull * np.sin(phi) - np.einsum(
+            "bij,bj->bi", self.weights * np.sin(difference), phi_speed**2
+        )
+        phi_acceleration = np.linalg.solve(inertia, forces[:, :, None])[:, :, 0]
+
+        swing = np.degrees(np.einsum("bij,bj->bi", self.unpaths, phi_acceleration))
+        swing -= self.damping * speeds
+        accelerations[self.rows, axes] += swing
@@ -0,0 +1,127 @@
+from math import radians, tan
+import numpy as np
+
+
+# Sphere tessellation (slices = stacks) by the smallest projected radius in
+# pixels it is used from, finest first
+SPHERE_DETAIL = ((24.0, 32), (8.0, 16), (2.0, 8), (0.0, 6))
+
+# View of the frame being drawn, see Engine.draw
+active_view: "View | None" = None
+
+
+def _rotation(angle_deg: float, axis: int) -> np.ndarray:
+    # What glRotatef does around the x, y or z axis
+    matrix = np.identity(4)
+    c = np.cos(np.radians(angle_deg))
+    s = np.sin(np.radians(angle_deg))
+    i, j = (axis + 1) % 3, (axis + 2) % 3
+    matrix[i, i] = c
+    matrix[j, j] = c
+    matrix[i, j] = -s
+    matrix[j, i] = s
+    return matrix
+
+
+class View:
+    """Camera of an Engine frame, culling subtrees and picking sphere detail.
+
+    Mirrors the projection and modelview Engine.run loads: a perspective of
+    `engine.fov_y` over `engine.clip_planes`, then the engine's translation and
+    its rotations around x and y. Subtrees are tested with their bounding
+    spheres (see glObject.get_bounding_radius) and skipped when they are
+    outside the frustum or project smaller than `min_pixels`. Nodes drawing
+    geometry declare its extent with glObject.draw_radius.
+    """
+
+    def __init__(self, engine, min_pixels: float = 0.5):
+        self.min_pixels = min_pixels
+        self.drawn = 0
+
+        near, far = engine.clip_planes
+        width, height = engine.display
+        focal = 1 / tan(radians(engine.fov_y) / 2)
+        projection = np.array(
+            [
+                [focal * height / width, 0.0, 0.0, 0.0],
+                [0.0, focal, 0.0, 0.0],
+                [0.0, 0.0, (far + near) / (near - far), 2 * far * near / (near - far)],
+                [0.0, 0.0, -1.0, 0.0],
+            ]
+        )
+
+        camera = np.identity(4)
+        camera[:3, 3] = engine.x, engine.y, engine.z
+        camera = camera @ _rotation(engine.rotation_deg[0], 0) @ _rotation(
+            engine.rotation_deg[1], 1
+        )
+        # World matrices are relative to the engine, the camera is on top
+        to_eye = camera
+
+        # Frustum planes in world space, inside where the distance is positive
+        clip = projection @ to_eye
+        planes = np.array(
+            [clip[3] + clip[0], clip[3] - clip[0], clip[3] + clip[1]]
+            + [clip[3] - clip[1], clip[3] + clip[2], clip[3] - clip[2]]
+        )
+        planes /= np.linalg.norm(planes[:, :3], axis=1)[:, None]
+        self._normals = planes[:, :3]
+        self._offsets = planes[:, 3]
+
+        self._depth = -to_eye[2]
+        self._near = near
+        self._pixels_per_unit = focal * height / 2
+        self._camera = camera
+        self._projection = projection
+        self._display = (width, height)
+
+    def __enter__(self):
+        global active_view
+        self._previous = active_view
+        active_view = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global active_view
+        active_view = self._previous
+
+    def pixel_radius(self, node, radius: float) -> float:
+        # Projected radius of a sphere around the node's origin
+        center = node.get_world_matrix()[:3, 3]
+        depth = self._depth[:3] @ center + self._depth[3]
+        if depth <= self._near:
+            return np.inf
+        return radius * self._pixels_per_unit / depth
+
+    def ray(self, pixel) -> tuple:
+        # Origin and direction, in the engine's coordinates, of the ray from the
+        # camera through a window pixel
+        width, height = self._display
+        direction = np.array(
+            [
+                (2 * pixel[0] / width - 1) / self._projection[0, 0],
+                (1 - 2 * pixel[1] / height) / self._projection[1, 1],
+                -1.0,
+            ]
+        )
+        rotation = self._camera[:3, :3]
+        origin = -rotation.T @ self._camera[:3, 3]
+        return origin, rotation.T @ direction
+
+    def sees(self, node) -> bool:
+        radius = node.get_bounding_radius()
+        center = node.get_world_matrix()[:3, 3]
+        if np.any(self._normals @ center + self._offsets < -radius):
+            return False
+        # Subtrees of unknown extent are never too small to see
+        if 0 < radius and self.pixel_radius(node, radius) < self.min_pixels:
+            return False
+        self.drawn += 1
+        return True
+
+    def sphere_detail(self, node, radius: float) -> int:
+        pixels = self.pixel_radius(node, radius)
+        for threshold, detail in SPHERE_DETAIL:
+            if pixels >= threshold:
+                return detail
+        return SPHERE_DETAIL[-1][1]
@@ -1,46 +1,354 @@
-import pygame
-from pygame.locals import *
-from OpenGL.GL import *
-from OpenGL.GLU import *
-
+import contextlib
 import warnings
 import sys
-from itertools import combinations
-
-from .mixins import HasCollisionMixin
+from typing import List
+from time import perf_counter
+import numpy as np
+
+from .body_store import BodyStore
+from .ccd import ContinuousCollision
+from .broadphase import BroadPhase, SweepAndPruneBroadPhase
+from . import culling
 from .gl_object import glObject
-from .physics import Hitbox
+from .integrators import IntegrationPlan, Integrator
+from .parallel import ParallelStepper
+from .physics import Contacts, Hitbox, contact_geometry
+from .profiling import Profiler, overlay_lines
+from .scene_index import SceneIndex
+from .sleeping import SleepManager
+from .spatial import SpatialIndex
+from . import snapshots
+from .recording import TrajectoryRecorder, TrajectoryReplay
 from .config_loader import load_key_mappings
+from .lazy import LazyModule
+
 
+# The windowing and rendering backends, imported once a window is needed
+pygame = LazyModule("pygame")
+GL = LazyModule("OpenGL.GL")
+GLU = LazyModule("OpenGL.GLU")
+rendering = LazyModule("simplephysicsengine.rendering")
 
-CONFIG_PATH: Constant = "simplephysicsengine/config/key_mappings.json"
+
+CONFIG_PATH = "simplephysicsengine/config/key_mappings.json"
+
+# Transform of the engine within its own scene, the camera is kept out of it
+_IDENTITY = np.identity(4)
 
 
 class Engine(glObject):
-    def __init__(self, x, y, z=-50, *, debug=False):
+    def __init__(
+        self,
+        x,
+        y,
+        z=-50,
+        *,
+        debug=False,
+        headless=False,
+        broad_phase: BroadPhase | None = None,
+        body_store: bool = False,
+        instanced_draw: bool = False,
+        culling: bool = True,
+        fixed_dt: float = 1 / 120,
+        max_frame_time: float = 0.25,
+        sleeping: bool = False,
+        ccd: bool = False,
+        integrator: Integrator | None = None,
+        workers: int = 0,
+    ):
         super().__init__(x, y, z, 0, rotation_deg=(0.0, 0.0, 0.0), debug=debug)
 
         warnings.filterwarnings("once", category=UserWarning, module="main")
 
-        self.timer = pygame.time.Clock()
-
-        pygame.init()
+        # Headless engines never open a window nor create a GL context, they are
+        # driven explicitly through step/step_many
+        self.headless = headless
+
+        # Only candidate pairs of the broad phase reach Hitbox.check_collision,
+        # BruteForceBroadPhase is kept as the reference mode
+        self.broad_phase = (
+            broad_phase if broad_phase is not None else SweepAndPruneBroadPhase()
+        )
+
+        # Optional array-backed state of every node below the engine, rebuilt
+        # lazily whenever the scene graph changes
+        self.use_body_store = body_store
+        self.body_store: BodyStore | None = None
+
+        # Batch every Ball/String into one draw call per mesh instead of
+        # traversing them with the GL matrix stack
+        self.instanced_draw = instanced_draw
+
+        # Skip subtrees outside the camera's frustum and tessellate spheres by
+        # their size on screen
+        self.culling = culling
+        self.fov_y = 45.0
+        self.clip_planes = (0.1, 100.0)
+
+        # run() advances the simulation in fixed_dt substeps regardless of the
+        # render rate and draws in between the last two physics states.
+        # max_frame_time bounds the catch-up after a stall
+        self.fixed_dt = fixed_dt
+        self.max_frame_time = max_frame_time
+
+        # Set by start_recording, appends every step to a trajectory file
+        self.recorder: TrajectoryRecorder | None = None
+
+        # Phase timings and counters, only collected while a profiler is set
+        self.profiler: Profiler | None = None
+        self.show_stats = False
+        self._nodes: List[glObject] | None = None
+
+        # Hitboxes and their collision handlers, kept in sync with the tree
+        self.scene_index = SceneIndex(self)
+        # Position of every hitbox relative to the engine, from the last step
+        self.hitbox_positions = np.empty((0, 3))
+        # Raycasts, nearest and radius queries over the hitboxes, sharing the
+        # BVH of a BVHBroadPhase
+        self.spatial_index = SpatialIndex(self)
+        # Hitbox under the mouse at the last left click, see pick
+        self.picked: Hitbox | None = None
+
+        # Quiet bodies stop being updated and collision tested until disturbed
+        self.sleep_manager: SleepManager | None = SleepManager() if sleeping else None
+
+        # Resimulates fast pairs in substeps instead of letting them tunnel
+        self.ccd: ContinuousCollision | None = ContinuousCollision() if ccd else None
+
+        # Steps the top level children on a thread pool, each one colliding
+        # only with itself. Sequential with 0 workers
+        self.parallel: ParallelStepper | None = (
+            ParallelStepper(workers) if workers > 0 else None
+        )
+
+        # Default integrator of the scene, subtrees can set their own
+        self._integration_plan: IntegrationPlan | None = None
+        self.integrator = integrator
+
+        self._timer = None
 
         self.display = (800, 600)
-        pygame.display.set_mode(self.display, DOUBLEBUF | OPENGL)
+        if not headless:
+            pygame.init()
+            pygame.display.set_mode(self.display, pygame.DOUBLEBUF | pygame.OPENGL)
+            rendering.mesh_cache.reset()
 
         self.mouse_down = False
         self.left_button_down = False
         self.right_button_down = False
         self.last_mouse_pos = (0, 0)
 
-        self.key_mappings = load_key_mappings(CONFIG_PATH)
+        self._key_mappings = None
+
+    @property
+    def timer(self):
+        # Created on first use, headless engines driven by step never need one
+        if self._timer is None:
+            self._timer = pygame.time.Clock()
+        return self._timer
+
+    @property
+    def key_mappings(self):
+        if self._key_mappings is None:
+            self._key_mappings = load_key_mappings(CONFIG_PATH)
+        return self._key_mappings
+
+    def update(self, dt: float | None = None):
+        if dt is None:
+            dt = self.timer.tick(60) / 1000
+        self.step(dt)
+
+    @property
+    def nodes(self) -> List[glObject]:
+        # Every node below the engine in pre-order, cached until the tree changes
+        if self._nodes is None:
+            self._nodes = list(self.descendants())
+        return self._nodes
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    def step(self, dt: float):
+        profiler = self.profiler
+        if profiler is not None:
+            start = perf_counter()
+
+        if self.ccd is not None:
+            self.ccd.begin_step(self)
+
+        if self.parallel is not None:
+            self._integrate(dt)
+            self.parallel.update(self, dt)
+        else:
+            self.advance(dt)
+
+        if profiler is not None:
+            start = profiler.lap("update", start)
+            # Subtrees of sleeping bodies are skipped
+            sleeping = 0
+            if self.sleep_manager is not None:
+                sleeping = self.sleep_manager.sleeping_node_count()
+            profiler.count("nodes_updated", self.node_count - sleeping)
+
+        if self.parallel is not None:
+            colliding, depths, normals, positions, asleep, tested = (
+                self.parallel.collide(self)
+            )
+            self.hitbox_positions = positions
+            if profiler is not None:
+                profiler.count("pairs_tested", tested)
+            collisions = self._resolve_contacts(colliding, depths, normals, asleep)
+        else:
+            collisions = self.check_collisions()
+        if self.ccd is not None:
+            collisions += self.ccd.resolve(self, dt)
+
+        if profiler is not None:
+            profiler.lap("check_collisions", start)
+            profiler.count("collisions", len(collisions))
+
+        if self.sleep_manager is not None:
+            self.sleep_manager.update(
+                self.scene_index, self.hitbox_positions, dt, collisions
+            )
+
+        if self.recorder is not None:
+            self.recorder.record(dt, collisions)
+        return collisions
 
-    def update(self):
-        dt = self.timer.tick(60) / 1000
+    def advance(self, dt: float):
+        # The motion of a step, without testing for collisions
+        self._integrate(dt)
         for child in self._children:
-            child.update(dt)
-        self.check_collisions()
+            if not child.sleeping:
+                child.update(dt)
+
+    def _plan(self) -> IntegrationPlan:
+        # The body store, when used, and the plan over it, both kept until the
+        # tree changes
+        if self.use_body_store and self.body_store is None:
+            self.body_store = BodyStore(self.descendants())
+        if self._integration_plan is None:
+            self._integration_plan = IntegrationPlan(self)
+        return self._integration_plan
+
+    def _integrate(self, dt: float):
+        self._plan()
+        if self.body_store is not None:
+            rows = self._integration_plan.legacy_rows
+            # Subtrees of sleeping bodies stay where they are
+            if self.sleep_manager is not None:
+                asleep = self.sleep_manager.sleeping_rows(self.body_store)
+                if asleep is not None and rows is None:
+                    rows = np.flatnonzero(~asleep)
+                elif asleep is not None:
+                    rows = rows[~asleep[rows]]
+            self.body_store.integrate(dt, rows)
+        self._integration_plan.integrate(dt)
+
+    def step_many(self, n: int, dt: float):
+        # Every step counts as a frame for the profiler
+        for _ in range(n):
+            self.step(dt)
+            if self.profiler is not None:
+                self.profiler.end_frame()
+
+    def snapshot(self, out: np.ndarray | None = None) -> snapshots.Snapshot:
+        # State of every node below the engine, a single copy with a BodyStore
+        return snapshots.capture(self.nodes, self.body_store, out)
+
+    def restore(self, snapshot: snapshots.Snapshot) -> None:
+        # Writes a snapshot of this scene back, the nodes themselves stay
+        snapshots.restore(self.nodes, snapshot, self.body_store)
+        self.spatial_index.reset()
+        if self.sleep_manager is not None:
+            self.sleep_manager.reset()
+        if self.ccd is not None:
+            self.ccd.reset()
+
+    def start_recording(self, path: str, chunk_frames: int = 256) -> TrajectoryRecorder:
+        self.stop_recording()
+        self.recorder = TrajectoryRecorder(path, self, chunk_frames)
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def capture_render_state(self):
+        # Position and rotation of every node, the input of draw_interpolated
+        if self.body_store is not None:
+            return self.body_store.nodes, self.body_store.state[:, :2].copy()
+        nodes = list(self.descendants())
+        return nodes, np.array([node._state[:2] for node in nodes]).reshape(-1, 2, 3)
+
+    def draw_interpolated(self, alpha: float, previous_state) -> None:
+        if previous_state is None:
+            self.draw()
+            return
+
+        nodes, previous = previous_state
+        current = np.array([node._state[:2] for node in nodes]).reshape(-1, 2, 3)
+        moving = np.flatnonzero(np.any(previous != current, axis=(1, 2)))
+
+        # Rotations take the short way around the 0/360 wrap
+        delta = current[moving] - previous[moving]
+        delta[:, 1] = (delta[:, 1] + 180) % 360 - 180
+        blended = previous[moving] + alpha * delta
+        # Moved nodes change the bounds culling tests, rotated ones do not
+        shifted = np.any(previous[moving, 0] != current[moving, 0], axis=1)
+
+        for node, state, shift in zip((nodes[i] for i in moving), blended, shifted):
+            node._state[:2] = state
+            node.invalidate_transform()
+            if shift:
+                node._invalidate_bounds()
+        try:
+            self.draw()
+        finally:
+            for i, shift in zip(moving, shifted):
+                nodes[i]._state[:2] = current[i]
+                nodes[i].invalidate_transform()
+                if shift:
+                    nodes[i]._invalidate_bounds()
+
+    def _on_tree_changed(self, node, attached):
+        self._nodes = None
+        self.spatial_index.reset()
+        if self.parallel is not None:
+            self.parallel.reset()
+        if attached:
+            self.scene_index.attach(node)
+        else:
+            self.scene_index.detach(node)
+            for child in [node, *node.descendants()]:
+                child._integrated = False
+            if self.sleep_manager is not None:
+                self.sleep_manager.forget(node)
+        if self.body_store is not None:
+            self.body_store.release()
+            self.body_store = None
+        self._integration_plan = None
+
+    def _on_integrator_changed(self):
+        self._integration_plan = None
+
+    def _on_wake(self, node):
+        body = node._sleeping_body()
+        if body is None:
+            return
+        if self.sleep_manager is not None:
+            self.sleep_manager.wake(body)
+        else:
+            body.sleeping = False
+
+    def pick(self, pixel) -> Hitbox | None:
+        # Closest hitbox under a window pixel
+        origin, direction = culling.View(self).ray(pixel)
+        hits = self.spatial_index.raycast(origin, direction)
+        return hits[0][0] if hits else None
 
     def handle_events(self):
         key_map = {
@@ -76,12 +384,11 @@ class Engine(glObject):
                 self.exit()
             elif event.type == pygame.MOUSEMOTION:
                 if self.left_button_down:
-                    self.rotation_deg[0] += (
-                        event.pos[1] - self.last_mouse_pos[1]
-                    ) * 0.1
-                    self.rotation_deg[1] += (
-                        event.pos[0] - self.last_mouse_pos[0]
-                    ) * 0.1
+                    self.rotation_deg = self.rotation_deg + (
+                        (event.pos[1] - self.last_mouse_pos[1]) * 0.1,
+                        (event.pos[0] - self.last_mouse_pos[0]) * 0.1,
+                        0.0,
+                    )
                     self.last_mouse_pos = event.pos
                 elif self.right_button_down:
                     self.x += (event.pos[0] - self.last_mouse_pos[0]) * 0.1
@@ -91,109 +398,273 @@ class Engine(glObject):
                 if event.button == 1:
                     self.left_button_down = True
                     self.last_mouse_pos = event.pos
+                    self.picked = self.pick(event.pos)
+                    print(f"Picked {self.picked}") if self.debug else ...
                 elif event.button == 3:
                     self.right_button_down = True
                     self.last_mouse_pos = event.pos
+            elif event.type == pygame.KEYDOWN and event.key == key_map["stats"]:
+                self.show_stats = not self.show_stats
+                if self.show_stats and self.profiler is None:
+                    self.profiler = Profiler()
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1:
                     self.left_button_down = False
                 elif event.button == 3:
                     self.right_button_down = False
 
-    def run(self):
-        glMatrixMode(GL_PROJECTION)
-        glLoadIdentity()
-        gluPerspective(45, self.display[0] / self.display[1], 0.1, 100.0)
+    def get_local_matrix(self) -> np.ndarray:
+        # Nodes are placed relative to the engine; its position and rotation
+        # are the camera, which draw loads as the GL view matrix, so moving it
+        # leaves every cached world transform below it clean
+        return _IDENTITY
+
+    def invalidate_transform(self):
+        pass
+
+    def draw(self):
+        if not self.headless:
+            GL.glLoadIdentity()
+            GL.glTranslatef(self.x, self.y, self.z)
+            GL.glRotatef(self.rotation_deg[0], 1, 0, 0)
+            GL.glRotatef(self.rotation_deg[1], 0, 1, 0)
+
+        view = culling.View(self) if self.culling else contextlib.nullcontext()
+        with view:
+            if self.instanced_draw:
+                with rendering.RenderBatch(self):
+                    super().draw()
+            else:
+                super().draw()
+
+        if self.profiler is not None:
+            drawn = view.drawn if self.culling else self.node_count
+            self.profiler.count("nodes_drawn", drawn)
+
+    def run(self, replay: TrajectoryReplay | None = None):
+        if self.headless:
+            raise RuntimeError(
+                "A headless engine has no window to run in, use step/step_many"
+            )
+
+        GL.glMatrixMode(GL.GL_PROJECTION)
+        GL.glLoadIdentity()
+        GLU.gluPerspective(
+            self.fov_y, self.display[0] / self.display[1], *self.clip_planes
+        )
 
-        glMatrixMode(GL_MODELVIEW)
-        glLoadIdentity()
+        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GL.glLoadIdentity()
 
         # Set up lighting
-        glEnable(GL_LIGHTING)
-        glEnable(GL_LIGHT0)
+        GL.glEnable(GL.GL_LIGHTING)
+        GL.glEnable(GL.GL_LIGHT0)
         light_ambient = [0.1, 0.1, 0.1, 1.0]
         light_diffuse = [0.7, 0.7, 0.7, 1.0]
         light_position = [5.0, 5.0, 5.0, 1.0]
-        glLightfv(GL_LIGHT0, GL_AMBIENT, light_ambient)
-        glLightfv(GL_LIGHT0, GL_DIFFUSE, light_diffuse)
-        glLightfv(GL_LIGHT0, GL_POSITION, light_position)
+        GL.glLightfv(GL.GL_LIGHT0, GL.GL_AMBIENT, light_ambient)
+        GL.glLightfv(GL.GL_LIGHT0, GL.GL_DIFFUSE, light_diffuse)
+        GL.glLightfv(GL.GL_LIGHT0, GL.GL_POSITION, light_position)
 
-        glEnable(GL_DEPTH_TEST)
+        GL.glEnable(GL.GL_DEPTH_TEST)
 
         # Enable antialiasing
-        glEnable(GL_LINE_SMOOTH)
-        glEnable(GL_POLYGON_SMOOTH)
-        glEnable(GL_BLEND)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-
+        GL.glEnable(GL.GL_LINE_SMOOTH)
+        GL.glEnable(GL.GL_POLYGON_SMOOTH)
+        GL.glEnable(GL.GL_BLEND)
+        GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+
+        # A replay drives the scene from a recording instead of simulating it
+        replay_nodes = list(self.descendants()) if replay is not None else None
+        replay_time = 0.0
+
+        previous_state = None
+        accumulator = 0.0
+        self.timer.tick()
         while True:
+            profiler = self.profiler
+            if profiler is not None:
+                start = perf_counter()
+
             self.handle_events()
 
-            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            if profiler is not None:
+                profiler.lap("handle_events", start)
 
-            glLoadIdentity()
-            glTranslatef(self.x, self.y, self.z)
-            glRotatef(self.rotation_deg[0], 1, 0, 0)
-            glRotatef(self.rotation_deg[1], 0, 1, 0)
+            frame_time = min(self.timer.tick() / 1000, self.max_frame_time)
+            if replay is not None:
+                replay_time += frame_time
+                replay.apply(replay_nodes, replay.frame_at(replay_time))
+            else:
+                accumulator += frame_time
+                while accumulator >= self.fixed_dt:
+                    previous_state = self.capture_render_state()
+                    self.step(self.fixed_dt)
+                    accumulator -= self.fixed_dt
 
-            self.update()
-            self.draw()
+            GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+
+            if profiler is not None:
+                start = perf_counter()
+
+            self.draw_interpolated(accumulator / self.fixed_dt, previous_state)
+            if self.show_stats and profiler is not None:
+                rendering.draw_text_overlay(overlay_lines(profiler), self.display)
+
+            if profiler is not None:
+                start = profiler.lap("draw", start)
 
             pygame.display.flip()
-            pygame.time.wait(10)
+
+            if profiler is not None:
+                profiler.lap("flip", start)
+                profiler.end_frame()
 
     def exit(self):
+        self.stop_recording()
+        if self.parallel is not None:
+            self.parallel.close()
         pygame.quit()
         sys.exit(0)
 
     def check_collisions(self):
-        def find_closest_collision_handler(self):
-            current = self
-            while current is not None:
-                if isinstance(current, HasCollisionMixin):
-                    return current
-                current = current.parent
-            raise Error("No collision handler found in the hierarchy")
-
-        def find_closest_common_ancestor(obj1, obj2) -> None | glObject:
-            # Traverse up from obj1 and collect all its ancestors
-            ancestors = set()
-            current1 = obj1
-            while current1 is not None:
-                ancestors.add(current1)
-                current1 = current1.parent
-
-            # Traverse up from obj2 and find the first common ancestor
-            current2 = obj2
-            while current2 is not None:
-                if current2 in ancestors:
-                    return current2
-                current2 = current2.parent
-
-            # raise Error("No common ancestor found. Did you collide ")  # No common ancestor found, which should not happen if both objects belong to the same tree
-            warnings.warn(
-                "No common ancestor found. Did you collide objects from different trees?",
-                category=UserWarning,
+        collidable_objects = self.scene_index.hitboxes
+
+        positions = np.array(
+            [obj.get_position_within(self) for obj in collidable_objects], dtype=float
+        ).reshape(-1, 3)
+        self.hitbox_positions = positions
+
+        if len(collidable_objects) < 2:
+            return []
+
+        asleep = self._asleep_hitboxes()
+        colliding, depths, normals, tested = self._find_colliding(
+            collidable_objects, positions, asleep
+        )
+        if self.profiler is not None:
+            self.profiler.count("pairs_tested", tested)
+        return self._resolve_contacts(colliding, depths, normals, asleep)
+
+    def _asleep_hitboxes(self) -> np.ndarray | None:
+        # Whether the body of every hitbox sleeps, None without a SleepManager
+        if self.sleep_manager is None:
+            return None
+        return np.array(
+            [
+                body is not None and body.sleeping
+                for body in self.scene_index.hitbox_bodies
+            ],
+            dtype=bool,
+        )
+
+    def _find_colliding(
+        self, collidable_objects, positions, asleep, groups=None, broad_phase=None
+    ):
+        # Colliding pairs of rows of collidable_objects, sorted, with their
+        # depths and normals, and how many candidate pairs were tested. Hitboxes
+        # of the same group were already tested against each other and are not
+        # paired again
+        sizes = np.array([obj.size for obj in collidable_objects], dtype=float)
+
+        broad_phase = broad_phase if broad_phase is not None else self.broad_phase
+        pairs = broad_phase.find_pairs(positions, sizes / 2)
+        if groups is not None:
+            pairs = pairs[groups[pairs[:, 0]] != groups[pairs[:, 1]]]
+
+        # Sleeping bodies cannot hit each other
+        if asleep is not None:
+            pairs = pairs[~(asleep[pairs[:, 0]] & asleep[pairs[:, 1]])]
+
+        # Pairs of the same batchable hitbox type go through one vectorized call,
+        # everything else falls back to Hitbox.check_collision
+        kernels = {}
+        ids = {}
+        for cls in map(type, collidable_objects):
+            if cls not in ids:
+                kernel = cls._batched_kernel()
+                ids[cls] = kernels.setdefault(kernel, len(kernels) + 1) if kernel else 0
+        kernel_ids = np.array(
+            [ids[type(obj)] for obj in collidable_objects], dtype=int
+        )
+        first_ids = kernel_ids[pairs[:, 0]]
+        batched = (first_ids != 0) & (first_ids == kernel_ids[pairs[:, 1]])
+
+        colliding = [np.empty((0, 2), dtype=int)]
+        depths = [np.empty(0)]
+        normals = [np.empty((0, 3))]
+        for kernel, kernel_id in kernels.items():
+            hits, hit_depths, hit_normals = kernel(
+                pairs[batched & (first_ids == kernel_id)], positions, sizes
             )
-            return None  # No common ancestor found, which should not happen if both objects belong to the same tree
-
-        def get_flattened_objects(self):
-            flattened_objects = []
-            for child in self._children:
-                flattened_objects.append(child)
-                flattened_objects.extend(get_flattened_objects(child))
-            return flattened_objects
-
-        # Filter out objects that have no hitbox
-        flattened_objects = get_flattened_objects(self)
-        collidable_objects = [
-            obj for obj in flattened_objects if isinstance(obj, Hitbox)
-        ]
-
-        for obj1, obj2 in combinations(collidable_objects, 2):
-            common_ancestor = find_closest_common_ancestor(obj1, obj2)
+            colliding.append(hits)
+            depths.append(hit_depths)
+            normals.append(hit_normals)
+
+        fallback = []
+        for i, j in pairs[~batched]:
+            obj1 = collidable_objects[i]
+            obj2 = collidable_objects[j]
+            common_ancestor = self.scene_index.common_ancestor(obj1, obj2)
             if obj1.check_collision(obj2, common_ancestor):
-                handler = find_closest_collision_handler(obj1)
-                handler.on_collision(obj1.parent, obj2.parent)
-                handler = find_closest_collision_handler(obj2)
-                handler.on_collision(obj1.parent, obj2.parent)
+                fallback.append((i, j))
+        if fallback:
+            # The bounding sphere overlap of the pairs the kernels did not see
+            hits = np.array(fallback, dtype=int)
+            hit_depths, hit_normals = contact_geometry(
+                positions[hits[:, 1]] - positions[hits[:, 0]],
+                (sizes[hits[:, 0]] + sizes[hits[:, 1]]) / 2,
+            )
+            colliding.append(hits)
+            depths.append(hit_depths)
+            normals.append(hit_normals)
+
+        # Dispatch in the order of the reference all-pairs loop
+        colliding = np.concatenate(colliding)
+        order = np.lexsort((colliding[:, 1], colliding[:, 0]))
+        return (
+            colliding[order],
+            np.concatenate(depths)[order],
+            np.concatenate(normals)[order],
+            len(pairs),
+        )
+
+    def _resolve_contacts(self, colliding, depths, normals, asleep):
+        # Wakes and dispatches the colliding rows of scene_index.hitboxes
+        collidable_objects = self.scene_index.hitboxes
+
+        # Contact with an awake body wakes the island of a sleeping one
+        if asleep is not None:
+            bodies = self.scene_index.hitbox_bodies
+            for k in colliding[asleep[colliding].any(axis=1)].ravel():
+                if bodies[k].sleeping:
+                    self.sleep_manager.wake(bodies[k])
+
+        first = [collidable_objects[i] for i in colliding[:, 0]]
+        second = [collidable_objects[j] for j in colliding[:, 1]]
+        self._dispatch_contacts(first, second, depths, normals)
+        return list(zip(first, second))
+
+    def _dispatch_contacts(self, first, second, depths, normals):
+        # Every handler gets the contacts below it in one call, after the whole
+        # narrow phase, and each pair only once
+        handlers = self.scene_index.handlers
+        rows = {}
+        for k, pair in enumerate(zip(first, second)):
+            for obj in pair:
+                handler = handlers[obj]
+                if handler is None:
+                    raise RuntimeError(f"No collision handler found above {obj}")
+                indices = rows.setdefault(handler, [])
+                if not indices or indices[-1] != k:
+                    indices.append(k)
+
+        for handler, indices in rows.items():
+            handler.on_collisions(
+                Contacts(
+                    [first[k] for k in indices],
+                    [second[k] for k in indices],
+                    depths[indices],
+                    normals[indices],
+                )
+            )
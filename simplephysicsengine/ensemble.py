@@ -0,0 +1,110 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import product
+from typing import Callable, Dict, Iterable, Iterator, List
+import numpy as np
+
+from .engine import Engine
+
+
+# Probes sample one scalar per recorded step from the running engine
+Probe = Callable[[Engine], float]
+
+
+def angular_kinetic_energy(engine: Engine) -> float:
+    # Unit inertia for every node, angular velocities in rad/s
+    velocities = np.radians(_state_of(list(engine.descendants()))[:, 2])
+    return 0.5 * float(np.sum(velocities**2))
+
+
+@dataclass
+class EnsembleResult:
+    params: dict
+    # (recorded steps, nodes, 3, 3): position, rotation and angular velocity per node
+    trajectory: np.ndarray
+    # Collisions found per recorded step plus one series per probe
+    metrics: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def collision_count(self) -> int:
+        return int(self.metrics["collisions"].sum())
+
+
+def parameter_grid(grid: Dict[str, list]) -> List[dict]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*grid.values())]
+
+
+def _state_of(nodes) -> np.ndarray:
+    return np.array([node._state[:3] for node in nodes]).reshape(-1, 3, 3)
+
+
+def run_scene(
+    builder: Callable[..., Engine],
+    params: dict,
+    *,
+    steps: int,
+    dt: float,
+    record_every: int = 1,
+    probes: Dict[str, Probe] | None = None,
+) -> EnsembleResult:
+    engine = builder(**params)
+    if not engine.headless:
+        raise ValueError("Scene builders for ensembles must return headless engines")
+
+    probes = {"kinetic_energy": angular_kinetic_energy, **(probes or {})}
+    nodes = list(engine.descendants())
+    samples = (steps + record_every - 1) // record_every
+
+    trajectory = np.empty((samples, len(nodes), 3, 3))
+    metrics = {name: np.empty(samples) for name in ["collisions", *probes]}
+
+    collisions = 0
+    for step in range(steps):
+        collisions += len(engine.step(dt))
+        # Each sample closes a window of record_every steps
+        if (step + 1) % record_every == 0 or step + 1 == steps:
+            sample = step // record_every
+            if engine.body_store is not None and engine.body_store.nodes == nodes:
+                trajectory[sample] = engine.body_store.state[:, :3]
+            else:
+                trajectory[sample] = _state_of(nodes)
+            metrics["collisions"][sample] = collisions
+            collisions = 0
+            for name, probe in probes.items():
+                metrics[name][sample] = probe(engine)
+
+    return EnsembleResult(params, trajectory, metrics)
+
+
+def run_ensemble(
+    builder: Callable[..., Engine],
+    grid: Dict[str, list] | Iterable[dict],
+    *,
+    steps: int,
+    dt: float,
+    record_every: int = 1,
+    probes: Dict[str, Probe] | None = None,
+    max_workers: int | None = None,
+) -> Iterator[EnsembleResult]:
+    """Runs builder(**params) headless for every parameter set on a process pool.
+
+    Only the parameters travel to the workers and only the recorded arrays come
+    back, results are yielded as soon as each run finishes. The builder and the
+    probes must be picklable, i.e. defined at module level.
+    """
+    runs = parameter_grid(grid) if isinstance(grid, dict) else list(grid)
+    run = partial(
+        run_scene,
+        builder,
+        steps=steps,
+        dt=dt,
+        record_every=record_every,
+        probes=probes,
+    )
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run, params) for params in runs]
+        for future in as_completed(futures):
+            yield future.result()
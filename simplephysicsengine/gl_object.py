@@ -1,9 +1,53 @@
+import threading
 from abc import ABC
+from math import cos, radians, sin
 from typing import List
 import numpy as np
 
+from . import culling, snapshots
+
+
+_IDENTITY = np.identity(4)
+
+# Transform of an unrotated node, one per thread, see glObject._local_transform
+_scratch = threading.local()
+
+
+def _translation(position: np.ndarray) -> np.ndarray:
+    matrix = getattr(_scratch, "matrix", None)
+    if matrix is None:
+        matrix = _scratch.matrix = _IDENTITY.copy()
+    matrix[0, 3], matrix[1, 3], matrix[2, 3] = position.tolist()
+    return matrix
+
 
 class glObject(ABC):
+    # Optional classmethod (nodes, rotations, velocities) -> (n, 3) angular
+    # accelerations in deg/s^2, vectorized over all nodes of the class. Such
+    # nodes are advanced by an Integrator, see integrators.IntegrationPlan
+    angular_accelerations = None
+
+    # No per-instance __dict__, subclasses declare their own attributes too
+    __slots__ = (
+        "_debug",
+        "parent",
+        "_children",
+        "_local_matrix",
+        "_world_matrix",
+        "_local_dirty",
+        "_world_dirty",
+        "_bounding_radius",
+        "_bounds_dirty",
+        "_store",
+        "_store_index",
+        "_state",
+        "sleeping",
+        "_integrator",
+        "_integrated",
+        "_hinge",
+        "color",
+    )
+
     def __init__(
         self,
         x: float,
@@ -15,7 +59,7 @@ class glObject(ABC):
         color: tuple[float] = (1.0, 1.0, 1.0),
         debug: bool = False
     ):
-        self._debug = debug
+        self._setup(np.zeros((5, 3)), color, debug)
 
         self.x = x
         self.y = y
@@ -24,30 +68,64 @@ class glObject(ABC):
         assert (
             isinstance(rotation_deg, tuple) and len(rotation_deg) == 3
         ), "Rotation must be a 3-tuple"
-        self.rotation_deg = np.array(rotation_deg)
-
-        self.angular_velocity = np.array([0.0, 0.0, 0.0])
-        self.__future_angular_velocity = self.angular_velocity
-        self.assign_angular_velocity((0.0, 0.0, 0.0))
-        self.__update_variables()
+        self.rotation_deg = rotation_deg
 
         self.size = size
-        self.color = color
+
+    def _setup(self, state: np.ndarray, color: tuple[float], debug: bool):
+        # Everything but the initial state, which the bulk scene loader fills in
+        # directly, see scene_file.Scene.build
+        self._debug = debug
+
         self.parent: glObject | None = None
         self._children: List[glObject] = []
 
+        # Cached 4x4 transforms, rewritten in place by get_local_matrix and
+        # get_world_matrix. The local one is only allocated once asked for
+        self._local_matrix = None
+        self._world_matrix = _IDENTITY.copy()
+        self._local_dirty = True
+        self._world_dirty = True
+
+        # Radius around the origin enclosing everything the subtree draws, see
+        # get_bounding_radius
+        self._bounding_radius = 0.0
+        self._bounds_dirty = True
+
+        # Position, rotation, angular velocity, the pending angular velocity and
+        # the size (first column), possibly a row of a shared BodyStore
+        self._store = None
+        self._store_index = -1
+        self._bind_state(state)
+
+        # Sleeping nodes are skipped by their parent's update, see SleepManager
+        self.sleeping = False
+
+        # Integrator of this subtree and whether one advances this node
+        self._integrator = None
+        self._integrated = False
+        # Pendulum constraint of the node, see constraints.Hinge
+        self._hinge = None
+
+        self.color = color
+
     def add_child(self, child: "glObject"):
         child.set_parent(self)
         child.debug = self.debug
         self._children.append(child)
+        self._invalidate_bounds()
+        self.root._on_tree_changed(child, attached=True)
 
     def add_children(self, children: List["glObject"]):
         for child in children:
             self.add_child(child)
 
     def remove_child(self, child: "glObject"):
+        root = self.root
         child.set_parent(None)
         self._children.remove(child)
+        self._invalidate_bounds()
+        root._on_tree_changed(child, attached=False)
 
     def remove_children(self, children: List["glObject"]):
         for child in children:
@@ -55,75 +133,294 @@ class glObject(ABC):
 
     def set_parent(self, parent: "glObject"):
         self.parent = parent
+        self._invalidate_world_matrix()
+
+    @property
+    def root(self) -> "glObject":
+        current = self
+        while current.parent is not None:
+            current = current.parent
+        return current
+
+    def descendants(self):
+        # Pre-order, the order every flat per-node array of the scene follows
+        stack = list(reversed(self._children))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node._children))
+
+    def snapshot(self, out: np.ndarray | None = None) -> snapshots.Snapshot:
+        # Dynamic state of this node and its subtree, see Engine.snapshot
+        return snapshots.capture([self, *self.descendants()], out=out)
+
+    def restore(self, snapshot: snapshots.Snapshot) -> None:
+        snapshots.restore([self, *self.descendants()], snapshot)
+
+    def _on_tree_changed(self, node: "glObject", attached: bool):
+        # Called on the root whenever the subtree of node is attached or detached,
+        # hook for roots that keep per-tree bookkeeping
+        pass
+
+    def _on_integrator_changed(self):
+        # Called on the root whenever an integrator or a hinge is set below it
+        pass
+
+    @property
+    def integrator(self):
+        return self._integrator
+
+    @integrator.setter
+    def integrator(self, integrator):
+        self._integrator = integrator
+        self.root._on_integrator_changed()
+
+    @property
+    def hinge(self):
+        return self._hinge
+
+    @hinge.setter
+    def hinge(self, hinge):
+        self._hinge = hinge
+        self.root._on_integrator_changed()
+
+    def _on_wake(self, node: "glObject"):
+        # Called on the root when node is disturbed, wakes the sleeping body it
+        # belongs to
+        body = node._sleeping_body()
+        if body is not None:
+            body.sleeping = False
+
+    def _sleeping_body(self) -> "glObject | None":
+        # Closest sleeping node from this one up, itself included
+        node = self
+        while node is not None and not node.sleeping:
+            node = node.parent
+        return node
+
+    def _wake(self):
+        # State set from outside a step disturbs the node's body
+        self.root._on_wake(self)
+
+    def _bind_state(self, state: np.ndarray):
+        # Rows are indexed where needed, views kept per node would cost more
+        # than the state itself
+        self._state = state
+
+    @property
+    def x(self) -> float:
+        return self._state[0, 0]
+
+    @x.setter
+    def x(self, value: float):
+        self._state[0, 0] = value
+        self.invalidate_transform()
+        self._invalidate_bounds()
+        self._wake()
+
+    @property
+    def y(self) -> float:
+        return self._state[0, 1]
+
+    @y.setter
+    def y(self, value: float):
+        self._state[0, 1] = value
+        self.invalidate_transform()
+        self._invalidate_bounds()
+        self._wake()
+
+    @property
+    def z(self) -> float:
+        return self._state[0, 2]
+
+    @z.setter
+    def z(self, value: float):
+        self._state[0, 2] = value
+        self.invalidate_transform()
+        self._invalidate_bounds()
+        self._wake()
+
+    @property
+    def size(self) -> float:
+        return self._state[4, 0]
+
+    @size.setter
+    def size(self, value: float):
+        self._state[4, 0] = value
+        self._invalidate_bounds()
+        self._wake()
+
+    @property
+    def rotation_deg(self) -> np.ndarray:
+        return self._state[1]
+
+    @rotation_deg.setter
+    def rotation_deg(self, value):
+        self._state[1] = value
+        self.invalidate_transform()
+        self._wake()
+
+    @property
+    def angular_velocity(self) -> np.ndarray:
+        return self._state[2]
+
+    @angular_velocity.setter
+    def angular_velocity(self, value):
+        self._state[2] = value
+        self._wake()
+
+    def invalidate_transform(self):
+        # Needed after mutating rotation_deg in place, the setters call it already
+        self._local_dirty = True
+        self._invalidate_world_matrix()
+
+    def _invalidate_world_matrix(self):
+        # A dirty node always has dirty descendants, so the walk can stop early
+        if self._world_dirty:
+            return
+        self._world_dirty = True
+        for child in self._children:
+            child._invalidate_world_matrix()
 
     def __update_variables(self):
-        if np.any(self.__future_angular_velocity != self.angular_velocity):
-            self.angular_velocity = self.__future_angular_velocity
+        state = self._state
+        state[2] = state[3]
 
     def update(self, dt: float) -> None:
-        self.__update_variables()
+        # Nodes bound to a BodyStore or advanced by an Integrator are integrated
+        # in bulk
+        if self._store is None and not self._integrated:
+            self.__update_variables()
 
-        self.rotation_deg = (
-            np.array(self.rotation_deg) + np.array(self.angular_velocity) * dt
-        )
-        self.rotation_deg %= 360
-        self.rotation_deg = tuple(self.rotation_deg)
+            # Resting nodes keep their cached transforms
+            state = self._state
+            if any(state[2].tolist()):
+                # In place, the pending velocity equals the current one here and
+                # serves as scratch
+                rotation, velocity, scratch = state[1], state[2], state[3]
+                np.multiply(scratch, dt, out=scratch)
+                np.add(rotation, scratch, out=rotation)
+                np.remainder(rotation, 360, out=rotation)
+                np.copyto(scratch, velocity)
+                self.invalidate_transform()
 
         for child in self._children:
-            child.update(dt)
+            if not child.sleeping:
+                child.update(dt)
 
     def assign_angular_velocity(self, angular_velocity: tuple[float]):
         assert len(angular_velocity) == 3, "Angular velocity must be a 3-tuple"
-        self.__future_angular_velocity = np.array(angular_velocity)
+        self._wake()
+        self._state[3] = angular_velocity
 
     def draw(self) -> None:
+        # Within Engine.draw, subtrees out of view are skipped
+        view = culling.active_view
         for child in self._children:
-            child.draw()
+            if view is None or view.sees(child):
+                child.draw()
 
-    def get_position_within(self, ancestor: "glObject"):
-        def apply_rotation(x, y, z, rotation_deg):
-            # Convert degrees to radians
-            rx, ry, rz = np.radians(rotation_deg)
+    def draw_radius(self) -> float:
+        # Extent of what draw puts around the node's origin, nodes drawing
+        # geometry override it so culling keeps them
+        return 0.0
 
-            # Rotation matrices for x, y, z
-            rot_x = np.array(
-                [[1, 0, 0], [0, np.cos(rx), -np.sin(rx)], [0, np.sin(rx), np.cos(rx)]]
-            )
+    def get_bounding_radius(self) -> float:
+        # Rotations keep it, only positions, sizes and the tree change it
+        if self._bounds_dirty:
+            radius = self.draw_radius()
+            for child in self._children:
+                x, y, z = child._state[0].tolist()
+                reach = (x * x + y * y + z * z) ** 0.5 + child.get_bounding_radius()
+                if reach > radius:
+                    radius = reach
+            self._bounding_radius = radius
+            self._bounds_dirty = False
+        return self._bounding_radius
 
-            rot_y = np.array(
-                [[np.cos(ry), 0, np.sin(ry)], [0, 1, 0], [-np.sin(ry), 0, np.cos(ry)]]
-            )
+    def _invalidate_bounds(self):
+        # A node with stale bounds always has ancestors with stale bounds
+        node = self
+        while node is not None and not node._bounds_dirty:
+            node._bounds_dirty = True
+            node = node.parent
 
-            rot_z = np.array(
-                [[np.cos(rz), -np.sin(rz), 0], [np.sin(rz), np.cos(rz), 0], [0, 0, 1]]
-            )
+    def get_local_matrix(self) -> np.ndarray:
+        if self._local_dirty:
+            rx, ry, rz = self._state[1].tolist()
+            rx, ry, rz = radians(rx), radians(ry), radians(rz)
+            cx, sx = cos(rx), sin(rx)
+            cy, sy = cos(ry), sin(ry)
+            cz, sz = cos(rz), sin(rz)
 
-            # Combined rotation matrix
-            rotation_matrix = np.dot(rot_z, np.dot(rot_y, rot_x))
+            # Translation after the combined rotation rot_z @ rot_y @ rot_x
+            matrix = self._local_matrix
+            if matrix is None:
+                matrix = self._local_matrix = _IDENTITY.copy()
+            matrix[0, 0] = cz * cy
+            matrix[0, 1] = cz * sy * sx - sz * cx
+            matrix[0, 2] = cz * sy * cx + sz * sx
+            matrix[1, 0] = sz * cy
+            matrix[1, 1] = sz * sy * sx + cz * cx
+            matrix[1, 2] = sz * sy * cx - cz * sx
+            matrix[2, 0] = -sy
+            matrix[2, 1] = cy * sx
+            matrix[2, 2] = cy * cx
+            matrix[0, 3] = self._state[0, 0]
+            matrix[1, 3] = self._state[0, 1]
+            matrix[2, 3] = self._state[0, 2]
+            self._local_dirty = False
+        return self._local_matrix
 
-            # Apply rotation
-            pos = np.array([x, y, z])
-            rotated_pos = np.dot(rotation_matrix, pos)
+    def _local_transform(self) -> np.ndarray:
+        # What get_world_matrix composes, unrotated nodes that never needed a
+        # local matrix of their own borrow a per-thread translation
+        if self._local_matrix is None and not any(self._state[1].tolist()):
+            return _translation(self._state[0])
+        return self.get_local_matrix()
 
-            return rotated_pos[0], rotated_pos[1], rotated_pos[2]
+    def get_world_matrix(self) -> np.ndarray:
+        if self._world_dirty:
+            # Walk up to the closest clean ancestor, then rebuild downwards
+            dirty = []
+            current = self
+            while current is not None and current._world_dirty:
+                dirty.append(current)
+                current = current.parent
 
-        x = 0.0
-        y = 0.0
-        z = 0.0
-        current = self
+            for node in reversed(dirty):
+                if node.parent is None:
+                    np.copyto(node._world_matrix, node.get_local_matrix())
+                else:
+                    np.matmul(
+                        node.parent._world_matrix,
+                        node._local_transform(),
+                        out=node._world_matrix,
+                    )
+                node._world_dirty = False
+        return self._world_matrix
 
-        safety_counter = 0
-        while (
-            current is not ancestor and safety_counter < 10
-        ):  # Safety counter to prevent infinite loops, maybe raise an error/warn instead
-            safety_counter += 1
-            x, y, z = apply_rotation(x, y, z, current.rotation_deg)
-            x += current.x
-            y += current.y
-            z += current.z
-            current = current.parent
+    def get_matrix_within(self, ancestor: "glObject | None") -> np.ndarray:
+        world = self.get_world_matrix()
+        if ancestor is None:
+            return world
+
+        # Rigid transforms invert as a transposed rotation
+        inverse = np.identity(4)
+        rotation = ancestor.get_world_matrix()[:3, :3].T
+        inverse[:3, :3] = rotation
+        inverse[:3, 3] = -rotation @ ancestor.get_world_matrix()[:3, 3]
+        return inverse @ world
+
+    def get_position_within(self, ancestor: "glObject | None"):
+        world = self.get_world_matrix()
+        if ancestor is None:
+            position = world[:3, 3]
+        else:
+            frame = ancestor.get_world_matrix()
+            position = frame[:3, :3].T @ (world[:3, 3] - frame[:3, 3])
 
-        return x, y, z
+        return position[0], position[1], position[2]
 
     @property
     def debug(self):
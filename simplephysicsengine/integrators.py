@@ -0,0 +1,219 @@
+from abc import ABC, abstractmethod
+from typing import Callable, List
+import numpy as np
+
+from .constraints import HingeKernel
+from .gl_object import glObject
+from .mixins import HasCollisionMixin
+
+
+# Angular accelerations in deg/s^2 for (rotations, velocities), both (n, 3)
+Acceleration = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+class Integrator(ABC):
+    """Advances rotations and angular velocities of many nodes at once."""
+
+    @abstractmethod
+    def step(
+        self,
+        rotations: np.ndarray,
+        velocities: np.ndarray,
+        dt: float,
+        acceleration: Acceleration,
+    ):
+        # Returns the new (rotations, velocities)
+        pass
+
+
+class ExplicitEuler(Integrator):
+    # What glObject.update does, first order and drifting
+    def step(self, rotations, velocities, dt, acceleration):
+        return (
+            rotations + velocities * dt,
+            velocities + acceleration(rotations, velocities) * dt,
+        )
+
+
+class SemiImplicitEuler(Integrator):
+    # Symplectic, the energy of oscillators stays bounded
+    def step(self, rotations, velocities, dt, acceleration):
+        velocities = velocities + acceleration(rotations, velocities) * dt
+        return rotations + velocities * dt, velocities
+
+
+class VelocityVerlet(Integrator):
+    # Second order, velocity dependent terms use a predicted velocity
+    def step(self, rotations, velocities, dt, acceleration):
+        current = acceleration(rotations, velocities)
+        rotations = rotations + velocities * dt + 0.5 * current * dt**2
+        predicted = velocities + current * dt
+        following = acceleration(rotations, predicted)
+        return rotations, velocities + 0.5 * (current + following) * dt
+
+
+class RK4(Integrator):
+    def step(self, rotations, velocities, dt, acceleration):
+        k1_r = velocities
+        k1_v = acceleration(rotations, velocities)
+        k2_r = velocities + 0.5 * dt * k1_v
+        k2_v = acceleration(rotations + 0.5 * dt * k1_r, k2_r)
+        k3_r = velocities + 0.5 * dt * k2_v
+        k3_v = acceleration(rotations + 0.5 * dt * k2_r, k3_r)
+        k4_r = velocities + dt * k3_v
+        k4_v = acceleration(rotations + dt * k3_r, k4_r)
+        return (
+            rotations + dt / 6 * (k1_r + 2 * k2_r + 2 * k3_r + k4_r),
+            velocities + dt / 6 * (k1_v + 2 * k2_v + 2 * k3_v + k4_v),
+        )
+
+
+class _Group:
+    # Nodes sharing an integrator, split by the class providing accelerations
+    def __init__(self, integrator: Integrator):
+        self.integrator = integrator
+        self.nodes: List[glObject] = []
+        self.bodies: List[glObject | None] = []
+
+    def finish(self):
+        self.rows = np.array([node._store_index for node in self.nodes], dtype=int)
+        self.kernels = []
+        by_class = {}
+        for i, node in enumerate(self.nodes):
+            if type(node).angular_accelerations is not None:
+                by_class.setdefault(type(node), []).append(i)
+        for cls, indices in by_class.items():
+            self.kernels.append(
+                (
+                    cls.angular_accelerations,
+                    np.array(indices),
+                    [self.nodes[i] for i in indices],
+                )
+            )
+
+        hinged = [i for i, node in enumerate(self.nodes) if node.hinge is not None]
+        self.hinges = None
+        if hinged:
+            self.hinges = HingeKernel(
+                [self.nodes[i] for i in hinged], np.array(hinged)
+            )
+
+    def acceleration(self, rotations, velocities):
+        accelerations = np.zeros_like(rotations)
+        for kernel, indices, nodes in self.kernels:
+            accelerations[indices] += kernel(
+                nodes, rotations[indices], velocities[indices]
+            )
+        if self.hinges is not None:
+            self.hinges(rotations, velocities, accelerations)
+        return accelerations
+
+
+class IntegrationPlan:
+    """Which nodes below an engine each integrator advances.
+
+    A node uses the integrator of its closest ancestor (itself included) that
+    sets one, else the engine's. Nodes without either but with an
+    angular_accelerations hook or a hinge use ExplicitEuler, the remaining
+    nodes keep the plain glObject.update/BodyStore path.
+    """
+
+    def __init__(self, engine, body: glObject | None = None):
+        self.engine = engine
+        self.store = engine.body_store
+        # Only a SleepManager puts bodies to sleep, and bodies given one by one
+        # are awake
+        whole = body is None
+        self.sleeping = engine.sleep_manager is not None and whole
+        default = engine.integrator
+        fallback = ExplicitEuler()
+        groups = {}
+        self._body_plans = {}
+
+        if whole:
+            stack = [
+                (child, child.integrator or default, None) for child in engine._children
+            ]
+        else:
+            # What the whole plan does to the nodes of body, see for_body
+            integrator = body.integrator
+            ancestor = body.parent
+            while ancestor is not None:
+                integrator = integrator or ancestor.integrator
+                ancestor = ancestor.parent
+            stack = [(body, integrator or default, body)]
+        while stack:
+            node, integrator, body = stack.pop()
+            if isinstance(node.parent, HasCollisionMixin):
+                body = node
+
+            node_integrator = integrator
+            if node_integrator is None and (
+                type(node).angular_accelerations is not None or node.hinge is not None
+            ):
+                node_integrator = fallback
+            node._integrated = node_integrator is not None
+            if node._integrated:
+                group = groups.setdefault(id(node_integrator), _Group(node_integrator))
+                group.nodes.append(node)
+                group.bodies.append(body)
+
+            stack.extend(
+                (child, child.integrator or integrator, body)
+                for child in node._children
+            )
+
+        self.groups = list(groups.values())
+        for group in self.groups:
+            group.finish()
+
+        # Rows BodyStore.integrate still advances on its own
+        self.legacy_rows = None
+        if self.store is not None and self.groups and whole:
+            integrated = np.concatenate([group.rows for group in self.groups])
+            legacy = np.ones(len(self.store), dtype=bool)
+            legacy[integrated] = False
+            self.legacy_rows = np.flatnonzero(legacy)
+
+    def for_body(self, body: glObject) -> "IntegrationPlan":
+        # The plan of a single body, so it can be advanced on its own
+        plan = self._body_plans.get(body)
+        if plan is None:
+            plan = self._body_plans[body] = IntegrationPlan(self.engine, body)
+        return plan
+
+    def integrate(self, dt: float) -> None:
+        for group in self.groups:
+            if self.store is not None:
+                states = self.store.state[group.rows]
+            else:
+                states = np.array([node._state for node in group.nodes])
+
+            # Sleeping bodies are left where they are
+            if self.sleeping:
+                awake = np.array(
+                    [body is None or not body.sleeping for body in group.bodies],
+                    dtype=bool,
+                )
+            else:
+                awake = np.ones(len(group.nodes), dtype=bool)
+            rotations = states[:, 1]
+            velocities = states[:, 3]
+            new_rotations, new_velocities = group.integrator.step(
+                rotations, velocities, dt, group.acceleration
+            )
+            new_rotations %= 360
+
+            moving = awake & np.any(new_rotations != rotations, axis=1)
+            states[awake, 1] = new_rotations[awake]
+            states[awake, 2] = new_velocities[awake]
+            states[awake, 3] = new_velocities[awake]
+
+            nodes = group.nodes
+            if self.store is not None:
+                self.store.state[group.rows] = states
+            else:
+                for i in np.flatnonzero(awake):
+                    nodes[i]._state[:] = states[i]
+            for i in np.flatnonzero(moving):
+                nodes[i].invalidate_transform()
@@ -1,6 +1,10 @@
 from dataclasses import dataclass
 from typing import List
-import pygame
+
+from .lazy import LazyModule
+
+
+pygame = LazyModule("pygame")
 
 
 @dataclass
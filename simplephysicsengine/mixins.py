@@ -1,9 +1,18 @@
 from abc import abstractmethod
 
 from .gl_object import glObject
+from .physics import Contacts
 
 
 class HasCollisionMixin:
+    __slots__ = ()
+
     @abstractmethod
     def on_collision(self, other1: glObject, other2: glObject):
         pass
+
+    def on_collisions(self, contacts: Contacts):
+        # Every contact of the step involving a hitbox below this handler, once
+        # per pair. Override to resolve them in one pass
+        for hitbox1, hitbox2 in contacts:
+            self.on_collision(hitbox1.parent, hitbox2.parent)
@@ -1,26 +1,35 @@
-from OpenGL.GL import *
-from OpenGL.GLU import *
-
+from .. import culling
 from ..gl_object import glObject
+from ..lazy import LazyModule
+
+
+GL = LazyModule("OpenGL.GL")
+rendering = LazyModule("simplephysicsengine.rendering")
 
 
 class Ball(glObject):
+    __slots__ = ()
+
     def __init__(
         self, x, y, z, size, rotation_deg: tuple[float], *, color=(1.0, 0.0, 0.0)
     ):
         super().__init__(x, y, z, size, rotation_deg=rotation_deg, color=color)
 
-    def draw(self):
-        glPushMatrix()
-        glTranslatef(self.x, self.y, self.z)
-        glRotatef(self.rotation_deg[1], 0, 1, 0)
-        glColor3f(self.color[0], self.color[1], self.color[2])
-
-        sphere = gluNewQuadric()
-        gluQuadricNormals(sphere, GLU_SMOOTH)
-        gluSphere(sphere, self.size / 2, 32, 32)
-        gluDeleteQuadric(sphere)
+    def draw_radius(self):
+        return self.size / 2
 
-        glPopMatrix()
+    def draw(self):
+        radius = self.size / 2
+        # Coarser spheres the smaller they end up on screen
+        view = culling.active_view
+        detail = view.sphere_detail(self, radius) if view is not None else 32
+        if rendering.active_batch is not None:
+            rendering.active_batch.add(("sphere", detail, detail), self, (radius,) * 3)
+        else:
+            GL.glPushMatrix()
+            rendering.load_model_matrix(self)
+            GL.glColor3f(self.color[0], self.color[1], self.color[2])
+            GL.glCallList(rendering.mesh_cache.sphere(radius, detail, detail))
+            GL.glPopMatrix()
 
         super().draw()
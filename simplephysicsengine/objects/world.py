@@ -1,8 +1,12 @@
+import numpy as np
+
 from ..gl_object import glObject
 from ..mixins import HasCollisionMixin
 
 
 class World(glObject, HasCollisionMixin):
+    __slots__ = ()
+
     def on_collision(self, other1, other2):
         obj1 = other1.parent.parent
         obj2 = other2.parent.parent
@@ -11,3 +15,22 @@ class World(glObject, HasCollisionMixin):
 
         obj1.assign_angular_velocity(obj2.angular_velocity)
         obj2.assign_angular_velocity(obj1.angular_velocity)
+
+    def on_collisions(self, contacts):
+        # Subclasses customizing on_collision keep getting it per pair
+        if type(self).on_collision is not World.on_collision:
+            return super().on_collisions(contacts)
+
+        bodies1 = [hitbox.parent.parent.parent for hitbox in contacts.first]
+        bodies2 = [hitbox.parent.parent.parent for hitbox in contacts.second]
+
+        # Every exchange uses the velocities from before any contact was resolved
+        velocities1 = np.array([body.angular_velocity for body in bodies1])
+        velocities2 = np.array([body.angular_velocity for body in bodies2])
+
+        for obj1, obj2, velocity1, velocity2 in zip(
+            bodies1, bodies2, velocities1, velocities2
+        ):
+            print(f"{obj1} collided with {obj2}") if self.debug else ...
+            obj1.assign_angular_velocity(velocity2)
+            obj2.assign_angular_velocity(velocity1)
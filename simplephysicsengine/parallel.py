@@ -0,0 +1,207 @@
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import numpy as np
+
+from .broadphase import SweepAndPruneBroadPhase
+from .gl_object import glObject
+
+
+_NO_CONTACTS = (np.empty((0, 2), dtype=int), np.empty(0), np.empty((0, 3)))
+
+
+def _merge(found):
+    # One sorted (colliding, depths, normals) out of several, in the order of
+    # the reference all-pairs loop
+    colliding, depths, normals = (
+        np.concatenate(parts) for parts in zip(_NO_CONTACTS, *found)
+    )
+    order = np.lexsort((colliding[:, 1], colliding[:, 0]))
+    return colliding[order], depths[order], normals[order]
+
+
+class _Partition:
+    # Top level children stepped on one thread and the rows of their hitboxes
+    # in scene_index.hitboxes, ascending. Broad phases may keep state between
+    # steps, each partition has its own
+    def __init__(self, children: List[glObject], rows: np.ndarray, broad_phase):
+        self.children = children
+        self.rows = rows
+        self.broad_phase = broad_phase
+
+
+class ParallelStepper:
+    """Updates the subtrees below an engine and finds their contacts on threads.
+
+    The top level children of the engine are split into `workers` partitions
+    of similar node count, children whose hitboxes share a collision handler
+    always in the same one. Each partition is updated and collision tested on
+    its own thread; NumPy releases the GIL in the vectorized broad and narrow
+    phases. Every partition is updated before any is collision tested, so the
+    two phases are timed apart like in a sequential step. At the merge point,
+    hitboxes of partitions whose bounds overlap are tested against each other,
+    so the contacts are exactly those of a sequential step. They are
+    dispatched on the calling thread, in the same order.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._partitions: List[_Partition] | None = None
+        # Partition of every hitbox
+        self._labels: np.ndarray | None = None
+        self._cross_phase = SweepAndPruneBroadPhase()
+
+    def reset(self) -> None:
+        # The scene graph changed
+        self._partitions = None
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _partition(self, engine) -> List[_Partition]:
+        scene_index = engine.scene_index
+        rows = {hitbox: row for row, hitbox in enumerate(scene_index.hitboxes)}
+
+        children = engine._children
+        sizes = []
+        child_rows = []
+        # Union-find over the children, joined by the handlers they share
+        parents = list(range(len(children)))
+
+        def find(i):
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        first_child = {}
+        for i, child in enumerate(children):
+            nodes = [child, *child.descendants()]
+            own = [rows[node] for node in nodes if node in rows]
+            sizes.append(len(nodes))
+            child_rows.append(own)
+            for row in own:
+                handler = scene_index.handlers[scene_index.hitboxes[row]]
+                if handler is None:
+                    continue
+                j = first_child.setdefault(handler, i)
+                parents[find(i)] = find(j)
+
+        units = {}
+        for i in range(len(children)):
+            units.setdefault(find(i), []).append(i)
+
+        # Largest units first, each onto the least loaded partition
+        bins = [[] for _ in range(self.workers)]
+        loads = [0] * self.workers
+        for unit in sorted(
+            units.values(), key=lambda unit: -sum(sizes[i] for i in unit)
+        ):
+            target = loads.index(min(loads))
+            bins[target] += unit
+            loads[target] += sum(sizes[i] for i in unit)
+
+        partitions = []
+        labels = np.empty(len(rows), dtype=int)
+        for indices in bins:
+            if not indices:
+                continue
+            indices.sort()
+            own = np.array(
+                sorted(row for i in indices for row in child_rows[i]), dtype=int
+            )
+            labels[own] = len(partitions)
+            partitions.append(
+                _Partition(
+                    [children[i] for i in indices],
+                    own,
+                    copy.deepcopy(engine.broad_phase),
+                )
+            )
+        self._labels = labels
+        return partitions
+
+    def update(self, engine, dt: float) -> None:
+        # Updates the subtrees of every partition
+        if self._partitions is None:
+            self._partitions = self._partition(engine)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        # Shared by every subtree, computed before the threads need it
+        engine.get_world_matrix()
+
+        def advance(partition: _Partition):
+            for child in partition.children:
+                if not child.sleeping:
+                    child.update(dt)
+
+        list(self._executor.map(advance, self._partitions))
+
+    def collide(self, engine):
+        # Returns the colliding rows of scene_index.hitboxes with their depths
+        # and normals, the hitbox positions, the sleeping flags of their bodies
+        # and the number of pairs tested
+        hitboxes = engine.scene_index.hitboxes
+        asleep = engine._asleep_hitboxes()
+
+        def find(partition: _Partition):
+            own = [hitboxes[row] for row in partition.rows]
+            positions = np.array(
+                [obj.get_position_within(engine) for obj in own], dtype=float
+            ).reshape(-1, 3)
+            if len(own) < 2:
+                return positions, _NO_CONTACTS, 0
+            colliding, depths, normals, tested = engine._find_colliding(
+                own,
+                positions,
+                None if asleep is None else asleep[partition.rows],
+                broad_phase=partition.broad_phase,
+            )
+            return positions, (partition.rows[colliding], depths, normals), tested
+
+        results = list(self._executor.map(find, self._partitions))
+        positions = np.empty((len(hitboxes), 3))
+        for partition, result in zip(self._partitions, results):
+            positions[partition.rows] = result[0]
+
+        cross, tested = self._cross_pairs(engine, hitboxes, positions, asleep)
+        colliding, depths, normals = _merge([cross] + [result[1] for result in results])
+        tested += sum(result[2] for result in results)
+        return colliding, depths, normals, positions, asleep, tested
+
+    def _cross_pairs(self, engine, hitboxes, positions, asleep):
+        # Contacts between the hitboxes of different partitions, only looked
+        # for between partitions whose bounds overlap
+        partitions = [p for p in self._partitions if len(p.rows)]
+        if len(partitions) < 2:
+            return _NO_CONTACTS, 0
+
+        radii = np.array([hitbox.size for hitbox in hitboxes], dtype=float) / 2
+        lower = np.array(
+            [(positions[p.rows] - radii[p.rows, None]).min(axis=0) for p in partitions]
+        )
+        upper = np.array(
+            [(positions[p.rows] + radii[p.rows, None]).max(axis=0) for p in partitions]
+        )
+
+        found = []
+        tested = 0
+        for i in range(len(partitions)):
+            for j in range(i + 1, len(partitions)):
+                if np.any(lower[i] > upper[j]) or np.any(lower[j] > upper[i]):
+                    continue
+                rows = np.concatenate([partitions[i].rows, partitions[j].rows])
+                rows.sort()
+                colliding, depths, normals, count = engine._find_colliding(
+                    [hitboxes[row] for row in rows],
+                    positions[rows],
+                    None if asleep is None else asleep[rows],
+                    self._labels[rows],
+                    self._cross_phase,
+                )
+                found.append((rows[colliding], depths, normals))
+                tested += count
+        return _merge(found), tested
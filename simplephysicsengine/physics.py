@@ -1,13 +1,47 @@
 import warnings
 from abc import abstractmethod
+from dataclasses import dataclass
+from typing import List
+import numpy as np
 
 from .gl_object import glObject
 
 
+def contact_geometry(offsets: np.ndarray, reach: np.ndarray):
+    # Depths and unit normals of contacts between bounding spheres whose
+    # centers are offsets apart and which touch at a distance of reach
+    distances = np.sqrt(np.einsum("ij,ij->i", offsets, offsets))
+    normals = np.divide(
+        offsets,
+        distances[:, None],
+        out=np.zeros_like(offsets),
+        where=distances[:, None] > 0,
+    )
+    return reach - distances, normals
+
+
 class Hitbox(glObject):
+    # Vectorized narrow phase for pairs of this hitbox type, taking (pairs,
+    # positions, sizes) and returning (colliding pairs, depths, normals).
+    # Hitboxes without one are tested pair by pair with check_collision
+    check_collisions_batched = None
+
+    __slots__ = ()
+
     def __init__(self, x, y, z, size):
         super().__init__(x, y, z, size)
 
+    @classmethod
+    def _batched_kernel(cls):
+        # The kernel stands for the check_collision of the class defining it,
+        # subclasses overriding check_collision are tested pair by pair
+        for owner in cls.__mro__:
+            if "check_collisions_batched" in vars(owner):
+                break
+        if cls.check_collision is not owner.check_collision:
+            return None
+        return cls.check_collisions_batched
+
     @abstractmethod
     def check_collision(self, other: glObject, common_ancestor: glObject) -> bool:
         pass
@@ -16,7 +50,40 @@ class Hitbox(glObject):
         pass
 
 
+@dataclass
+class Contacts:
+    """Colliding hitbox pairs of one step, one row per pair.
+
+    Normals point from the first to the second hitbox and depths are the
+    overlap of their bounding spheres.
+    """
+
+    first: List[Hitbox]
+    second: List[Hitbox]
+    depths: np.ndarray
+    normals: np.ndarray
+
+    def __len__(self):
+        return len(self.first)
+
+    def __iter__(self):
+        return zip(self.first, self.second)
+
+
 class CubeHitbox(Hitbox):
+    __slots__ = ()
+
+    @staticmethod
+    def check_collisions_batched(pairs, positions, sizes):
+        first = pairs[:, 0]
+        second = pairs[:, 1]
+
+        depths, normals = contact_geometry(
+            positions[second] - positions[first], (sizes[first] + sizes[second]) / 2
+        )
+        hits = depths > 0
+        return pairs[hits], depths[hits], normals[hits]
+
     def check_collision(self, other, common_ancestor):
         if common_ancestor is None:
             warnings.warn(
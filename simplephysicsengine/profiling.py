@@ -0,0 +1,111 @@
+import csv
+import logging
+from collections import deque
+from time import perf_counter
+from typing import Dict, List
+
+
+PHASES = ("handle_events", "update", "check_collisions", "draw", "flip")
+COUNTERS = ("pairs_tested", "collisions", "nodes_updated", "nodes_drawn")
+
+
+class Profiler:
+    """Per-frame phase timings and hot-path counters of an Engine.
+
+    The engine only touches it when `engine.profiler` is set, so profiling
+    costs nothing while disabled.
+    """
+
+    def __init__(self, history: int = 120, sinks: List["StatsSink"] | None = None):
+        self.frame: Dict[str, float] = dict.fromkeys(PHASES + COUNTERS, 0)
+        self.history = deque(maxlen=history)
+        self.frame_count = 0
+        self.sinks = list(sinks or [])
+
+    def lap(self, phase: str, start: float) -> float:
+        # Adds the time since start to the phase and returns now for the next one
+        now = perf_counter()
+        self.frame[phase] += now - start
+        return now
+
+    def count(self, counter: str, amount: int) -> None:
+        self.frame[counter] += amount
+
+    def end_frame(self) -> None:
+        self.history.append(self.frame)
+        self.frame_count += 1
+        self.frame = dict.fromkeys(PHASES + COUNTERS, 0)
+        for sink in self.sinks:
+            sink.on_frame(self)
+
+    def summary(self, frames: int | None = None) -> Dict[str, float]:
+        # Mean of every phase and counter over the last frames
+        recent = list(self.history)[-frames:] if frames else list(self.history)
+        if not recent:
+            return dict.fromkeys(PHASES + COUNTERS, 0.0)
+        return {
+            key: sum(frame[key] for frame in recent) / len(recent)
+            for key in PHASES + COUNTERS
+        }
+
+    def reset(self) -> None:
+        self.frame = dict.fromkeys(PHASES + COUNTERS, 0)
+        self.history.clear()
+        self.frame_count = 0
+
+
+class StatsSink:
+    """Receives the profiler after every frame and reports every `every` frames."""
+
+    def __init__(self, every: int = 60):
+        self.every = every
+
+    def on_frame(self, profiler: Profiler) -> None:
+        if profiler.frame_count % self.every == 0:
+            self.report(profiler.frame_count, profiler.summary(self.every))
+
+    def report(self, frame: int, summary: Dict[str, float]) -> None:
+        pass
+
+
+class LogSink(StatsSink):
+    def __init__(self, every: int = 60, logger: logging.Logger | None = None):
+        super().__init__(every)
+        self.logger = logger or logging.getLogger("simplephysicsengine")
+
+    def report(self, frame, summary):
+        self.logger.info(
+            "frame %d: %s",
+            frame,
+            ", ".join(
+                f"{phase} {summary[phase] * 1e3:.2f} ms" for phase in PHASES
+            )
+            + ", "
+            + ", ".join(f"{counter} {summary[counter]:.0f}" for counter in COUNTERS),
+        )
+
+
+class CsvSink(StatsSink):
+    def __init__(self, path: str, every: int = 60):
+        super().__init__(every)
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(("frame",) + PHASES + COUNTERS)
+
+    def report(self, frame, summary):
+        self._writer.writerow(
+            [frame] + [summary[key] for key in PHASES + COUNTERS]
+        )
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def overlay_lines(profiler: Profiler) -> List[str]:
+    summary = profiler.summary()
+    total = sum(summary[phase] for phase in PHASES)
+    lines = [f"frame {total * 1e3:6.2f} ms ({1 / total if total else 0:5.0f} fps)"]
+    lines += [f"{phase:<16}{summary[phase] * 1e3:7.2f} ms" for phase in PHASES]
+    lines += [f"{counter:<16}{summary[counter]:7.0f}" for counter in COUNTERS]
+    return lines
@@ -0,0 +1,184 @@
+import struct
+from typing import List
+import numpy as np
+
+from .gl_object import glObject
+
+
+# File layout, all little endian:
+#   header   magic, version, node count, frames per chunk
+#   chunk*   frame count, event count,
+#            times (float64, frames), states (float32, frames x nodes x 9),
+#            events (int32, events x 3: frame, node index, node index),
+#            zero padding to 8 bytes
+#   index    byte offset of every chunk (int64)
+#   trailer  index offset, chunk count, frame count, end magic
+MAGIC = b"SPETRAJ\0"
+END_MAGIC = b"SPEEND\0\0"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sIII4x")
+_CHUNK = struct.Struct("<II")
+_TRAILER = struct.Struct("<QII8s")
+
+# Position, rotation and angular velocity of a node
+STATE_SIZE = 9
+
+
+def _padding(size: int) -> int:
+    return -size % 8
+
+
+class TrajectoryRecorder:
+    """Appends the state of every node below `root` after each step.
+
+    Frames are buffered in memory and written a chunk at a time.
+    """
+
+    def __init__(self, path: str, root: glObject, chunk_frames: int = 256):
+        self.nodes: List[glObject] = list(root.descendants())
+        self._indices = {node: i for i, node in enumerate(self.nodes)}
+        self._root = root
+
+        self.chunk_frames = chunk_frames
+        self._times = np.empty(chunk_frames)
+        self._states = np.empty(
+            (chunk_frames, len(self.nodes), STATE_SIZE), dtype=np.float32
+        )
+        self._events = []
+        self._buffered = 0
+
+        self.frame_count = 0
+        self._time = 0.0
+        self._chunk_offsets = []
+
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, len(self.nodes), chunk_frames))
+
+    def record(self, dt: float, collisions=()) -> None:
+        self._time += dt
+        self._times[self._buffered] = self._time
+
+        store = getattr(self._root, "body_store", None)
+        if store is not None and store.nodes == self.nodes:
+            self._states[self._buffered] = store.state[:, :3].reshape(-1, STATE_SIZE)
+        else:
+            states = np.array([node._state for node in self.nodes])
+            self._states[self._buffered] = states[:, :3].reshape(-1, STATE_SIZE)
+
+        for obj1, obj2 in collisions:
+            self._events.append(
+                (self.frame_count, self._indices[obj1], self._indices[obj2])
+            )
+
+        self._buffered += 1
+        self.frame_count += 1
+        if self._buffered == self.chunk_frames:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        if self._buffered == 0:
+            return
+
+        events = np.array(self._events, dtype=np.int32).reshape(-1, 3)
+        self._chunk_offsets.append(self._file.tell())
+        self._file.write(_CHUNK.pack(self._buffered, len(events)))
+        self._file.write(self._times[: self._buffered].tobytes())
+        self._file.write(self._states[: self._buffered].tobytes())
+        self._file.write(events.tobytes())
+        self._file.write(b"\0" * _padding(self._file.tell()))
+
+        self._buffered = 0
+        self._events = []
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._write_chunk()
+        index_offset = self._file.tell()
+        self._file.write(np.array(self._chunk_offsets, dtype=np.int64).tobytes())
+        self._file.write(
+            _TRAILER.pack(
+                index_offset, len(self._chunk_offsets), self.frame_count, END_MAGIC
+            )
+        )
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrajectoryReplay:
+    """Memory-mapped view of a recording, any frame is reachable in O(1)."""
+
+    def __init__(self, path: str):
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+
+        magic, version, self.node_count, self.chunk_frames = _HEADER.unpack_from(
+            self._data, 0
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} trajectory file")
+
+        index_offset, chunk_count, self.frame_count, end_magic = _TRAILER.unpack_from(
+            self._data, len(self._data) - _TRAILER.size
+        )
+        if end_magic != END_MAGIC:
+            raise ValueError(f"{path} is truncated, was the recorder closed?")
+
+        offsets = np.frombuffer(
+            self._data, dtype=np.int64, count=chunk_count, offset=index_offset
+        )
+        self._chunks = [self._map_chunk(int(offset)) for offset in offsets]
+        self.times = (
+            np.concatenate([times for times, _, _ in self._chunks])
+            if self._chunks
+            else np.empty(0)
+        )
+
+    def _map_chunk(self, offset: int):
+        frames, event_count = _CHUNK.unpack_from(self._data, offset)
+        offset += _CHUNK.size
+        times = np.frombuffer(self._data, dtype=np.float64, count=frames, offset=offset)
+        offset += times.nbytes
+        states = np.frombuffer(
+            self._data,
+            dtype=np.float32,
+            count=frames * self.node_count * STATE_SIZE,
+            offset=offset,
+        ).reshape(frames, self.node_count, STATE_SIZE)
+        offset += states.nbytes
+        events = np.frombuffer(
+            self._data, dtype=np.int32, count=event_count * 3, offset=offset
+        ).reshape(event_count, 3)
+        return times, states, events
+
+    def __len__(self):
+        return self.frame_count
+
+    def frame(self, frame: int) -> np.ndarray:
+        # (nodes, 9) view: position, rotation and angular velocity per node
+        _, states, _ = self._chunks[frame // self.chunk_frames]
+        return states[frame % self.chunk_frames]
+
+    def collisions(self, frame: int) -> np.ndarray:
+        # (m, 2) node indices of the pairs that collided during the frame
+        _, _, events = self._chunks[frame // self.chunk_frames]
+        start, stop = np.searchsorted(events[:, 0], [frame, frame + 1])
+        return events[start:stop, 1:]
+
+    def frame_at(self, time: float) -> int:
+        frame = int(np.searchsorted(self.times, time, side="right")) - 1
+        return min(max(frame, 0), self.frame_count - 1)
+
+    def apply(self, nodes: List[glObject], frame: int) -> None:
+        if len(nodes) != self.node_count:
+            raise ValueError(
+                f"Recording has {self.node_count} nodes, the scene has {len(nodes)}"
+            )
+        for node, state in zip(nodes, self.frame(frame).reshape(-1, 3, 3)):
+            node._state[:3] = state
+            node.invalidate_transform()
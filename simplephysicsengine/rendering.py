@@ -0,0 +1,293 @@
+import ctypes
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from OpenGL.GLU import *
+import numpy as np
+import pygame
+
+
+_INSTANCED_VERTEX_SHADER = """
+#version 150 compatibility
+in vec3 position;
+in vec3 normal;
+in vec4 model_row0;
+in vec4 model_row1;
+in vec4 model_row2;
+out vec4 lit_color;
+
+void main()
+{
+    mat4 model = transpose(
+        mat4(model_row0, model_row1, model_row2, vec4(0.0, 0.0, 0.0, 1.0))
+    );
+    vec4 eye_position = gl_ModelViewMatrix * model * vec4(position, 1.0);
+    vec3 eye_normal = normalize(gl_NormalMatrix * mat3(model) * normal);
+    vec3 to_light = normalize(
+        gl_LightSource[0].position.xyz
+        - eye_position.xyz * gl_LightSource[0].position.w
+    );
+
+    // Same terms the fixed-function pipeline uses for the immediate path
+    lit_color = gl_FrontLightModelProduct.sceneColor
+        + gl_FrontLightProduct[0].ambient
+        + gl_FrontLightProduct[0].diffuse * max(dot(eye_normal, to_light), 0.0);
+    gl_Position = gl_ProjectionMatrix * eye_position;
+}
+"""
+
+_INSTANCED_FRAGMENT_SHADER = """
+#version 150 compatibility
+in vec4 lit_color;
+
+void main()
+{
+    gl_FragColor = lit_color;
+}
+"""
+
+
+def tessellate_sphere(slices: int, stacks: int):
+    # Unit sphere around the z axis, like gluSphere
+    theta = np.linspace(0.0, np.pi, stacks + 1)
+    phi = np.linspace(0.0, 2 * np.pi, slices + 1)
+    theta, phi = np.meshgrid(theta, phi, indexing="ij")
+
+    vertices = np.stack(
+        [np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)],
+        axis=-1,
+    ).reshape(-1, 3)
+    normals = vertices.copy()
+
+    row, column = np.meshgrid(np.arange(stacks), np.arange(slices), indexing="ij")
+    a = (row * (slices + 1) + column).ravel()
+    b = a + slices + 1
+    indices = np.stack([a, b, a + 1, a + 1, b, b + 1], axis=1).ravel()
+
+    return vertices, normals, indices.astype(np.uint32)
+
+
+def tessellate_quad():
+    # Unit quad hanging down from the origin, scaled by (thickness, length, 1)
+    vertices = np.array(
+        [[-1.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, -1.0, 0.0], [-1.0, -1.0, 0.0]]
+    )
+    normals = np.tile([0.0, 0.0, 1.0], (4, 1))
+    indices = np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)
+    return vertices, normals, indices
+
+
+class MeshCache:
+    """Compiles each distinct mesh once into a display list and reuses it."""
+
+    def __init__(self):
+        self._lists = {}
+        self._buffers = {}
+        self._program = None
+        self._attributes = {}
+        self._instance_buffer = None
+
+    def sphere(self, radius: float, slices: int, stacks: int) -> int:
+        key = ("sphere", radius, slices, stacks)
+        display_list = self._lists.get(key)
+        if display_list is None:
+            display_list = glGenLists(1)
+            glNewList(display_list, GL_COMPILE)
+            quadric = gluNewQuadric()
+            gluQuadricNormals(quadric, GLU_SMOOTH)
+            gluSphere(quadric, radius, slices, stacks)
+            gluDeleteQuadric(quadric)
+            glEndList()
+            self._lists[key] = display_list
+        return display_list
+
+    def quad(self, half_width: float, length: float) -> int:
+        key = ("quad", half_width, length)
+        display_list = self._lists.get(key)
+        if display_list is None:
+            display_list = glGenLists(1)
+            glNewList(display_list, GL_COMPILE)
+            glBegin(GL_QUADS)
+            glVertex3f(-half_width, 0, 0)
+            glVertex3f(half_width, 0, 0)
+            glVertex3f(half_width, -length, 0)
+            glVertex3f(-half_width, -length, 0)
+            glEnd()
+            glEndList()
+            self._lists[key] = display_list
+        return display_list
+
+    def buffers(self, key: tuple):
+        # Unit mesh of the instanced path, ("sphere", slices, stacks) or ("quad",)
+        buffers = self._buffers.get(key)
+        if buffers is None:
+            if key[0] == "sphere":
+                vertices, normals, indices = tessellate_sphere(*key[1:])
+            else:
+                vertices, normals, indices = tessellate_quad()
+
+            interleaved = np.hstack([vertices, normals]).astype(np.float32)
+            vertex_buffer, index_buffer = glGenBuffers(2)
+            glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+            glBufferData(GL_ARRAY_BUFFER, interleaved.nbytes, interleaved, GL_STATIC_DRAW)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+            buffers = (vertex_buffer, index_buffer, len(indices))
+            self._buffers[key] = buffers
+        return buffers
+
+    def instancing_program(self):
+        if self._program is None:
+            self._program = shaders.compileProgram(
+                shaders.compileShader(_INSTANCED_VERTEX_SHADER, GL_VERTEX_SHADER),
+                shaders.compileShader(_INSTANCED_FRAGMENT_SHADER, GL_FRAGMENT_SHADER),
+                validate=False,
+            )
+            self._attributes = {
+                name: glGetAttribLocation(self._program, name)
+                for name in (
+                    "position",
+                    "normal",
+                    "model_row0",
+                    "model_row1",
+                    "model_row2",
+                )
+            }
+            self._instance_buffer = glGenBuffers(1)
+        return self._program, self._attributes, self._instance_buffer
+
+    def reset(self):
+        # The GL context owning the lists and buffers is gone, forget them
+        self._lists.clear()
+        self._buffers.clear()
+        self._program = None
+        self._attributes = {}
+        self._instance_buffer = None
+
+
+mesh_cache = MeshCache()
+
+# Batch collecting the draw calls of the current frame, see Engine.draw
+active_batch: "RenderBatch | None" = None
+
+
+def model_matrix(node) -> np.ndarray:
+    # Transform of a node relative to its root, whose own transform is the
+    # camera on the modelview stack; the one culling.View tests bounds with
+    return node.get_matrix_within(node.root)
+
+
+def load_model_matrix(node) -> None:
+    # Multiplies the modelview matrix by model_matrix, OpenGL is column-major
+    glMultMatrixd(np.ascontiguousarray(model_matrix(node).T))
+
+
+class RenderBatch:
+    """Draws every instance of a mesh with a single instanced draw call.
+
+    Instances are placed with their cached scene transforms relative to `root`,
+    whose own transform is the camera already loaded on the modelview stack.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._instances = {}
+
+    def add(self, key: tuple, node, scale: tuple[float]):
+        self._instances.setdefault(key, []).append((node, scale))
+
+    def __enter__(self):
+        global active_batch
+        self._previous = active_batch
+        active_batch = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global active_batch
+        active_batch = self._previous
+        if exc_info[0] is None:
+            self.flush()
+
+    def instance_data(self, instances) -> np.ndarray:
+        # Top three rows of each scaled model matrix, relative to the root
+        root_world = self.root.get_world_matrix()
+        to_root = np.identity(4)
+        to_root[:3, :3] = root_world[:3, :3].T
+        to_root[:3, 3] = -root_world[:3, :3].T @ root_world[:3, 3]
+
+        matrices = to_root @ np.array([node.get_world_matrix() for node, _ in instances])
+        matrices[:, :3, :3] *= np.array([scale for _, scale in instances])[:, None, :]
+        return np.ascontiguousarray(matrices[:, :3, :], dtype=np.float32)
+
+    def flush(self):
+        if not self._instances:
+            return
+
+        program, attributes, instance_buffer = mesh_cache.instancing_program()
+        glUseProgram(program)
+        for location in attributes.values():
+            glEnableVertexAttribArray(location)
+
+        for key, instances in self._instances.items():
+            vertex_buffer, index_buffer, index_count = mesh_cache.buffers(key)
+
+            data = self.instance_data(instances)
+            glBindBuffer(GL_ARRAY_BUFFER, instance_buffer)
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+            for row in range(3):
+                location = attributes[f"model_row{row}"]
+                glVertexAttribPointer(
+                    location, 4, GL_FLOAT, GL_FALSE, 48, ctypes.c_void_p(16 * row)
+                )
+                glVertexAttribDivisor(location, 1)
+
+            glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+            glVertexAttribPointer(
+                attributes["position"], 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0)
+            )
+            glVertexAttribPointer(
+                attributes["normal"], 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12)
+            )
+
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+            glDrawElementsInstanced(
+                GL_TRIANGLES, index_count, GL_UNSIGNED_INT, None, len(instances)
+            )
+
+        for location in attributes.values():
+            glVertexAttribDivisor(location, 0)
+            glDisableVertexAttribArray(location)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+        self._instances.clear()
+
+
+_overlay_font = None
+
+
+def draw_text_overlay(lines: list[str], display: tuple[int, int]) -> None:
+    # Text in the top left corner, drawn straight into the framebuffer
+    global _overlay_font
+    if _overlay_font is None:
+        pygame.font.init()
+        _overlay_font = pygame.font.Font(None, 20)
+
+    glPushAttrib(GL_ENABLE_BIT)
+    glDisable(GL_LIGHTING)
+    glDisable(GL_DEPTH_TEST)
+
+    y = display[1] - 4
+    for line in lines:
+        surface = _overlay_font.render(line, True, (255, 255, 0))
+        y -= surface.get_height()
+        glWindowPos2i(4, y)
+        glDrawPixels(
+            surface.get_width(),
+            surface.get_height(),
+            GL_RGBA,
+            GL_UNSIGNED_BYTE,
+            pygame.image.tostring(surface, "RGBA", True),
+        )
+
+    glPopAttrib()
@@ -0,0 +1,356 @@
+import gc
+import json
+import struct
+from typing import Dict, List, Tuple
+import numpy as np
+
+from .constraints import Hinge
+from .gl_object import glObject
+from .objects.ball import Ball
+from .objects.string import String
+from .objects.world import World
+from .physics import CubeHitbox
+
+
+# JSON, for authoring:
+#   {"format": "simplephysicsengine-scene", "version": 1, "nodes": [node*]}
+#   node  {"type": name, "position": [x, y, z], "rotation": [deg * 3],
+#          "angular_velocity": [deg/s * 3], "size": s, "color": [r, g, b],
+#          "hinge": {"axis", "length", "gravity", "damping"},
+#          <field of the type>: value, "children": [node*]}
+#   Everything but "type" and the fields of the type is optional.
+#
+# Binary, for loading and sharing, all little endian:
+#   header    magic, version, node count, metadata length
+#   metadata  utf-8 JSON {"types": [name*], "columns": [[name, dtype, shape]*]},
+#             zero padding to 8 bytes
+#   column*   one row per node in pre-order, zero padding to 8 bytes
+JSON_FORMAT = "simplephysicsengine-scene"
+MAGIC = b"SPESCENE"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sIII4x")
+
+# Node types a scene can hold, with the numeric attributes their constructors
+# set on top of glObject's
+NODE_TYPES: Dict[str, Tuple[type, Tuple[str, ...]]] = {}
+
+
+def register_node_type(cls: type, fields: Tuple[str, ...] = (), name: str | None = None):
+    NODE_TYPES[name or cls.__name__] = (cls, tuple(fields))
+
+
+for _cls in (glObject, World, Ball, CubeHitbox):
+    register_node_type(_cls)
+register_node_type(String, ("length",))
+
+_NO_HINGE = (np.nan, np.nan, np.nan, np.nan)
+
+
+def _padding(size: int) -> int:
+    return -size % 8
+
+
+class Scene:
+    """Flat description of node trees, one row per node in pre-order.
+
+    `parents` holds the row of every node's parent, -1 for the top level nodes,
+    `state` the (5, 3) state blocks of glObject._state and `hinges` the axis,
+    length (nan to use the String's), gravity and damping of every hinge, a nan
+    axis for nodes without one. `fields` are the per-type attributes, nan where
+    a node's type has no such field.
+    """
+
+    def __init__(self, types, type_ids, parents, state, colors, hinges, fields):
+        self.types: List[str] = list(types)
+        self.type_ids = np.asarray(type_ids, dtype="<u2")
+        self.parents = np.asarray(parents, dtype="<i4")
+        self.state = np.asarray(state, dtype="<f8").reshape(-1, 5, 3)
+        self.colors = np.asarray(colors, dtype="<f4").reshape(-1, 3)
+        self.hinges = np.asarray(hinges, dtype="<f8").reshape(-1, 4)
+        self.fields: Dict[str, np.ndarray] = {
+            name: np.asarray(values, dtype="<f8") for name, values in fields.items()
+        }
+
+    def __len__(self):
+        return len(self.parents)
+
+    @classmethod
+    def capture(cls, roots: List[glObject]) -> "Scene":
+        # Current state of the trees below roots, roots at the top level
+        names = {node_cls: name for name, (node_cls, _) in NODE_TYPES.items()}
+        nodes = []
+        parents = []
+        for root in roots:
+            rows = {root: len(nodes)}
+            parents.append(-1)
+            nodes.append(root)
+            for node in root.descendants():
+                rows[node] = len(nodes)
+                parents.append(rows[node.parent])
+                nodes.append(node)
+
+        types = []
+        type_ids = []
+        fields: Dict[str, np.ndarray] = {}
+        for i, node in enumerate(nodes):
+            name = names.get(type(node))
+            if name is None:
+                raise ValueError(f"{type(node).__name__} is not a registered node type")
+            if name not in types:
+                types.append(name)
+            type_ids.append(types.index(name))
+            for field in NODE_TYPES[name][1]:
+                column = fields.setdefault(field, np.full(len(nodes), np.nan))
+                column[i] = getattr(node, field)
+
+        return cls(
+            types,
+            type_ids,
+            parents,
+            np.array([node._state for node in nodes]).reshape(-1, 5, 3),
+            [node.color for node in nodes],
+            [_hinge_row(node.hinge) for node in nodes],
+            fields,
+        )
+
+    def build(self, engine: glObject | None = None) -> List[glObject]:
+        # The top level nodes, added to engine if given. Nodes are made in one
+        # pass without their constructors, the state of all of them shares one
+        # array
+        state = self.state.copy()
+        classes = [NODE_TYPES[name] for name in self.types]
+        fields = [
+            [(field, self.fields[field]) for field in type_fields]
+            for _, type_fields in classes
+        ]
+        colors = self.colors.tolist()
+        hinges = self.hinges.tolist()
+
+        nodes = []
+        roots = []
+        # Nothing but new nodes to collect, the collector would only slow
+        # down making them
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            self._make_nodes(state, classes, fields, colors, hinges, nodes, roots)
+        finally:
+            if collecting:
+                gc.enable()
+
+        if engine is not None:
+            engine.add_children(roots)
+        return roots
+
+    def _make_nodes(self, state, classes, fields, colors, hinges, nodes, roots):
+        for i, (type_id, parent) in enumerate(
+            zip(self.type_ids.tolist(), self.parents.tolist())
+        ):
+            cls = classes[type_id][0]
+            node = cls.__new__(cls)
+            node._setup(state[i], tuple(colors[i]), False)
+            for field, values in fields[type_id]:
+                setattr(node, field, values[i].item())
+            axis, length, gravity, damping = hinges[i]
+            if axis == axis:
+                node._hinge = Hinge(
+                    int(axis),
+                    None if length != length else length,
+                    gravity=gravity,
+                    damping=damping,
+                )
+
+            if parent < 0:
+                roots.append(node)
+            else:
+                node.parent = nodes[parent]
+                node.parent._children.append(node)
+            nodes.append(node)
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Scene":
+        if data.get("format") != JSON_FORMAT:
+            raise ValueError("Not a scene file")
+        if data.get("version") != VERSION:
+            raise ValueError(f"Unsupported scene version {data.get('version')}")
+
+        rows = []
+        stack = [(node, -1) for node in reversed(data["nodes"])]
+        while stack:
+            node, parent = stack.pop()
+            row = len(rows)
+            rows.append((node, parent))
+            stack.extend((child, row) for child in reversed(node.get("children", ())))
+
+        types = []
+        type_ids = []
+        state = np.zeros((len(rows), 5, 3))
+        fields: Dict[str, np.ndarray] = {}
+        for i, (node, _) in enumerate(rows):
+            name = node["type"]
+            if name not in NODE_TYPES:
+                raise ValueError(f"Unknown node type {name}")
+            if name not in types:
+                types.append(name)
+            type_ids.append(types.index(name))
+
+            state[i, 0] = node.get("position", (0.0, 0.0, 0.0))
+            state[i, 1] = node.get("rotation", (0.0, 0.0, 0.0))
+            state[i, 2:4] = node.get("angular_velocity", (0.0, 0.0, 0.0))
+            state[i, 4, 0] = node.get("size", 0.0)
+            for field in NODE_TYPES[name][1]:
+                if field not in node:
+                    raise ValueError(f"{name} node without its {field}")
+                column = fields.setdefault(field, np.full(len(rows), np.nan))
+                column[i] = node[field]
+
+        return cls(
+            types,
+            type_ids,
+            [parent for _, parent in rows],
+            state,
+            [node.get("color", (1.0, 1.0, 1.0)) for node, _ in rows],
+            [_hinge_from_json(node.get("hinge")) for node, _ in rows],
+            fields,
+        )
+
+    def to_json(self) -> dict:
+        entries = []
+        roots = []
+        for i in range(len(self)):
+            name = self.types[self.type_ids[i]]
+            entry = {
+                "type": name,
+                "position": self.state[i, 0].tolist(),
+                "rotation": self.state[i, 1].tolist(),
+                "angular_velocity": self.state[i, 3].tolist(),
+                "size": self.state[i, 4, 0].item(),
+                "color": [round(value, 6) for value in self.colors[i].tolist()],
+            }
+            for field in NODE_TYPES[name][1]:
+                entry[field] = self.fields[field][i].item()
+            axis, length, gravity, damping = self.hinges[i].tolist()
+            if axis == axis:
+                entry["hinge"] = {
+                    "axis": int(axis),
+                    "length": None if length != length else length,
+                    "gravity": gravity,
+                    "damping": damping,
+                }
+            entries.append(entry)
+
+            parent = self.parents[i]
+            if parent < 0:
+                roots.append(entry)
+            else:
+                entries[parent].setdefault("children", []).append(entry)
+        return {"format": JSON_FORMAT, "version": VERSION, "nodes": roots}
+
+    def _columns(self):
+        columns = [
+            ("type", self.type_ids),
+            ("parent", self.parents),
+            ("state", self.state),
+            ("color", self.colors),
+            ("hinge", self.hinges),
+        ]
+        return columns + [(name, values) for name, values in self.fields.items()]
+
+    def to_bytes(self) -> bytes:
+        columns = self._columns()
+        metadata = json.dumps(
+            {
+                "types": self.types,
+                "columns": [
+                    [name, values.dtype.str, list(values.shape[1:])]
+                    for name, values in columns
+                ],
+            }
+        ).encode()
+
+        parts = [
+            _HEADER.pack(MAGIC, VERSION, len(self), len(metadata)),
+            metadata,
+            bytes(_padding(len(metadata))),
+        ]
+        for _, values in columns:
+            data = np.ascontiguousarray(values).tobytes()
+            parts.append(data)
+            parts.append(bytes(_padding(len(data))))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Scene":
+        magic, version, count, length = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a scene file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported scene version {version}")
+
+        offset = _HEADER.size
+        metadata = json.loads(data[offset : offset + length])
+        offset += length + _padding(length)
+
+        columns = {}
+        for name, dtype, shape in metadata["columns"]:
+            size = count * int(np.prod(shape, dtype=int))
+            values = np.frombuffer(data, dtype=dtype, count=size, offset=offset)
+            columns[name] = values.reshape(count, *shape)
+            offset += values.nbytes + _padding(values.nbytes)
+
+        for name in metadata["types"]:
+            if name not in NODE_TYPES:
+                raise ValueError(f"Unknown node type {name}")
+
+        fixed = ("type", "parent", "state", "color", "hinge")
+        return cls(
+            metadata["types"],
+            columns["type"],
+            columns["parent"],
+            columns["state"],
+            columns["color"],
+            columns["hinge"],
+            {name: values for name, values in columns.items() if name not in fixed},
+        )
+
+
+def _hinge_row(hinge: Hinge | None) -> tuple:
+    if hinge is None:
+        return _NO_HINGE
+    length = np.nan if hinge.length is None else hinge.length
+    return (hinge.axis, length, hinge.gravity, hinge.damping)
+
+
+def _hinge_from_json(hinge: dict | None) -> tuple:
+    if hinge is None:
+        return _NO_HINGE
+    defaults = Hinge()
+    length = hinge.get("length")
+    return (
+        hinge.get("axis", defaults.axis),
+        np.nan if length is None else length,
+        hinge.get("gravity", defaults.gravity),
+        hinge.get("damping", defaults.damping),
+    )
+
+
+def load_scene(path: str, engine: glObject | None = None) -> List[glObject]:
+    # JSON for .json files, the binary form otherwise
+    if path.endswith(".json"):
+        with open(path, "r") as file:
+            scene = Scene.from_json(json.load(file))
+    else:
+        with open(path, "rb") as file:
+            scene = Scene.from_bytes(file.read())
+    return scene.build(engine)
+
+
+def save_scene(path: str, roots: List[glObject]) -> None:
+    scene = Scene.capture(roots)
+    if path.endswith(".json"):
+        with open(path, "w") as file:
+            json.dump(scene.to_json(), file, indent=2)
+    else:
+        with open(path, "wb") as file:
+            file.write(scene.to_bytes())
@@ -0,0 +1,124 @@
+from typing import Dict, List
+import numpy as np
+
+from .gl_object import glObject
+from .mixins import HasCollisionMixin
+from .physics import Hitbox
+
+
+class SceneIndex:
+    """Hitboxes below `root` with their closest collision handlers and bodies.
+
+    The body of a hitbox is the child of its handler it belongs to, the unit
+    that moves, sleeps and wakes as a whole.
+
+    attach/detach keep the index in sync with add_child/remove_child. Pre-order
+    and lowest common ancestors come from an Euler tour with a sparse table,
+    rebuilt lazily once per batch of structural changes.
+    """
+
+    def __init__(self, root: glObject):
+        self.root = root
+        self.handlers: Dict[Hitbox, HasCollisionMixin | None] = {}
+        self.bodies: Dict[Hitbox, glObject | None] = {}
+        self._dirty = True
+        self._hitboxes: List[Hitbox] = []
+        self._hitbox_bodies: List[glObject | None] = []
+        self.attach(root)
+
+    def attach(self, node: glObject) -> None:
+        handler, body = self._closest_handler(node)
+        stack = [(node, handler, body)]
+        while stack:
+            current, handler, body = stack.pop()
+            if isinstance(current, HasCollisionMixin):
+                handler = current
+                stack.extend((child, handler, child) for child in current._children)
+            else:
+                stack.extend((child, handler, body) for child in current._children)
+            if isinstance(current, Hitbox):
+                self.handlers[current] = handler
+                self.bodies[current] = body
+        self._dirty = True
+
+    def detach(self, node: glObject) -> None:
+        for child in [node, *node.descendants()]:
+            self.handlers.pop(child, None)
+            self.bodies.pop(child, None)
+        self._dirty = True
+
+    @staticmethod
+    def _closest_handler(node: glObject):
+        # Handler above node and the child of that handler node belongs to
+        body = node
+        current = node.parent
+        while current is not None:
+            if isinstance(current, HasCollisionMixin):
+                return current, body
+            body = current
+            current = current.parent
+        return None, None
+
+    @property
+    def hitboxes(self) -> List[Hitbox]:
+        # In scene pre-order
+        if self._dirty:
+            self._rebuild()
+        return self._hitboxes
+
+    @property
+    def hitbox_bodies(self) -> List[glObject | None]:
+        # Body of every hitbox, aligned with hitboxes
+        if self._dirty:
+            self._rebuild()
+        return self._hitbox_bodies
+
+    def _rebuild(self):
+        euler = []
+        depths = []
+        first = {}
+        stack = [(self.root, 0, 0)]
+        while stack:
+            node, depth, next_child = stack.pop()
+            if next_child == 0:
+                first[node] = len(euler)
+            euler.append(node)
+            depths.append(depth)
+            if next_child < len(node._children):
+                stack.append((node, depth, next_child + 1))
+                stack.append((node._children[next_child], depth + 1, 0))
+
+        self._euler = euler
+        self._first = first
+        self._depths = np.array(depths)
+
+        # table[k][i] is the tour position of the shallowest node in [i, i + 2^k)
+        table = [np.arange(len(euler))]
+        span = 1
+        while 2 * span <= len(euler):
+            previous = table[-1]
+            left = previous[: len(previous) - span]
+            right = previous[span:]
+            table.append(np.where(self._depths[left] <= self._depths[right], left, right))
+            span *= 2
+        self._table = table
+
+        self._hitboxes = sorted(self.handlers, key=first.__getitem__)
+        self._hitbox_bodies = [self.bodies[hitbox] for hitbox in self._hitboxes]
+        self._dirty = False
+
+    def common_ancestor(self, obj1: glObject, obj2: glObject) -> glObject:
+        if self._dirty:
+            self._rebuild()
+
+        left = self._first[obj1]
+        right = self._first[obj2]
+        if left > right:
+            left, right = right, left
+
+        level = (right - left + 1).bit_length() - 1
+        candidate1 = self._table[level][left]
+        candidate2 = self._table[level][right - (1 << level) + 1]
+        if self._depths[candidate1] <= self._depths[candidate2]:
+            return self._euler[candidate1]
+        return self._euler[candidate2]
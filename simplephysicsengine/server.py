@@ -0,0 +1,301 @@
+import asyncio
+import math
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import numpy as np
+
+from .engine import Engine
+
+
+# Every message is a little endian uint32 byte length followed by the payload.
+#
+# request  command count (uint16), then per command an opcode (uint8) and:
+#   STEP            steps (uint32), dt (float64)
+#   SET_STATE       node id (uint32), position, rotation, angular velocity (9 float64)
+#   APPLY_VELOCITY  node id (uint32), angular velocity (3 float64)
+#   QUERY_SUBTREE   node id (uint32)
+#
+# reply    command count (uint16), then per command a status (uint8) and:
+#   OK     the opcode (uint8), then
+#            STEP: collisions found (uint32)
+#            QUERY_SUBTREE: node count (uint32), node ids (uint32 each), world
+#                           matrices relative to the engine (float32, 4x4 each)
+#   ERROR  message length (uint16), utf-8 message
+#
+# A request that cannot be parsed as a whole runs none of its commands and gets
+# a single ERROR reply.
+# Node 0 is the engine, node i > 0 is engine.nodes[i - 1].
+STEP = 1
+SET_STATE = 2
+APPLY_VELOCITY = 3
+QUERY_SUBTREE = 4
+
+OK = 0
+ERROR = 1
+
+_LENGTH = struct.Struct("<I")
+_COUNT = struct.Struct("<H")
+_OPCODE = struct.Struct("<B")
+_ARGUMENTS = {
+    STEP: struct.Struct("<Id"),
+    SET_STATE: struct.Struct("<I9d"),
+    APPLY_VELOCITY: struct.Struct("<I3d"),
+    QUERY_SUBTREE: struct.Struct("<I"),
+}
+_UINT32 = struct.Struct("<I")
+_ERROR = struct.Struct("<H")
+
+
+def _encode_error(message: str) -> bytes:
+    # Status and message of a failed command, cut to what its length field holds
+    data = message.encode()[: 2 ** (8 * _ERROR.size) - 1]
+    return _OPCODE.pack(ERROR) + _ERROR.pack(len(data)) + data
+
+
+class Batch:
+    """Commands sent to a ControlServer in one round trip."""
+
+    def __init__(self):
+        self.commands = []
+
+    def step(self, steps: int, dt: float) -> "Batch":
+        self.commands.append((STEP, (steps, dt)))
+        return self
+
+    def set_state(self, node: int, position, rotation, angular_velocity) -> "Batch":
+        self.commands.append(
+            (SET_STATE, (node, *position, *rotation, *angular_velocity))
+        )
+        return self
+
+    def apply_velocity(self, node: int, angular_velocity) -> "Batch":
+        self.commands.append((APPLY_VELOCITY, (node, *angular_velocity)))
+        return self
+
+    def query_subtree(self, node: int) -> "Batch":
+        self.commands.append((QUERY_SUBTREE, (node,)))
+        return self
+
+    def encode(self) -> bytes:
+        parts = [_COUNT.pack(len(self.commands))]
+        for opcode, arguments in self.commands:
+            parts.append(_OPCODE.pack(opcode))
+            parts.append(_ARGUMENTS[opcode].pack(*arguments))
+        return b"".join(parts)
+
+
+class CommandError(Exception):
+    pass
+
+
+def decode_replies(payload: bytes) -> list:
+    # One entry per command: collisions for STEP, None for SET_STATE and
+    # APPLY_VELOCITY, (node ids, (n, 4, 4) matrices) for QUERY_SUBTREE and a
+    # CommandError for failed commands
+    (count,) = _COUNT.unpack_from(payload, 0)
+    offset = _COUNT.size
+    replies = []
+    for _ in range(count):
+        (status,) = _OPCODE.unpack_from(payload, offset)
+        offset += _OPCODE.size
+        if status == ERROR:
+            (length,) = _ERROR.unpack_from(payload, offset)
+            offset += _ERROR.size
+            message = payload[offset : offset + length].decode(errors="replace")
+            replies.append(CommandError(message))
+            offset += length
+            continue
+
+        (kind,) = _OPCODE.unpack_from(payload, offset)
+        offset += _OPCODE.size
+        if kind == STEP:
+            (collisions,) = _UINT32.unpack_from(payload, offset)
+            offset += _UINT32.size
+            replies.append(collisions)
+        elif kind == QUERY_SUBTREE:
+            (nodes,) = _UINT32.unpack_from(payload, offset)
+            offset += _UINT32.size
+            ids = np.frombuffer(payload, dtype="<u4", count=nodes, offset=offset)
+            offset += ids.nbytes
+            matrices = np.frombuffer(
+                payload, dtype="<f4", count=nodes * 16, offset=offset
+            ).reshape(nodes, 4, 4)
+            offset += matrices.nbytes
+            replies.append((ids, matrices))
+        else:
+            replies.append(None)
+    return replies
+
+
+def _parse(request: bytes) -> list:
+    # Every (opcode, arguments) of a request, checked before any of them runs
+    (count,) = _COUNT.unpack_from(request, 0)
+    offset = _COUNT.size
+    commands = []
+    for index in range(count):
+        (opcode,) = _OPCODE.unpack_from(request, offset)
+        offset += _OPCODE.size
+        arguments = _ARGUMENTS.get(opcode)
+        if arguments is None:
+            raise ValueError(f"Unknown opcode {opcode} in command {index}")
+        if offset + arguments.size > len(request):
+            raise ValueError(f"Command {index} is cut short")
+        commands.append((opcode, arguments.unpack_from(request, offset)))
+        offset += arguments.size
+    if offset != len(request):
+        raise ValueError(f"{len(request) - offset} bytes after the last command")
+    return commands
+
+
+class ControlServer:
+    """Serves batched commands on a local socket to drive an Engine remotely.
+
+    Commands run one batch at a time on a single worker thread, so the event
+    loop keeps accepting clients and reading requests while the engine steps.
+    The engine must not be running its own loop meanwhile, use a headless one.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()
+
+    async def start_unix(self, path: str):
+        self._server = await asyncio.start_unix_server(self._serve, path)
+        return path
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(_LENGTH.size)
+                except asyncio.IncompleteReadError:
+                    break
+                (length,) = _LENGTH.unpack(header)
+                request = await reader.readexactly(length)
+
+                try:
+                    reply = await loop.run_in_executor(
+                        self._executor, self.execute, request
+                    )
+                except Exception as error:
+                    # Failed outside of any command, the client still gets a reply
+                    message = f"{type(error).__name__}: {error}"
+                    reply = _COUNT.pack(1) + _encode_error(message)
+                writer.write(_LENGTH.pack(len(reply)) + reply)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def execute(self, request: bytes) -> bytes:
+        # Runs a whole batch against the engine and encodes the replies
+        try:
+            commands = _parse(request)
+        except (struct.error, ValueError) as error:
+            # Nothing ran, the simulation is as it was before the request
+            return _COUNT.pack(1) + _encode_error(f"Malformed request: {error}")
+
+        parts = [_COUNT.pack(len(commands))]
+        for opcode, values in commands:
+            try:
+                parts.append(_OPCODE.pack(OK) + self._run(opcode, values))
+            except (IndexError, ValueError) as error:
+                parts.append(_encode_error(str(error)))
+            except Exception as error:
+                # Whatever the engine raised, the rest of the batch still runs
+                parts.append(_encode_error(f"{type(error).__name__}: {error}"))
+        return b"".join(parts)
+
+    def _node(self, node_id: int):
+        if node_id == 0:
+            return self.engine
+        nodes = self.engine.nodes
+        if node_id > len(nodes):
+            raise IndexError(f"No node {node_id}, the scene has {len(nodes)}")
+        return nodes[node_id - 1]
+
+    def _run(self, opcode: int, values) -> bytes:
+        kind = _OPCODE.pack(opcode)
+        if opcode == STEP:
+            steps, dt = values
+            if not (math.isfinite(dt) and dt > 0):
+                raise ValueError(f"dt must be positive and finite, got {dt}")
+            collisions = 0
+            for _ in range(steps):
+                collisions += len(self.engine.step(dt))
+            return kind + _UINT32.pack(collisions)
+
+        node = self._node(values[0])
+        if opcode == SET_STATE:
+            node._state[:3] = np.reshape(values[1:], (3, 3))
+            node._state[3] = node._state[2]
+            node.invalidate_transform()
+            node._invalidate_bounds()
+            node._wake()
+        elif opcode == APPLY_VELOCITY:
+            node.assign_angular_velocity(values[1:])
+        elif opcode == QUERY_SUBTREE:
+            return kind + self._encode_subtree(node, values[0])
+        return kind
+
+    def _encode_subtree(self, node, node_id: int) -> bytes:
+        subtree: List = [node, *node.descendants()]
+        # Pre-order ids of a subtree are contiguous
+        ids = np.arange(node_id, node_id + len(subtree), dtype="<u4")
+
+        engine_world = self.engine.get_world_matrix()
+        to_engine = np.identity(4)
+        to_engine[:3, :3] = engine_world[:3, :3].T
+        to_engine[:3, 3] = -engine_world[:3, :3].T @ engine_world[:3, 3]
+        matrices = to_engine @ np.array([child.get_world_matrix() for child in subtree])
+
+        return (
+            _UINT32.pack(len(subtree))
+            + ids.tobytes()
+            + matrices.astype("<f4").tobytes()
+        )
+
+
+class ControlClient:
+    """Sends batches to a ControlServer and decodes the replies."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect_tcp(cls, host: str, port: int) -> "ControlClient":
+        return cls(*await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> "ControlClient":
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def send(self, batch: Batch) -> list:
+        payload = batch.encode()
+        async with self._lock:
+            self._writer.write(_LENGTH.pack(len(payload)) + payload)
+            await self._writer.drain()
+            (length,) = _LENGTH.unpack(await self._reader.readexactly(_LENGTH.size))
+            return decode_replies(await self._reader.readexactly(length))
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
@@ -0,0 +1,153 @@
+from typing import Dict, List
+import numpy as np
+
+from .gl_object import glObject
+
+
+class SleepManager:
+    """Puts quiet simulation islands to sleep and wakes them when disturbed.
+
+    Bodies are the children of collision handlers (see SceneIndex). A body is
+    quiet while its hitboxes move slower than `linear_threshold` units/s and
+    its angular velocity stays below `angular_threshold` deg/s. Bodies touching
+    each other form an island, which falls asleep once all of its bodies have
+    been quiet for `time_to_sleep` seconds and wakes as a whole.
+    """
+
+    def __init__(
+        self,
+        linear_threshold: float = 0.05,
+        angular_threshold: float = 1.0,
+        time_to_sleep: float = 1.0,
+    ):
+        self.linear_threshold = linear_threshold
+        self.angular_threshold = angular_threshold
+        self.time_to_sleep = time_to_sleep
+
+        self.quiet_time: Dict[glObject, float] = {}
+        # Island of every sleeping body, the bodies that wake with it
+        self._islands: Dict[glObject, List[glObject]] = {}
+        self._hitboxes = None
+        self._positions = None
+        self._body_ids = None
+        self._bodies: List[glObject] = []
+        # Bumped whenever a body falls asleep or wakes, see sleeping_rows
+        self._version = 0
+        self._rows = None
+        self._node_count = (0, 0)
+
+    @property
+    def sleeping_bodies(self) -> List[glObject]:
+        return list(self._islands)
+
+    def update(self, scene_index, positions: np.ndarray, dt: float, collisions) -> None:
+        # Called after every step with the hitbox positions of the step
+        hitboxes = scene_index.hitboxes
+        if hitboxes is not self._hitboxes:
+            # The scene changed, nobody can be called quiet this step
+            ids = {}
+            self._body_ids = np.array(
+                [ids.setdefault(body, len(ids)) for body in scene_index.hitbox_bodies],
+                dtype=int,
+            )
+            self._bodies = list(ids)
+            self._hitboxes = hitboxes
+            self._positions = positions
+            return
+
+        speeds = np.linalg.norm(positions - self._positions, axis=1) / dt
+        self._positions = positions
+        body_speeds = np.zeros(len(self._bodies))
+        np.maximum.at(body_speeds, self._body_ids, speeds)
+
+        quiet_time = self.quiet_time
+        awake = []
+        for body, speed in zip(self._bodies, body_speeds):
+            if body is None or body.sleeping:
+                continue
+            awake.append(body)
+            if (
+                speed < self.linear_threshold
+                and np.abs(body.angular_velocity).max() < self.angular_threshold
+            ):
+                quiet_time[body] = quiet_time.get(body, 0.0) + dt
+            else:
+                quiet_time[body] = 0.0
+
+        # Union-find over the contacts of this step
+        parents = {body: body for body in awake}
+
+        def find(body):
+            while parents[body] is not body:
+                parents[body] = parents[parents[body]]
+                body = parents[body]
+            return body
+
+        bodies = scene_index.bodies
+        for obj1, obj2 in collisions:
+            body1 = bodies[obj1]
+            body2 = bodies[obj2]
+            if body1 in parents and body2 in parents:
+                parents[find(body1)] = find(body2)
+
+        islands: Dict[glObject, List[glObject]] = {}
+        for body in awake:
+            islands.setdefault(find(body), []).append(body)
+
+        for island in islands.values():
+            if all(quiet_time[body] >= self.time_to_sleep for body in island):
+                for body in island:
+                    self._sleep(body, island)
+
+    def _sleep(self, body: glObject, island: List[glObject]) -> None:
+        body.sleeping = True
+        body._state[2:4] = 0.0
+        self._islands[body] = island
+        self._version += 1
+
+    def wake(self, node: glObject) -> None:
+        for body in self._islands.pop(node, [node]):
+            self._islands.pop(body, None)
+            body.sleeping = False
+            self.quiet_time[body] = 0.0
+        self._version += 1
+
+    def sleeping_rows(self, store) -> np.ndarray | None:
+        # Mask of the BodyStore rows below sleeping bodies, None while nobody
+        # sleeps. Subtrees are contiguous rows in pre-order
+        if not self._islands:
+            return None
+        cached = self._rows
+        if cached is None or cached[0] is not store or cached[1] != self._version:
+            mask = np.zeros(len(store), dtype=bool)
+            for body in self._islands:
+                if body._store is store:
+                    start = body._store_index
+                    stop = start + 1 + sum(1 for _ in body.descendants())
+                    mask[start:stop] = True
+            self._rows = cached = (store, self._version, mask)
+        return cached[2]
+
+    def sleeping_node_count(self) -> int:
+        # Nodes in the subtrees of sleeping bodies, the ones steps skip
+        version, count = self._node_count
+        if version != self._version:
+            count = sum(
+                1 + sum(1 for _ in body.descendants()) for body in self._islands
+            )
+            self._node_count = (self._version, count)
+        return count
+
+    def reset(self) -> None:
+        # The scene state was replaced, everybody starts awake and unobserved
+        for body in list(self._islands):
+            self.wake(body)
+        self.quiet_time.clear()
+        self._hitboxes = None
+
+    def forget(self, node: glObject) -> None:
+        # node and its subtree left the scene
+        for child in [node, *node.descendants()]:
+            if child.sleeping:
+                self.wake(child)
+            self.quiet_time.pop(child, None)
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from typing import List
+import numpy as np
+
+
+class Snapshot:
+    """Dynamic state of a list of nodes at one instant.
+
+    `state` holds one (5, 3) block per node in the layout of glObject._state:
+    position, rotation, angular velocity, pending angular velocity and size.
+    """
+
+    def __init__(self, nodes: list, state: np.ndarray):
+        self.nodes = nodes
+        self.state = state
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.state.nbytes
+
+
+def _uses_store(nodes: list, store) -> bool:
+    return store is not None and (store.nodes is nodes or store.nodes == nodes)
+
+
+def capture(nodes: list, store=None, out: np.ndarray | None = None) -> Snapshot:
+    # One copy out of the BodyStore when it holds exactly these nodes
+    if out is None:
+        out = np.empty((len(nodes), 5, 3))
+    if _uses_store(nodes, store):
+        np.copyto(out, store.state)
+    else:
+        for node, state in zip(nodes, out):
+            state[:] = node._state
+    return Snapshot(nodes, out)
+
+
+def restore(nodes: list, snapshot: Snapshot, store=None) -> None:
+    if snapshot.nodes is not nodes and snapshot.nodes != nodes:
+        raise ValueError("The snapshot was taken of different nodes")
+
+    # Only nodes that actually moved need their transforms recomputed, and
+    # only those that moved or changed size their bounds
+    rows = [0, 1, 4]
+    if _uses_store(nodes, store):
+        changed = store.state[:, rows] != snapshot.state[:, rows]
+        np.copyto(store.state, snapshot.state)
+    else:
+        current = np.array([node._state[rows] for node in nodes]).reshape(-1, 3, 3)
+        changed = current != snapshot.state[:, rows]
+        for node, state in zip(nodes, snapshot.state):
+            node._state[:] = state
+
+    changed = np.any(changed, axis=2)
+    for i in np.flatnonzero(changed[:, 0] | changed[:, 1]):
+        nodes[i].invalidate_transform()
+    for i in np.flatnonzero(changed[:, 0] | changed[:, 2]):
+        nodes[i]._invalidate_bounds()
+
+
+class SnapshotRing:
+    """The last `capacity` snapshots of an engine, oldest evicted first.
+
+    Snapshots are written into one preallocated buffer, so taking one does not
+    allocate. A change of the scene graph drops every held snapshot.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buffer: np.ndarray | None = None
+        self._nodes: list | None = None
+        # Snapshot id -> slot in the buffer, oldest first
+        self._slots: "OrderedDict[int, int]" = OrderedDict()
+        self._free = list(range(capacity))
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, snapshot_id: int):
+        return snapshot_id in self._slots
+
+    @property
+    def ids(self) -> List[int]:
+        return list(self._slots)
+
+    def push(self, engine) -> int:
+        nodes = engine.nodes
+        if nodes is not self._nodes:
+            self._nodes = nodes
+            self._slots.clear()
+            self._free = list(range(self.capacity))
+            if self._buffer is None or self._buffer.shape[1] != len(nodes):
+                self._buffer = np.empty((self.capacity, len(nodes), 5, 3))
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            _, slot = self._slots.popitem(last=False)
+
+        engine.snapshot(out=self._buffer[slot])
+        snapshot_id = self._next_id
+        self._next_id += 1
+        self._slots[snapshot_id] = slot
+        return snapshot_id
+
+    def get(self, snapshot_id: int | None = None) -> Snapshot:
+        # The given snapshot or the latest one, a view valid until evicted
+        if snapshot_id is None:
+            snapshot_id = next(reversed(self._slots))
+        return Snapshot(self._nodes, self._buffer[self._slots[snapshot_id]])
+
+    def restore(self, engine, snapshot_id: int | None = None) -> None:
+        engine.restore(self.get(snapshot_id))
+
+    def discard_after(self, snapshot_id: int) -> None:
+        # Rewinding makes the later snapshots a branch not taken
+        for later in [i for i in self._slots if i > snapshot_id]:
+            self._free.append(self._slots.pop(later))
@@ -0,0 +1,208 @@
+import heapq
+from math import inf, sqrt
+from typing import List, Tuple
+import numpy as np
+
+from .broadphase import BVH, BVHBroadPhase
+from .physics import Hitbox
+
+
+def _slab(origin, inverse, lower, upper):
+    # Distances along a ray at which it enters and leaves a box
+    near = -inf
+    far = inf
+    for o, inv, lo, hi in zip(origin, inverse, lower, upper):
+        if inv == inf:
+            if o < lo or o > hi:
+                return inf, -inf
+            continue
+        t1 = (lo - o) * inv
+        t2 = (hi - o) * inv
+        if t1 > t2:
+            t1, t2 = t2, t1
+        near = max(near, t1)
+        far = min(far, t2)
+    return near, far
+
+
+def _box_distance(point, lower, upper):
+    total = 0.0
+    for p, lo, hi in zip(point, lower, upper):
+        if p < lo:
+            total += (lo - p) ** 2
+        elif p > hi:
+            total += (p - hi) ** 2
+    return sqrt(total)
+
+
+class SpatialIndex:
+    """Raycasts, nearest neighbour and radius queries over an engine's hitboxes.
+
+    Hitboxes are the spheres the collision system tests, at the positions of
+    the last step (Engine.hitbox_positions), in the engine's coordinates. The
+    BVH of a BVHBroadPhase is reused as is; with other broad phases the index
+    keeps a BVH of its own, refitted on the first query after every step.
+    Queries descend the tree and visit O(log n) nodes plus the ones holding
+    results.
+    """
+
+    def __init__(self, engine, rebuild_interval: int = 30):
+        self.engine = engine
+        self.rebuild_interval = rebuild_interval
+        self._bvh: BVH | None = None
+        self._hitboxes: List[Hitbox] = []
+        self._tree: BVH | None = None
+        self._lists = None
+        # Positions computed for a tree that changed since
+        self._outdated = None
+
+    def reset(self) -> None:
+        # Hitboxes were added, removed or moved outside of a step
+        self._outdated = self.engine.hitbox_positions
+        self._tree = None
+
+    def _fit(self) -> BVH:
+        engine = self.engine
+        hitboxes = engine.scene_index.hitboxes
+        positions = engine.hitbox_positions
+        tree = self._tree
+        if tree is not None and tree.positions is positions and hitboxes is self._hitboxes:
+            return tree
+
+        if positions is self._outdated or len(positions) != len(hitboxes):
+            positions = np.array(
+                [hitbox.get_position_within(engine) for hitbox in hitboxes], dtype=float
+            ).reshape(-1, 3)
+            engine.hitbox_positions = positions
+            self._outdated = None
+
+        shared = getattr(engine.broad_phase, "bvh", None)
+        if isinstance(engine.broad_phase, BVHBroadPhase) and (
+            shared is not None and shared.positions is positions
+        ):
+            tree = shared
+        else:
+            radii = np.array([hitbox.size for hitbox in hitboxes], dtype=float) / 2
+            bvh = self._bvh
+            if (
+                bvh is None
+                or len(bvh) != len(radii)
+                or bvh.refits >= self.rebuild_interval
+            ):
+                self._bvh = bvh = BVH(positions, radii)
+            else:
+                bvh.refit(positions, radii)
+            tree = bvh
+
+        self._tree = tree
+        self._hitboxes = hitboxes
+        # Node bounds as floats, arithmetic on single NumPy scalars is slower
+        self._lists = (
+            tree.lower.tolist(),
+            tree.upper.tolist(),
+            tree.left.tolist(),
+            tree.right.tolist(),
+            tree.start.tolist(),
+            tree.stop.tolist(),
+            tree.order.tolist(),
+            tree.positions.tolist(),
+            tree.radii.tolist(),
+        )
+        return tree
+
+    def raycast(
+        self, origin, direction, max_distance: float = inf
+    ) -> List[Tuple[Hitbox, float]]:
+        # Hitboxes the ray passes through with the distance along it they are
+        # entered at, nearest first; 0 for those holding the origin
+        tree = self._fit()
+        if len(tree) == 0:
+            return []
+        lower, upper, left, right, start, stop, order, centers, radii = self._lists
+
+        origin = [float(value) for value in origin]
+        direction = np.asarray(direction, dtype=float)
+        direction = (direction / np.linalg.norm(direction)).tolist()
+        inverse = [1 / value if value != 0 else inf for value in direction]
+
+        hits = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            near, far = _slab(origin, inverse, lower[node], upper[node])
+            if far < max(near, 0.0) or near > max_distance:
+                continue
+            if left[node] >= 0:
+                stack.append(right[node])
+                stack.append(left[node])
+                continue
+
+            for row in order[start[node] : stop[node]]:
+                offset = [o - c for o, c in zip(origin, centers[row])]
+                b = sum(o * d for o, d in zip(offset, direction))
+                c = sum(o * o for o in offset) - radii[row] ** 2
+                discriminant = b * b - c
+                if discriminant < 0:
+                    continue
+                root = sqrt(discriminant)
+                if -b + root < 0:
+                    continue
+                distance = max(-b - root, 0.0)
+                if distance <= max_distance:
+                    hits.append((distance, row))
+
+        hits.sort()
+        return [(self._hitboxes[row], distance) for distance, row in hits]
+
+    def nearest(self, point, k: int = 1) -> List[Tuple[Hitbox, float]]:
+        # The k hitboxes closest to point with their distance from it, 0 for
+        # those holding it
+        tree = self._fit()
+        if len(tree) == 0 or k <= 0:
+            return []
+        lower, upper, left, right, start, stop, order, centers, radii = self._lists
+        point = [float(value) for value in point]
+
+        found = []
+        # Hitboxes sort before nodes at the same distance
+        heap = [(0.0, 1, 0)]
+        while heap and len(found) < k:
+            distance, is_node, index = heapq.heappop(heap)
+            if not is_node:
+                found.append((self._hitboxes[index], distance))
+            elif left[index] >= 0:
+                for child in (left[index], right[index]):
+                    heapq.heappush(
+                        heap, (_box_distance(point, lower[child], upper[child]), 1, child)
+                    )
+            else:
+                for row in order[start[index] : stop[index]]:
+                    center = sqrt(sum((p - c) ** 2 for p, c in zip(point, centers[row])))
+                    heapq.heappush(heap, (max(center - radii[row], 0.0), 0, row))
+        return found
+
+    def within(self, point, radius: float) -> List[Hitbox]:
+        # Hitboxes reaching within radius of point, in scene pre-order
+        tree = self._fit()
+        if len(tree) == 0:
+            return []
+        lower, upper, left, right, start, stop, order, centers, radii = self._lists
+        point = [float(value) for value in point]
+
+        rows = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if _box_distance(point, lower[node], upper[node]) > radius:
+                continue
+            if left[node] >= 0:
+                stack.append(left[node])
+                stack.append(right[node])
+                continue
+            for row in order[start[node] : stop[node]]:
+                center = sqrt(sum((p - c) ** 2 for p, c in zip(point, centers[row])))
+                if center - radii[row] <= radius:
+                    rows.append(row)
+
+        rows.sort()
+        return [self._hitboxes[row] for row in rows]
@@ -0,0 +1,13 @@
+from simplephysicsengine import Ball, CubeHitbox, String, glObject
+
+
+def make_body(x=0.0, *, angle=0.0, length=0.0, size=2.0, hitbox_x=0.0):
+    # Body -> String -> Ball -> CubeHitbox, shaped like StringyBall, what the
+    # collision handlers of World expect. The body swings around z by angle
+    body = glObject(x, 0.0, 0.0, 0.0, rotation_deg=(0.0, 0.0, angle))
+    string = String(0.0, 0.0, 0.0, length, 0.1, (0.0, 0.0, 0.0))
+    ball = Ball(0.0, -length, 0.0, size, (0.0, 0.0, 0.0))
+    ball.add_child(CubeHitbox(hitbox_x, 0.0, 0.0, size))
+    string.add_child(ball)
+    body.add_child(string)
+    return body
@@ -0,0 +1,61 @@
+import pytest
+
+from simplephysicsengine import Ball, Hitbox
+
+from benchmarks.run import benchmark_scene, compare, measure_import, measure_memory
+from benchmarks.scenes import ball_cloud, deep_hierarchy, newton_cradles
+
+
+def count(engine, kind):
+    return sum(isinstance(node, kind) for node in engine.descendants())
+
+
+class TestBenchmarks:
+    def test_scenes_scale(self):
+        assert count(newton_cradles(3), Hitbox) == 15
+        assert count(deep_hierarchy(12), Ball) == 12
+        assert count(ball_cloud(40), Hitbox) == 40
+
+    def test_benchmark_scene_times_every_phase(self):
+        timings = benchmark_scene(newton_cradles, 1, repeats=2, draw=False)
+
+        phases = {"update", "get_position_within", "check_collisions", "step"}
+        assert set(timings) == phases
+        assert all(
+            timing["median_s"] >= timing["min_s"] > 0 for timing in timings.values()
+        )
+
+    def test_compare_flags_regressions(self):
+        def results(*medians):
+            return {
+                "results": [
+                    {"scene": "cloud", "size": 10, "phase": phase, "median_s": median}
+                    for phase, median in zip(("update", "draw"), medians)
+                ]
+            }
+
+        regressions = compare(results(1.5, 1.1), results(1.0, 1.0), tolerance=0.2)
+
+        assert [entry["phase"] for entry in regressions] == ["update"]
+        assert regressions[0]["ratio"] == pytest.approx(1.5)
+
+    def test_import_skips_the_rendering_backend(self):
+        timing = measure_import(repeats=1)
+
+        assert timing["median_s"] > 0
+        assert not timing["loads_backend"]
+
+    def test_measure_memory(self):
+        usage = measure_memory(ball_cloud, 50, steps=2)
+
+        # A node holds its state and world matrix, and nothing per row of it
+        assert 0 < usage["bytes_per_node"] < 1024
+        assert usage["update_peak_bytes"] >= 0
+
+    def test_update_phase_moves_hinged_pendulums(self):
+        # The cradle's balls swing through their hinges, not through update()
+        engine = newton_cradles(1)
+        raised = engine._children[0]._children[0]
+        before = raised.rotation_deg.copy()
+        engine.advance(1 / 120)
+        assert raised.rotation_deg[2] != before[2]
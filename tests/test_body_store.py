@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from simplephysicsengine import Engine, World, Ball, CubeHitbox
+from simplephysicsengine.body_store import BodyStore
+
+
+def make_scene(body_store):
+    engine = Engine(0, 0, -50, headless=True, body_store=body_store)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    for i in range(5):
+        ball = Ball(i * 2.0, 0.0, 0.0, 1.0, (0.0, 0.0, 0.0))
+        ball.add_child(CubeHitbox(0.0, 0.0, 0.0, 1.0))
+        ball.assign_angular_velocity((10.0 * i, 0.0, -35.0))
+        world.add_child(ball)
+    world.assign_angular_velocity((0.0, 5.0, 0.0))
+    engine.add_child(world)
+    return engine
+
+
+class TestBodyStore:
+    def test_matches_per_node_integration(self):
+        legacy = make_scene(body_store=False)
+        stored = make_scene(body_store=True)
+
+        legacy.step_many(50, 0.05)
+        stored.step_many(50, 0.05)
+
+        for node, expected in zip(stored.descendants(), legacy.descendants()):
+            assert node.rotation_deg == pytest.approx(expected.rotation_deg)
+            assert node.get_position_within(stored) == pytest.approx(
+                expected.get_position_within(legacy)
+            )
+
+    def test_attributes_are_views(self):
+        engine = make_scene(body_store=True)
+        engine.step(0.1)
+
+        store = engine.body_store
+        ball = engine._children[0]._children[2]
+        i = ball._store_index
+
+        assert store.nodes[i] is ball
+        assert np.shares_memory(ball.rotation_deg, store.rotations)
+        ball.x = 42.0
+        assert store.positions[i, 0] == 42.0
+
+    def test_rebuilt_after_tree_change(self):
+        engine = make_scene(body_store=True)
+        engine.step(0.1)
+        world = engine._children[0]
+        ball = world._children[0]
+
+        world.remove_child(ball)
+
+        assert engine.body_store is None
+        assert ball._store is None
+        before = ball.rotation_deg.copy()
+        engine.step(0.1)
+        assert len(engine.body_store) == len(list(engine.descendants()))
+        assert ball.rotation_deg == pytest.approx(before)
+
+    def test_release_copies_state_back(self):
+        world = World(0.0, 0.0, 0.0, 0.0)
+        world.rotation_deg = (1.0, 2.0, 3.0)
+        store = BodyStore([world])
+
+        store.release()
+
+        assert not np.shares_memory(world.rotation_deg, store.state)
+        assert world.rotation_deg == pytest.approx((1.0, 2.0, 3.0))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from simplephysicsengine import Engine, World, Ball, CubeHitbox
+from simplephysicsengine.broadphase import (
+    BVHBroadPhase,
+    BruteForceBroadPhase,
+    SpatialHashBroadPhase,
+    SweepAndPruneBroadPhase,
+)
+
+
+def overlapping_pairs(positions, radii):
+    pairs = BruteForceBroadPhase().find_pairs(positions, radii)
+    distances = np.linalg.norm(positions[pairs[:, 0]] - positions[pairs[:, 1]], axis=1)
+    return {
+        tuple(pair) for pair in pairs[distances < radii[pairs[:, 0]] + radii[pairs[:, 1]]]
+    }
+
+
+class TestBroadPhase:
+    @pytest.mark.parametrize(
+        "broad_phase",
+        [
+            SweepAndPruneBroadPhase(),
+            SpatialHashBroadPhase(),
+            SpatialHashBroadPhase(0.5),
+            BVHBroadPhase(),
+        ],
+    )
+    def test_finds_every_overlapping_pair(self, broad_phase):
+        rng = np.random.default_rng(0)
+        positions = rng.uniform(-20, 20, size=(500, 3))
+        radii = rng.uniform(0.1, 1.5, size=500)
+
+        pairs = broad_phase.find_pairs(positions, radii)
+
+        assert overlapping_pairs(positions, radii) <= {tuple(pair) for pair in pairs}
+        assert np.all(pairs[:, 0] < pairs[:, 1])
+        assert len({tuple(pair) for pair in pairs}) == len(pairs)
+
+    @pytest.mark.parametrize(
+        "broad_phase",
+        [SweepAndPruneBroadPhase(), SpatialHashBroadPhase(), BVHBroadPhase()],
+    )
+    def test_prunes_distant_pairs(self, broad_phase):
+        positions = np.array([[0.0, 0.0, 0.0], [100.0, 0.0, 0.0], [0.0, 100.0, 0.0]])
+        radii = np.ones(3)
+
+        assert len(broad_phase.find_pairs(positions, radii)) == 0
+
+    @pytest.mark.parametrize(
+        "broad_phase",
+        [
+            BruteForceBroadPhase(),
+            SweepAndPruneBroadPhase(),
+            SpatialHashBroadPhase(),
+            BVHBroadPhase(),
+        ],
+    )
+    def test_engine_uses_broad_phase(self, broad_phase):
+        engine = Engine(0, 0, -50, headless=True, broad_phase=broad_phase)
+        world = RecordingWorld()
+        balls = []
+        for x in (0.0, 1.5, 10.0):
+            ball = Ball(x, 0.0, 0.0, 2.0, (0.0, 0.0, 0.0))
+            ball.add_child(CubeHitbox(0.0, 0.0, 0.0, 2.0))
+            world.add_child(ball)
+            balls.append(ball)
+        engine.add_child(world)
+
+        engine.check_collisions()
+
+        assert world.collisions == [(balls[0], balls[1])]
+
+
+class RecordingWorld(World):
+    def __init__(self):
+        super().__init__(0.0, 0.0, 0.0, 0.0)
+        self.collisions = []
+
+    def on_collision(self, other1, other2):
+        self.collisions.append((other1, other2))
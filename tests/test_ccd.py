@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from conftest import make_body
+from simplephysicsengine import Engine, World
+from simplephysicsengine.ccd import time_of_impact
+
+
+def make_engine(**options):
+    # The moving ball sweeps 30 degrees per step, past the resting one at 15
+    engine = Engine(0, 0, headless=True, **options)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    moving = make_body(angle=0.0, length=10.0)
+    resting = make_body(angle=15.0, length=10.0)
+    world.add_children([moving, resting])
+    engine.add_child(world)
+    engine.step(0.01)
+    moving.assign_angular_velocity((0.0, 0.0, 3000.0))
+    return engine, moving, resting
+
+
+class TestContinuousCollision:
+    def test_time_of_impact(self):
+        offsets = np.array([[10.0, 0.0, 0.0], [10.0, 0.0, 0.0], [10.0, 5.0, 0.0]])
+        motions = np.array([[-20.0, 0.0, 0.0], [-5.0, 0.0, 0.0], [-20.0, 0.0, 0.0]])
+        toi = time_of_impact(offsets, motions, np.array([2.0, 2.0, 2.0]))
+        assert np.allclose(toi[0], 0.4)
+        assert np.isinf(toi[1])
+        assert np.isinf(toi[2])
+
+    def test_fast_pendulum_tunnels_without_ccd(self):
+        engine, moving, resting = make_engine()
+        assert engine.step(0.01) == []
+        assert moving.rotation_deg[2] == 30.0
+
+    def test_ccd_catches_the_contact(self):
+        engine, moving, resting = make_engine(ccd=True)
+        collisions = engine.step(0.01)
+
+        assert len(collisions) == 1
+        # World.on_collision handed the velocity over mid step
+        assert 0.0 < moving.rotation_deg[2] < 15.0
+        assert resting._state[3, 2] == 3000.0
+
+    def test_ccd_leaves_slow_steps_alone(self):
+        engine, moving, resting = make_engine(ccd=True)
+        moving.assign_angular_velocity((0.0, 0.0, 100.0))
+        assert engine.step(0.01) == []
+        assert np.isclose(moving.rotation_deg[2], 1.0)
+
+    def test_ccd_with_body_store(self):
+        engine, moving, resting = make_engine(ccd=True, body_store=True)
+        assert len(engine.step(0.01)) == 1
+        assert 0.0 < moving.rotation_deg[2] < 15.0
+
+    @pytest.mark.parametrize("body_store", [False, True])
+    def test_ccd_snapshots_only_bodies_that_can_move(self, body_store):
+        engine, moving, resting = make_engine(ccd=True, body_store=body_store)
+        engine.ccd.begin_step(engine)
+        assert engine.ccd._moving.tolist() == [True, False]
+
+        # The resting body is rewound from where it stands
+        assert len(engine.step(0.01)) == 1
+        assert resting._state[3, 2] == 3000.0
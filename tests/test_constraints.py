@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from simplephysicsengine import RK4, Engine, Hinge, String, World, glObject
+
+
+def pendulum(angle, length=1.0, **hinge):
+    node = glObject(0.0, 0.0, 0.0, 0.0, rotation_deg=(0.0, 0.0, angle))
+    node.hinge = Hinge(axis=2, length=length, **hinge)
+    return node
+
+
+def reference_double_pendulum(phi, length1, length2, steps, dt, gravity=9.81):
+    # Textbook equations of two unit masses, integrated with RK4 on the angles
+    # against the vertical
+    def derivative(state):
+        phi1, phi2, speed1, speed2 = state
+        delta = phi1 - phi2
+        denominator = 3 - np.cos(2 * delta)
+        swing = speed2**2 * length2 + speed1**2 * length1 * np.cos(delta)
+        acceleration1 = (
+            -3 * gravity * np.sin(phi1)
+            - gravity * np.sin(phi1 - 2 * phi2)
+            - 2 * np.sin(delta) * swing
+        ) / (length1 * denominator)
+        acceleration2 = (
+            2
+            * np.sin(delta)
+            * (
+                2 * speed1**2 * length1
+                + 2 * gravity * np.cos(phi1)
+                + speed2**2 * length2 * np.cos(delta)
+            )
+        ) / (length2 * denominator)
+        return np.array([speed1, speed2, acceleration1, acceleration2])
+
+    state = np.array([*phi, 0.0, 0.0])
+    for _ in range(steps):
+        k1 = derivative(state)
+        k2 = derivative(state + 0.5 * dt * k1)
+        k3 = derivative(state + 0.5 * dt * k2)
+        k4 = derivative(state + dt * k3)
+        state = state + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+    return state[:2]
+
+
+class TestHinge:
+    def test_small_swings_keep_the_pendulum_period(self):
+        engine = Engine(0, 0, headless=True, integrator=RK4())
+        node = pendulum(5.0, length=2.0)
+        engine.add_child(node)
+
+        period = 2 * np.pi * np.sqrt(2.0 / 9.81)
+        engine.step_many(400, period / 400)
+        assert node.rotation_deg[2] == pytest.approx(5.0, abs=0.05)
+
+        engine.step_many(200, period / 400)
+        assert (node.rotation_deg[2] + 180) % 360 - 180 == pytest.approx(-5.0, abs=0.05)
+
+    @pytest.mark.parametrize("body_store", [False, True])
+    def test_every_pendulum_swings_on_its_own(self, body_store):
+        engine = Engine(0, 0, headless=True, integrator=RK4(), body_store=body_store)
+        world = World(0.0, 0.0, 0.0, 0.0)
+        nodes = [pendulum(angle, length) for angle, length in [(10, 1.0), (40, 3.0)]]
+        world.add_children(nodes)
+        engine.add_child(world)
+
+        single = Engine(0, 0, headless=True, integrator=RK4())
+        alone = pendulum(40, 3.0)
+        single.add_child(alone)
+
+        engine.step_many(100, 0.01)
+        single.step_many(100, 0.01)
+        assert nodes[1].rotation_deg == pytest.approx(alone.rotation_deg)
+        assert nodes[0].rotation_deg[2] != pytest.approx(alone.rotation_deg[2])
+
+    def test_damping_settles_the_swing(self):
+        engine = Engine(0, 0, headless=True)
+        node = pendulum(30.0, damping=2.0)
+        engine.add_child(node)
+        engine.step_many(600, 0.01)
+        assert (node.rotation_deg[2] + 180) % 360 - 180 == pytest.approx(0.0, abs=0.5)
+
+    def test_length_comes_from_the_string(self):
+        node = glObject(0.0, 0.0, 0.0, 0.0)
+        node.add_child(String(0.0, 0.0, 0.0, 4.0, 0.1, (0.0, 0.0, 0.0)))
+        assert Hinge().length_of(node) == 4.0
+        with pytest.raises(ValueError):
+            Hinge().length_of(glObject(0.0, 0.0, 0.0, 0.0))
+
+    @pytest.mark.parametrize("body_store", [False, True])
+    def test_nested_hinges_swing_as_a_double_pendulum(self, body_store):
+        engine = Engine(0, 0, headless=True, integrator=RK4(), body_store=body_store)
+        world = World(0.0, 0.0, 0.0, 0.0)
+        chains = []
+        for top_angle, bottom_angle in [(30.0, -50.0), (90.0, 10.0)]:
+            top = pendulum(top_angle, length=1.0)
+            bottom = pendulum(bottom_angle, length=2.0)
+            # Hangs from the end of the link above
+            bottom.y = -1.0
+            top.add_child(bottom)
+            world.add_child(top)
+            chains.append((top, bottom))
+        # Alongside the chains, a single pendulum stays on its own
+        alone = pendulum(40.0)
+        world.add_child(alone)
+        engine.add_child(world)
+
+        engine.step_many(200, 0.005)
+
+        for (top, bottom), start in zip(chains, [(30.0, -20.0), (90.0, 100.0)]):
+            phi = reference_double_pendulum(np.radians(start), 1.0, 2.0, 200, 0.005)
+            angles = np.radians([top.rotation_deg[2], bottom.rotation_deg[2]])
+            expected = [phi[0], phi[1] - phi[0]]
+            assert np.angle(np.exp(1j * (angles - expected))) == pytest.approx(
+                np.zeros(2), abs=1e-6
+            )
+        single = Engine(0, 0, headless=True, integrator=RK4())
+        reference = pendulum(40.0)
+        single.add_child(reference)
+        single.step_many(200, 0.005)
+        assert alone.rotation_deg == pytest.approx(reference.rotation_deg)
+
+    def test_linked_hinges_share_an_axis(self):
+        engine = Engine(0, 0, headless=True)
+        top = pendulum(30.0)
+        bottom = glObject(0.0, -1.0, 0.0, 0.0)
+        bottom.hinge = Hinge(axis=0, length=1.0)
+        top.add_child(bottom)
+        engine.add_child(top)
+        with pytest.raises(ValueError):
+            engine.step(0.01)
+
+    def test_setting_a_hinge_rebuilds_the_plan(self):
+        engine = Engine(0, 0, headless=True)
+        node = glObject(0.0, 0.0, 0.0, 0.0, rotation_deg=(0.0, 0.0, 30.0))
+        engine.add_child(node)
+        engine.step(0.01)
+        assert node.rotation_deg[2] == 30.0
+
+        node.hinge = Hinge(length=1.0)
+        engine.step_many(5, 0.01)
+        assert node.rotation_deg[2] < 30.0
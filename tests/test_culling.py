@@ -0,0 +1,115 @@
+import pytest
+
+from simplephysicsengine import Ball, Engine, glObject
+from simplephysicsengine.culling import View
+from simplephysicsengine.rendering import RenderBatch, model_matrix
+
+
+class Marker(glObject):
+    # Draws nothing, records that it would have
+    def __init__(self, x, y, z, radius):
+        super().__init__(x, y, z, 2 * radius)
+        self.draws = 0
+
+    def draw_radius(self):
+        return self.size / 2
+
+    def draw(self):
+        self.draws += 1
+        super().draw()
+
+
+def make_engine(*nodes):
+    engine = Engine(0, 0, -50, headless=True)
+    engine.add_children(list(nodes))
+    return engine
+
+
+class TestCulling:
+    @pytest.mark.parametrize(
+        "position, visible",
+        [
+            ((0.0, 0.0, 0.0), True),
+            ((20.0, 0.0, 0.0), True),
+            ((40.0, 0.0, 0.0), False),
+            ((0.0, 30.0, 0.0), False),
+            ((0.0, 0.0, 60.0), False),  # behind the camera
+            ((0.0, 0.0, -60.0), False),  # beyond the far plane
+        ],
+    )
+    def test_frustum(self, position, visible):
+        marker = Marker(*position, 0.5)
+        engine = make_engine(marker)
+        assert View(engine).sees(marker) == visible
+
+    def test_rotated_camera(self):
+        marker = Marker(40.0, 0.0, 0.0, 0.5)
+        engine = make_engine(marker)
+        engine.z = -40.0
+        assert not View(engine).sees(marker)
+
+        # Turned towards +x, the marker is 80 units ahead
+        engine.rotation_deg = (0.0, 90.0, 0.0)
+        assert View(engine).sees(marker)
+
+    def test_subtree_bound_covers_children(self):
+        holder = glObject(40.0, 0.0, 0.0, 0.0)
+        holder.add_child(Marker(-30.0, 0.0, 0.0, 0.5))
+        engine = make_engine(holder)
+
+        assert holder.get_bounding_radius() == pytest.approx(30.5)
+        assert View(engine).sees(holder)
+
+        holder._children[0].x = 0.0
+        assert holder.get_bounding_radius() == pytest.approx(0.5)
+        assert not View(engine).sees(holder)
+
+    def test_culling_matches_the_drawn_transform(self):
+        # Under a translated parent, both drawing paths and culling use the
+        # position relative to the engine, not the local one
+        world = glObject(40.0, 0.0, 0.0, 0.0)
+        shown = Marker(-40.0, 0.0, 0.0, 0.5)
+        hidden = Marker(0.0, 0.0, 0.0, 0.5)
+        world.add_children([shown, hidden])
+        engine = make_engine(world)
+
+        view = View(engine)
+        assert view.sees(shown)
+        assert not view.sees(hidden)
+        assert model_matrix(shown)[:3, 3] == pytest.approx([0.0, 0.0, 0.0])
+        assert model_matrix(hidden)[:3, 3] == pytest.approx([40.0, 0.0, 0.0])
+        data = RenderBatch(engine).instance_data([(hidden, (1.0, 1.0, 1.0))])
+        assert data[0] == pytest.approx(model_matrix(hidden)[:3])
+
+    def test_rotation_keeps_bounds(self):
+        holder = glObject(0.0, 0.0, 0.0, 0.0)
+        holder.add_child(Marker(10.0, 0.0, 0.0, 1.0))
+        make_engine(holder)
+        holder.get_bounding_radius()
+
+        holder.rotation_deg = (0.0, 0.0, 90.0)
+        assert not holder._bounds_dirty
+
+    def test_tiny_subtrees_are_skipped(self):
+        engine = make_engine(Marker(0.0, 0.0, 0.0, 0.0005))
+        assert not View(engine).sees(engine._children[0])
+
+    def test_draw_skips_culled_subtrees(self):
+        inside = Marker(0.0, 0.0, 0.0, 1.0)
+        outside = Marker(80.0, 0.0, 0.0, 1.0)
+        outside.add_child(Marker(0.0, 0.0, 0.0, 1.0))
+        engine = make_engine(inside, outside)
+
+        engine.draw()
+        assert inside.draws == 1
+        assert outside.draws == 0
+        assert outside._children[0].draws == 0
+
+    def test_sphere_detail_follows_screen_size(self):
+        near = Ball(0.0, 0.0, 0.0, 10.0, (0.0, 0.0, 0.0))
+        far = Ball(0.0, 0.0, -40.0, 1.0, (0.0, 0.0, 0.0))
+        engine = make_engine(near, far)
+        view = View(engine)
+
+        assert view.sphere_detail(near, 5.0) == 32
+        assert view.sphere_detail(far, 0.5) == 8
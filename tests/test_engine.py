@@ -2,7 +2,7 @@ import pytest
 import pygame
 from pygame.locals import *
 
-from simplephysicsengine import Engine, World, Ball
+from simplephysicsengine import Engine, World, Ball, glObject
 
 
 class TestEngine:
@@ -73,3 +73,97 @@ class TestEngine:
         assert engine.debug is True
         assert world.debug is True
         assert world._children[0].debug is True
+
+
+class TestHeadlessEngine:
+    def test_initialization(self):
+        engine = Engine(0, 0, -50, headless=True)
+        assert engine.headless is True
+        assert engine._children == []
+
+    def test_run_raises(self):
+        engine = Engine(0, 0, -50, headless=True)
+        with pytest.raises(RuntimeError):
+            engine.run()
+
+    def test_step_many(self):
+        engine = Engine(0, 0, -50, headless=True)
+        world = World(0.0, 0.0, 0.0, 0.0)
+        world.assign_angular_velocity((0.0, 0.0, 10.0))
+        engine.add_child(world)
+
+        engine.step_many(10, 0.1)
+
+        assert world.rotation_deg[2] == pytest.approx(10.0)
+
+    def test_step_does_not_tick_timer(self):
+        engine = Engine(0, 0, -50, headless=True)
+        world = World(0.0, 0.0, 0.0, 0.0)
+        world.assign_angular_velocity((0.0, 10.0, 0.0))
+        engine.add_child(world)
+
+        engine.step(1.0)
+        engine.step(1.0)
+
+        assert world.rotation_deg[1] == pytest.approx(20.0)
+
+
+class TestInterpolatedDraw:
+    class Probe(World):
+        def __init__(self):
+            super().__init__(0.0, 0.0, 0.0, 0.0)
+            self.drawn = []
+
+        def draw(self):
+            self.drawn.append((self.x, tuple(self.rotation_deg)))
+
+    @pytest.mark.parametrize("body_store", [False, True])
+    def test_blends_last_two_states(self, body_store):
+        engine = Engine(0, 0, -50, headless=True, body_store=body_store)
+        probe = self.Probe()
+        probe.rotation_deg = (0.0, 0.0, 350.0)
+        probe.assign_angular_velocity((0.0, 0.0, 20.0))
+        engine.add_child(probe)
+        engine.step(0.5)
+
+        previous_state = engine.capture_render_state()
+        probe.x = 4.0
+        engine.step(1.0)
+        engine.draw_interpolated(0.25, previous_state)
+
+        x, rotation = probe.drawn[-1]
+        assert x == pytest.approx(1.0)
+        assert rotation == pytest.approx((0.0, 0.0, 5.0))
+        # The physics state itself is untouched
+        assert probe.x == 4.0
+        assert probe.rotation_deg == pytest.approx((0.0, 0.0, 20.0))
+
+    class Marker(glObject):
+        def __init__(self, x):
+            super().__init__(x, 0.0, 0.0, 1.0)
+            self.draws = 0
+
+        def draw_radius(self):
+            return 0.5
+
+        def draw(self):
+            self.draws += 1
+
+    def test_culls_with_the_blended_bounds(self):
+        # Out of view on its own, the holder reaches into view through its child
+        # only in the previous state
+        engine = Engine(0, 0, -50, headless=True)
+        holder = glObject(80.0, 0.0, 0.0, 0.0)
+        marker = self.Marker(-80.0)
+        holder.add_child(marker)
+        engine.add_child(holder)
+
+        previous_state = engine.capture_render_state()
+        marker.x = 0.0
+        engine.draw()
+        assert marker.draws == 0
+
+        engine.draw_interpolated(0.0, previous_state)
+        assert marker.draws == 1
+        engine.draw()
+        assert marker.draws == 1
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from simplephysicsengine import Engine, World
+from simplephysicsengine.ensemble import parameter_grid, run_ensemble, run_scene
+
+
+def build_spinner(speed, count=2):
+    engine = Engine(0, 0, -50, headless=True)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    for i in range(count):
+        spinner = World(float(i), 0.0, 0.0, 0.0)
+        spinner.assign_angular_velocity((0.0, 0.0, speed))
+        world.add_child(spinner)
+    engine.add_child(world)
+    return engine
+
+
+def spinner_angle(engine):
+    return engine._children[0]._children[0].rotation_deg[2]
+
+
+class TestEnsemble:
+    def test_parameter_grid(self):
+        assert parameter_grid({"a": [1, 2], "b": ["x"]}) == [
+            {"a": 1, "b": "x"},
+            {"a": 2, "b": "x"},
+        ]
+
+    def test_run_scene_records_windows(self):
+        result = run_scene(
+            build_spinner, {"speed": 10.0}, steps=10, dt=0.1, record_every=3
+        )
+
+        assert result.trajectory.shape == (4, 3, 3, 3)
+        # Rotation of the first spinner at the end of steps 3, 6, 9 and 10
+        assert result.trajectory[:, 1, 1, 2] == pytest.approx([3.0, 6.0, 9.0, 10.0])
+        assert result.metrics["collisions"].shape == (4,)
+        assert result.metrics["kinetic_energy"][-1] == pytest.approx(
+            2 * 0.5 * np.radians(10.0) ** 2
+        )
+
+    def test_run_scene_requires_headless(self):
+        def build_windowed(**params):
+            engine = build_spinner(1.0)
+            engine.headless = False
+            return engine
+
+        with pytest.raises(ValueError):
+            run_scene(build_windowed, {}, steps=1, dt=0.1)
+
+    def test_run_ensemble(self):
+        results = list(
+            run_ensemble(
+                build_spinner,
+                {"speed": [10.0, 20.0], "count": [1, 3]},
+                steps=5,
+                dt=0.1,
+                probes={"angle": spinner_angle},
+                max_workers=2,
+            )
+        )
+
+        assert len(results) == 4
+        for result in results:
+            assert result.trajectory.shape == (5, 1 + result.params["count"], 3, 3)
+            speed = result.params["speed"]
+            assert result.metrics["angle"][-1] == pytest.approx(speed / 2)
+            assert result.collision_count == 0
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from simplephysicsengine import Ball, Engine, World
+
+
+def reference_position_within(obj, ancestor):
+    # Straightforward walk up the parent chain, rebuilding every rotation
+    position = np.zeros(3)
+    current = obj
+    while current is not ancestor:
+        rx, ry, rz = np.radians(current.rotation_deg)
+        rot_x = np.array(
+            [[1, 0, 0], [0, np.cos(rx), -np.sin(rx)], [0, np.sin(rx), np.cos(rx)]]
+        )
+        rot_y = np.array(
+            [[np.cos(ry), 0, np.sin(ry)], [0, 1, 0], [-np.sin(ry), 0, np.cos(ry)]]
+        )
+        rot_z = np.array(
+            [[np.cos(rz), -np.sin(rz), 0], [np.sin(rz), np.cos(rz), 0], [0, 0, 1]]
+        )
+        position = rot_z @ rot_y @ rot_x @ position
+        position += (current.x, current.y, current.z)
+        current = current.parent
+    return position
+
+
+def make_chain(depth):
+    root = World(0.0, 0.0, 0.0, 0.0)
+    nodes = [root]
+    for i in range(depth):
+        node = World(1.0 + i, -0.5 * i, 2.0, 0.0)
+        node.rotation_deg = (10.0 * i, 20.0, 30.0 - 5 * i)
+        nodes[-1].add_child(node)
+        nodes.append(node)
+    return nodes
+
+
+class TestTransforms:
+    def test_matches_reference(self):
+        nodes = make_chain(6)
+        for ancestor in nodes[:3]:
+            assert nodes[-1].get_position_within(ancestor) == pytest.approx(
+                tuple(reference_position_within(nodes[-1], ancestor))
+            )
+
+    def test_world_matrix_is_cached(self):
+        nodes = make_chain(3)
+        matrix = nodes[-1].get_world_matrix()
+        assert nodes[-1].get_world_matrix() is matrix
+
+    def test_camera_moves_keep_cached_transforms(self):
+        engine = Engine(0, 0, -50, headless=True)
+        nodes = make_chain(3)
+        engine.add_child(nodes[0])
+        position = nodes[-1].get_position_within(engine)
+        matrix = nodes[-1].get_world_matrix().copy()
+
+        engine.x = 5.0
+        engine.rotation_deg = (30.0, 40.0, 0.0)
+
+        assert not nodes[-1]._world_dirty
+        assert nodes[-1].get_world_matrix() == pytest.approx(matrix)
+        assert nodes[-1].get_position_within(engine) == pytest.approx(position)
+
+    def test_ancestor_change_invalidates_descendants(self):
+        nodes = make_chain(4)
+        nodes[-1].get_world_matrix()
+
+        nodes[1].rotation_deg = (0.0, 0.0, 90.0)
+        nodes[2].x = 5.0
+
+        assert nodes[-1].get_position_within(nodes[0]) == pytest.approx(
+            tuple(reference_position_within(nodes[-1], nodes[0]))
+        )
+
+    def test_reparenting_invalidates(self):
+        nodes = make_chain(2)
+        other = World(100.0, 0.0, 0.0, 0.0)
+        nodes[0].add_child(other)
+        nodes[-1].get_world_matrix()
+
+        nodes[1].remove_child(nodes[2])
+        other.add_child(nodes[2])
+
+        assert nodes[2].get_position_within(nodes[0]) == pytest.approx(
+            tuple(reference_position_within(nodes[2], nodes[0]))
+        )
+
+    def test_update_rotates_only_moving_nodes(self):
+        nodes = make_chain(2)
+        nodes[1].assign_angular_velocity((0.0, 0.0, 90.0))
+        resting = nodes[2].get_local_matrix()
+
+        nodes[0].update(1.0)
+
+        assert not nodes[2]._local_dirty
+        assert nodes[2].get_local_matrix() is resting
+        assert nodes[2].get_position_within(nodes[0]) == pytest.approx(
+            tuple(reference_position_within(nodes[2], nodes[0]))
+        )
+
+
+class TestSlots:
+    def test_nodes_have_no_instance_dict(self):
+        ball = Ball(0.0, 0.0, 0.0, 1.0, (0.0, 0.0, 0.0))
+        assert not hasattr(ball, "__dict__")
+        assert not hasattr(World(0.0, 0.0, 0.0, 0.0), "__dict__")
+
+    def test_only_rotated_nodes_cache_a_local_matrix(self):
+        nodes = make_chain(2)
+        moved = World(1.0, 2.0, 3.0, 0.0)
+        nodes[-1].add_child(moved)
+
+        assert moved.get_position_within(nodes[0]) == pytest.approx(
+            tuple(reference_position_within(moved, nodes[0]))
+        )
+        assert moved._local_matrix is None
+        assert nodes[-1]._local_matrix is not None
@@ -0,0 +1,90 @@
+from functools import cache
+
+import numpy as np
+import pytest
+
+from simplephysicsengine import Engine, glObject
+from simplephysicsengine.integrators import (
+    RK4,
+    ExplicitEuler,
+    SemiImplicitEuler,
+    VelocityVerlet,
+)
+
+
+class Pendulum(glObject):
+    # Undamped, small swings have a period of 2 pi / sqrt(stiffness)
+    stiffness = 4.0
+
+    @classmethod
+    def angular_accelerations(cls, nodes, rotations, velocities):
+        theta = np.radians((rotations[:, 2] + 180) % 360 - 180)
+        accelerations = np.zeros_like(rotations)
+        accelerations[:, 2] = -cls.stiffness * np.degrees(np.sin(theta))
+        return accelerations
+
+
+def energy(pendulum):
+    theta = np.radians(pendulum.rotation_deg[2])
+    velocity = np.radians(pendulum.angular_velocity[2])
+    return 0.5 * velocity**2 + Pendulum.stiffness * (1 - np.cos(theta))
+
+
+def swing(integrator, dt, duration=10.0, body_store=False):
+    engine = Engine(0, 0, headless=True, integrator=integrator, body_store=body_store)
+    pendulum = Pendulum(0.0, 0.0, 0.0, 0.0, rotation_deg=(0.0, 0.0, 60.0))
+    engine.add_child(pendulum)
+    start = energy(pendulum)
+    engine.step_many(round(duration / dt), dt)
+    return pendulum, energy(pendulum) / start
+
+
+@cache
+def reference_angle():
+    pendulum, _ = swing(RK4(), 1 / 400)
+    return pendulum.rotation_deg[2]
+
+
+class TestIntegrators:
+    def test_explicit_euler_gains_energy(self):
+        _, ratio = swing(ExplicitEuler(), 1 / 30)
+        assert ratio > 1.5
+
+    @pytest.mark.parametrize(
+        "integrator", [SemiImplicitEuler(), VelocityVerlet(), RK4()]
+    )
+    def test_energy_stays_bounded(self, integrator):
+        _, ratio = swing(integrator, 1 / 30)
+        assert abs(ratio - 1) < 0.05
+
+    def test_higher_order_keeps_accuracy_at_large_steps(self):
+        expected = reference_angle()
+        for integrator, tolerance in ((VelocityVerlet(), 1.0), (RK4(), 0.01)):
+            pendulum, _ = swing(integrator, 1 / 20)
+            assert abs(pendulum.rotation_deg[2] - expected) < tolerance
+
+    def test_body_store_matches_plain_nodes(self):
+        plain, _ = swing(RK4(), 1 / 30, duration=2.0)
+        stored, _ = swing(RK4(), 1 / 30, duration=2.0, body_store=True)
+        assert np.allclose(plain._state, stored._state)
+
+    def test_subtree_integrator_overrides_engine(self):
+        engine = Engine(0, 0, headless=True, integrator=ExplicitEuler())
+        group = glObject(0.0, 0.0, 0.0, 0.0)
+        group.integrator = RK4()
+        plain = Pendulum(0.0, 0.0, 0.0, 0.0, rotation_deg=(0.0, 0.0, 60.0))
+        accurate = Pendulum(0.0, 0.0, 0.0, 0.0, rotation_deg=(0.0, 0.0, 60.0))
+        group.add_child(accurate)
+        engine.add_children([plain, group])
+
+        engine.step_many(200, 1 / 20)
+        assert abs(accurate.rotation_deg[2] - reference_angle()) < 0.01
+        assert abs(plain.rotation_deg[2] - reference_angle()) > 1.0
+
+    def test_assigned_velocities_are_integrated(self):
+        engine = Engine(0, 0, headless=True, integrator=RK4())
+        node = glObject(0.0, 0.0, 0.0, 0.0)
+        engine.add_child(node)
+        node.assign_angular_velocity((0.0, 10.0, 0.0))
+        engine.step(0.5)
+        assert np.allclose(node.rotation_deg, (0.0, 5.0, 0.0))
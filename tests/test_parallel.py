@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from conftest import make_body
+from simplephysicsengine import Engine, HasCollisionMixin, World
+
+
+def make_engine(worlds, spacing=100.0, **kwargs):
+    engine = Engine(0, 0, headless=True, **kwargs)
+    for i in range(worlds):
+        world = World(i * spacing, 0.0, 0.0, 0.0)
+        pendulums = [make_body(x, length=5.0) for x in (0.0, 2.5, 5.0)]
+        pendulums[0].assign_angular_velocity((0.0, 0.0, 40.0 + 10.0 * i))
+        world.add_children(pendulums)
+        engine.add_child(world)
+    return engine
+
+
+def world_of(hitbox):
+    return hitbox.parent.parent.parent.parent
+
+
+def contacts(engine, pairs):
+    return np.array(
+        [[hitbox.get_position_within(engine) for hitbox in pair] for pair in pairs]
+    ).reshape(-1, 2, 3)
+
+
+def positions(engine):
+    return np.array([node.get_position_within(engine) for node in engine.nodes])
+
+
+class TestParallelStepper:
+    @pytest.mark.parametrize("workers", [1, 2, 3])
+    def test_matches_sequential_stepping(self, workers):
+        sequential = make_engine(5)
+        parallel = make_engine(5, workers=workers)
+
+        for _ in range(40):
+            expected = sequential.step(0.02)
+            collisions = parallel.step(0.02)
+            assert contacts(parallel, collisions) == pytest.approx(
+                contacts(sequential, expected)
+            )
+        assert len(parallel.hitbox_positions) == 15
+        assert positions(parallel) == pytest.approx(positions(sequential))
+        parallel.parallel.close()
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_overlapping_worlds_collide_like_sequential(self, workers):
+        # The two worlds' pendulums interleave, half the contacts span both
+        sequential = make_engine(2, spacing=1.25)
+        parallel = make_engine(2, spacing=1.25, workers=workers)
+
+        for _ in range(20):
+            expected = sequential.step(0.02)
+            collisions = parallel.step(0.02)
+            assert contacts(parallel, collisions) == pytest.approx(
+                contacts(sequential, expected)
+            )
+        assert any(world_of(a) is not world_of(b) for a, b in collisions)
+        assert positions(parallel) == pytest.approx(positions(sequential))
+        parallel.parallel.close()
+
+    def test_children_sharing_a_handler_share_a_partition(self):
+        engine = make_engine(4, workers=4)
+        engine.step(0.02)
+        assert len(engine.parallel._partitions) == 4
+
+        # Hitboxes handled by the engine itself tie every child to one partition
+        class HandlingEngine(Engine, HasCollisionMixin):
+            def on_collision(self, other1, other2):
+                pass
+
+        engine = HandlingEngine(0, 0, headless=True, workers=4)
+        engine.add_children([make_body(x, length=5.0) for x in (0.0, 50.0, 100.0)])
+        engine.step(0.02)
+        assert [len(p.children) for p in engine.parallel._partitions] == [3]
+        engine.parallel.close()
+
+    def test_partitions_follow_tree_changes(self):
+        engine = make_engine(2, workers=2)
+        engine.step(0.02)
+        world = World(300.0, 0.0, 0.0, 0.0)
+        world.add_child(make_body(length=5.0))
+        engine.add_child(world)
+        engine.step(0.02)
+        assert len(engine.hitbox_positions) == 7
+        engine.parallel.close()
@@ -0,0 +1,199 @@
+import numpy as np
+import pytest
+
+from simplephysicsengine import Engine, World, CubeHitbox, Hitbox, glObject
+from simplephysicsengine.broadphase import BruteForceBroadPhase
+
+
+class CountingHitbox(Hitbox):
+    def __init__(self, x, y, z, size):
+        super().__init__(x, y, z, size)
+        self.calls = 0
+
+    def check_collision(self, other, common_ancestor):
+        self.calls += 1
+        return True
+
+
+class RecordingWorld(World):
+    def __init__(self):
+        super().__init__(0.0, 0.0, 0.0, 0.0)
+        self.collisions = []
+
+    def on_collision(self, other1, other2):
+        self.collisions.append((other1, other2))
+
+
+def add_body(world, hitbox):
+    body = glObject(0.0, 0.0, 0.0, 0.0)
+    body.add_child(hitbox)
+    world.add_child(body)
+    return body
+
+
+class TestNarrowPhase:
+    def test_batched_matches_per_pair(self):
+        rng = np.random.default_rng(3)
+        world = World(0.0, 0.0, 0.0, 0.0)
+        hitboxes = []
+        for position in rng.uniform(-5, 5, size=(60, 3)):
+            hitbox = CubeHitbox(*position, rng.uniform(0.5, 3.0))
+            world.add_child(hitbox)
+            hitboxes.append(hitbox)
+
+        positions = np.array([h.get_position_within(world) for h in hitboxes])
+        sizes = np.array([h.size for h in hitboxes])
+        pairs = BruteForceBroadPhase().find_pairs(positions, sizes / 2)
+
+        hits, depths, normals = CubeHitbox.check_collisions_batched(
+            pairs, positions, sizes
+        )
+
+        expected = [
+            (i, j) for i, j in pairs if hitboxes[i].check_collision(hitboxes[j], world)
+        ]
+        assert [tuple(pair) for pair in hits] == expected
+        assert np.all(depths > 0)
+        assert np.linalg.norm(normals, axis=1) == pytest.approx(np.ones(len(hits)))
+
+    def test_contact_normal_and_depth(self):
+        pairs = np.array([[0, 1]])
+        positions = np.array([[0.0, 0.0, 0.0], [0.0, 1.5, 0.0]])
+        sizes = np.array([2.0, 2.0])
+
+        hits, depths, normals = CubeHitbox.check_collisions_batched(
+            pairs, positions, sizes
+        )
+
+        assert hits.tolist() == [[0, 1]]
+        assert depths == pytest.approx([0.5])
+        assert normals[0] == pytest.approx([0.0, 1.0, 0.0])
+
+    def test_custom_hitboxes_fall_back_to_check_collision(self):
+        engine = Engine(0, 0, -50, headless=True)
+        world = RecordingWorld()
+        cube = add_body(world, CubeHitbox(0.0, 0.0, 0.0, 1.0))
+        custom_hitbox = CountingHitbox(0.0, 0.0, 0.0, 1.0)
+        custom = add_body(world, custom_hitbox)
+        engine.add_child(world)
+
+        collisions = engine.check_collisions()
+
+        assert custom_hitbox.calls == 0
+        assert len(collisions) == 1
+        assert world.collisions == [(cube, custom)]
+
+    def test_steps_without_any_contact(self):
+        class NeverHitbox(Hitbox):
+            def check_collision(self, other, common_ancestor):
+                return False
+
+        engine = Engine(0, 0, -50, headless=True)
+        world = RecordingWorld()
+        # Only pair by pair hitboxes, and none of their pairs collides
+        add_body(world, NeverHitbox(0.0, 0.0, 0.0, 1.0))
+        add_body(world, NeverHitbox(0.5, 0.0, 0.0, 1.0))
+        engine.add_child(world)
+
+        assert engine.step(0.01) == []
+        assert world.collisions == []
+
+    def test_overridden_check_collision_skips_the_kernel(self):
+        class NeverHitbox(CubeHitbox):
+            def check_collision(self, other, common_ancestor):
+                return False
+
+        engine = Engine(0, 0, -50, headless=True)
+        world = RecordingWorld()
+        add_body(world, NeverHitbox(0.0, 0.0, 0.0, 1.0))
+        add_body(world, NeverHitbox(0.5, 0.0, 0.0, 1.0))
+        engine.add_child(world)
+
+        assert engine.step(0.01) == []
+        assert world.collisions == []
+        assert CubeHitbox._batched_kernel() is not None
+        assert NeverHitbox._batched_kernel() is None
+
+
+class BatchRecordingWorld(World):
+    def __init__(self):
+        super().__init__(0.0, 0.0, 0.0, 0.0)
+        self.batches = []
+
+    def on_collisions(self, contacts):
+        self.batches.append(contacts)
+
+
+class TestContactBatch:
+    def test_contacts_are_batched_per_handler(self):
+        engine = Engine(0, 0, -50, headless=True)
+        outer = BatchRecordingWorld()
+        inner = BatchRecordingWorld()
+        hitboxes = [CubeHitbox(x, 0.0, 0.0, 2.0) for x in (0.0, 1.5, 3.0)]
+        for hitbox in hitboxes[:2]:
+            add_body(outer, hitbox)
+        add_body(inner, hitboxes[2])
+        outer.add_child(inner)
+        engine.add_child(outer)
+
+        engine.check_collisions()
+
+        # The pair across both handlers reaches each of them once
+        (outer_contacts,) = outer.batches
+        (inner_contacts,) = inner.batches
+        assert list(outer_contacts) == [
+            (hitboxes[0], hitboxes[1]),
+            (hitboxes[1], hitboxes[2]),
+        ]
+        assert list(inner_contacts) == [(hitboxes[1], hitboxes[2])]
+        assert outer_contacts.depths == pytest.approx([0.5, 0.5])
+        assert outer_contacts.normals == pytest.approx(np.tile([1.0, 0.0, 0.0], (2, 1)))
+
+    def test_contacts_carry_what_the_narrow_phase_found(self):
+        class DeepHitbox(CubeHitbox):
+            @staticmethod
+            def check_collisions_batched(pairs, positions, sizes):
+                normals = np.tile([0.0, 0.0, 1.0], (len(pairs), 1))
+                return pairs, np.full(len(pairs), 7.0), normals
+
+        for workers in (0, 2):
+            engine = Engine(0, 0, -50, headless=True, workers=workers)
+            world = BatchRecordingWorld()
+            add_body(world, DeepHitbox(0.0, 0.0, 0.0, 2.0))
+            add_body(world, DeepHitbox(1.5, 0.0, 0.0, 2.0))
+            # Pair by pair hitboxes get the overlap of their bounding spheres
+            add_body(world, CountingHitbox(0.0, 10.0, 0.0, 2.0))
+            add_body(world, CountingHitbox(0.0, 11.0, 0.0, 2.0))
+            engine.add_child(world)
+
+            engine.step(0.1)
+
+            (contacts,) = world.batches
+            assert contacts.depths == pytest.approx([7.0, 1.0])
+            assert contacts.normals == pytest.approx(
+                np.array([[0.0, 0.0, 1.0], [0.0, 1.0, 0.0]])
+            )
+            if engine.parallel is not None:
+                engine.parallel.close()
+
+    def test_world_exchanges_velocities_from_before_the_step(self):
+        engine = Engine(0, 0, -50, headless=True)
+        world = World(0.0, 0.0, 0.0, 0.0)
+        bodies = []
+        for x in (0.0, 1.5, 3.0):
+            body = glObject(x, 0.0, 0.0, 0.0)
+            ball = glObject(0.0, 0.0, 0.0, 0.0)
+            ball.add_child(CubeHitbox(0.0, 0.0, 0.0, 2.0))
+            body.add_child(glObject(0.0, 0.0, 0.0, 0.0))
+            body._children[0].add_child(ball)
+            world.add_child(body)
+            bodies.append(body)
+        engine.add_child(world)
+        for body, velocity in zip(bodies, (1.0, 2.0, 3.0)):
+            body.angular_velocity = (0.0, 0.0, velocity)
+
+        engine.check_collisions()
+
+        # The middle body takes part in both contacts, the later one wins
+        pending = [body._state[3, 2] for body in bodies]
+        assert pending == [2.0, 3.0, 2.0]
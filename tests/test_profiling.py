@@ -0,0 +1,88 @@
+import pytest
+
+from conftest import make_body
+from simplephysicsengine import Engine, World
+from simplephysicsengine.profiling import CsvSink, Profiler, StatsSink
+
+
+def make_scene(**kwargs):
+    engine = Engine(0, 0, -50, headless=True, **kwargs)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    world.add_children([make_body(x, size=1.0) for x in (0.0, 0.5, 5.0)])
+    engine.add_child(world)
+    return engine
+
+
+class TestProfiler:
+    def test_disabled_by_default(self):
+        engine = make_scene()
+        engine.step_many(3, 0.1)
+        assert engine.profiler is None
+
+    def test_counts_per_step(self):
+        engine = make_scene()
+        engine.profiler = Profiler()
+
+        engine.step_many(4, 0.1)
+
+        assert engine.profiler.frame_count == 4
+        summary = engine.profiler.summary()
+        assert summary["nodes_updated"] == 13
+        assert summary["collisions"] == 1
+        assert summary["pairs_tested"] >= 1
+        assert summary["update"] > 0
+        assert summary["check_collisions"] > 0
+
+    def test_sleeping_subtrees_are_not_counted_as_updated(self):
+        engine = make_scene(sleeping=True)
+        engine.step_many(20, 0.1)
+        assert len(engine.sleep_manager.sleeping_bodies) == 3
+
+        engine.profiler = Profiler()
+        engine.step(0.1)
+        engine.profiler.end_frame()
+        # Only the world is left
+        assert engine.profiler.summary()["nodes_updated"] == 1
+
+    def test_parallel_steps_time_the_same_phases(self):
+        engine = make_scene(workers=2)
+        engine.profiler = Profiler()
+        engine.step_many(4, 0.1)
+
+        summary = engine.profiler.summary()
+        assert summary["nodes_updated"] == 13
+        assert summary["collisions"] == 1
+        assert summary["update"] > 0
+        assert summary["check_collisions"] > 0
+        engine.parallel.close()
+
+    def test_node_count_follows_tree_changes(self):
+        engine = make_scene()
+        assert engine.node_count == 13
+        engine._children[0].remove_child(engine._children[0]._children[0])
+        assert engine.node_count == 9
+
+    def test_sinks_report_every_n_frames(self, tmp_path):
+        reports = []
+
+        class Recording(StatsSink):
+            def report(self, frame, summary):
+                reports.append((frame, summary["collisions"]))
+
+        path = tmp_path / "stats.csv"
+        csv_sink = CsvSink(str(path), every=2)
+        engine = make_scene()
+        engine.profiler = Profiler(sinks=[Recording(every=3), csv_sink])
+
+        engine.step_many(6, 0.1)
+        csv_sink.close()
+
+        assert reports == [(3, 1.0), (6, 1.0)]
+        rows = path.read_text().splitlines()
+        assert rows[0].startswith("frame,handle_events,update")
+        assert len(rows) == 4
+
+    def test_lap_accumulates(self):
+        profiler = Profiler()
+        start = profiler.lap("draw", 0.0)
+        assert profiler.frame["draw"] == pytest.approx(start)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from conftest import make_body
+from simplephysicsengine import Engine, World
+from simplephysicsengine.recording import TrajectoryReplay
+
+
+def make_scene(body_store=False):
+    engine = Engine(0, 0, -50, headless=True, body_store=body_store)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    spinner = make_body(0.0, size=1.0, hitbox_x=1.0)
+    spinner.assign_angular_velocity((0.0, 0.0, 30.0))
+    world.add_children([spinner, make_body(1.2, size=1.0)])
+    engine.add_child(world)
+    return engine
+
+
+class TestTrajectoryRecorder:
+    @pytest.mark.parametrize("body_store", [False, True])
+    def test_replay_matches_simulation(self, tmp_path, body_store):
+        engine = make_scene(body_store)
+        nodes = list(engine.descendants())
+        path = str(tmp_path / "run.traj")
+
+        expected = []
+        engine.start_recording(path, chunk_frames=4)
+        for _ in range(10):
+            engine.step(0.1)
+            expected.append(np.array([node._state[:3].ravel() for node in nodes]))
+        engine.stop_recording()
+
+        replay = TrajectoryReplay(path)
+        assert len(replay) == 10
+        assert replay.times == pytest.approx(np.arange(1, 11) * 0.1)
+        for frame in (0, 3, 4, 9):
+            assert replay.frame(frame) == pytest.approx(expected[frame], abs=1e-4)
+
+    def test_collision_events(self, tmp_path):
+        engine = make_scene()
+        nodes = list(engine.descendants())
+        path = str(tmp_path / "run.traj")
+
+        expected = []
+        with engine.start_recording(path, chunk_frames=3):
+            for _ in range(7):
+                collisions = engine.step(0.1)
+                expected.append(
+                    [[nodes.index(a), nodes.index(b)] for a, b in collisions]
+                )
+        engine.recorder = None
+
+        replay = TrajectoryReplay(path)
+        # The hitboxes are nodes 4 and 8 in pre-order and start overlapping
+        assert expected[0] == [[4, 8]]
+        for frame in range(7):
+            assert replay.collisions(frame).tolist() == expected[frame]
+
+    def test_apply_and_seek(self, tmp_path):
+        engine = make_scene()
+        path = str(tmp_path / "run.traj")
+        engine.start_recording(path)
+        engine.step_many(2, 0.1)
+        hitbox_position = list(engine.descendants())[4].get_position_within(engine)
+        engine.step_many(3, 0.1)
+        engine.stop_recording()
+
+        other = make_scene()
+        nodes = list(other.descendants())
+        replay = TrajectoryReplay(path)
+        replay.apply(nodes, replay.frame_at(0.25))
+
+        assert nodes[4].get_position_within(other) == pytest.approx(
+            hitbox_position, abs=1e-4
+        )
+        with pytest.raises(ValueError):
+            replay.apply(nodes[:-1], 0)
+
+    def test_rejects_unfinished_file(self, tmp_path):
+        engine = make_scene()
+        path = str(tmp_path / "run.traj")
+        recorder = engine.start_recording(path)
+        engine.step(0.1)
+        recorder._file.flush()
+
+        with pytest.raises(ValueError):
+            TrajectoryReplay(path)
+        engine.stop_recording()
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from simplephysicsengine import Engine, World, Ball, String
+from simplephysicsengine.rendering import (
+    RenderBatch,
+    tessellate_quad,
+    tessellate_sphere,
+)
+
+
+class TestRendering:
+    def test_tessellate_sphere(self):
+        vertices, normals, indices = tessellate_sphere(8, 6)
+
+        assert vertices.shape == ((6 + 1) * (8 + 1), 3)
+        assert np.linalg.norm(vertices, axis=1) == pytest.approx(np.ones(len(vertices)))
+        assert normals == pytest.approx(vertices)
+        assert len(indices) == 8 * 6 * 6
+        assert indices.max() < len(vertices)
+
+    def test_tessellate_quad(self):
+        vertices, normals, indices = tessellate_quad()
+
+        assert vertices[:, 1].min() == -1.0
+        assert normals == pytest.approx(np.tile([0.0, 0.0, 1.0], (4, 1)))
+        assert indices.max() < len(vertices)
+
+    def test_instance_data_is_relative_to_root(self):
+        engine = Engine(5, 5, -50, headless=True)
+        engine.rotation_deg = (30.0, 40.0, 0.0)
+        world = World(1.0, 2.0, 3.0, 0.0)
+        ball = Ball(1.0, 0.0, 0.0, 4.0, (0.0, 0.0, 0.0))
+        string = String(0.0, 0.0, 0.0, 10.0, 0.5, (90.0, 0.0, 0.0))
+        world.add_children([ball, string])
+        engine.add_child(world)
+
+        batch = RenderBatch(engine)
+        data = batch.instance_data(
+            [(ball, (2.0, 2.0, 2.0)), (string, (0.5, 10.0, 1.0))]
+        )
+
+        assert data.shape == (2, 3, 4)
+        assert data[0, :, 3] == pytest.approx(ball.get_position_within(engine))
+        assert data[0, :, :3] == pytest.approx(2.0 * np.identity(3))
+        # The string hangs along -y, rotated by 90 degrees around x it points along -z
+        assert data[1, :, :3] @ [0.0, -1.0, 0.0] == pytest.approx([0.0, 0.0, -10.0])
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from simplephysicsengine import (
+    Ball,
+    CubeHitbox,
+    Engine,
+    Hinge,
+    Scene,
+    String,
+    World,
+    glObject,
+    load_scene,
+    save_scene,
+)
+from simplephysicsengine.scene_file import JSON_FORMAT, VERSION
+
+
+def make_world():
+    world = World(0.0, 0.0, 0.0, 0.0)
+    for i in range(3):
+        pivot = glObject(i * 3.0, 0.0, 0.0, 0.0, rotation_deg=(0.0, 0.0, 10.0 * i))
+        pivot.hinge = Hinge(axis=2, damping=0.2)
+        string = String(0.0, 0.0, 0.0, 5.0 + i, 0.1, (0.0, 0.0, 0.0))
+        ball = Ball(0.0, -5.0 - i, 0.0, 1.0, (0.0, 0.0, 0.0), color=(0.0, 1.0, 0.0))
+        ball.add_child(CubeHitbox(0.0, 0.0, 0.0, 1.0))
+        string.add_child(ball)
+        pivot.add_child(string)
+        pivot.assign_angular_velocity((0.0, 0.0, 15.0))
+        world.add_child(pivot)
+    return world
+
+
+def assert_same_trees(built, original):
+    nodes = [built, *built.descendants()]
+    expected = [original, *original.descendants()]
+    assert [type(node) for node in nodes] == [type(node) for node in expected]
+    for node, reference in zip(nodes, expected):
+        rows = [0, 1, 3, 4]
+        assert node._state[rows] == pytest.approx(reference._state[rows])
+        assert node.color == pytest.approx(reference.color)
+        assert len(node._children) == len(reference._children)
+        assert (node.hinge is None) == (reference.hinge is None)
+        if isinstance(node, String):
+            assert node.length == reference.length
+
+
+class TestSceneFile:
+    def test_json_round_trip(self):
+        world = make_world()
+        data = Scene.capture([world]).to_json()
+        (built,) = Scene.from_json(data).build()
+        assert_same_trees(built, world)
+        assert built._children[0].hinge.damping == 0.2
+        assert built._children[0].hinge.length is None
+
+    def test_binary_round_trip(self):
+        world = make_world()
+        scene = Scene.from_bytes(Scene.capture([world]).to_bytes())
+        (built,) = scene.build()
+        assert_same_trees(built, world)
+
+    @pytest.mark.parametrize("name", ["scene.json", "scene.spescene"])
+    def test_loaded_scene_simulates_like_the_original(self, tmp_path, name):
+        original = Engine(0, 0, headless=True)
+        original.add_child(make_world())
+        path = str(tmp_path / name)
+        save_scene(path, original._children)
+
+        loaded = Engine(0, 0, headless=True)
+        load_scene(path, loaded)
+        for engine in (original, loaded):
+            engine.step_many(50, 0.02)
+
+        positions = [node.get_position_within(loaded) for node in loaded.nodes]
+        expected = [node.get_position_within(original) for node in original.nodes]
+        assert np.array(positions) == pytest.approx(np.array(expected))
+
+    def test_authoring_defaults(self):
+        data = {
+            "format": JSON_FORMAT,
+            "version": VERSION,
+            "nodes": [{"type": "World", "children": [{"type": "Ball", "size": 2.0}]}],
+        }
+        (world,) = Scene.from_json(data).build()
+        ball = world._children[0]
+        assert isinstance(ball, Ball)
+        assert ball.parent is world
+        assert ball.size == 2.0
+        assert ball.color == (1.0, 1.0, 1.0)
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"format": JSON_FORMAT, "version": VERSION + 1, "nodes": []},
+            {"format": "other", "version": VERSION, "nodes": []},
+            {"format": JSON_FORMAT, "version": VERSION, "nodes": [{"type": "Teapot"}]},
+            {"format": JSON_FORMAT, "version": VERSION, "nodes": [{"type": "String"}]},
+        ],
+    )
+    def test_invalid_json(self, data):
+        with pytest.raises(ValueError):
+            Scene.from_json(data)
+
+    def test_invalid_binary(self):
+        data = bytearray(Scene.capture([make_world()]).to_bytes())
+        data[:8] = b"NOTSCENE"
+        with pytest.raises(ValueError):
+            Scene.from_bytes(bytes(data))
+
+    def test_unregistered_types_cannot_be_saved(self):
+        class Custom(glObject):
+            pass
+
+        with pytest.raises(ValueError):
+            Scene.capture([Custom(0.0, 0.0, 0.0, 0.0)])
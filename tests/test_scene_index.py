@@ -0,0 +1,83 @@
+import random
+
+from simplephysicsengine import CubeHitbox, World, glObject
+from simplephysicsengine.scene_index import SceneIndex
+
+
+def naive_common_ancestor(obj1, obj2):
+    ancestors = set()
+    while obj1 is not None:
+        ancestors.add(obj1)
+        obj1 = obj1.parent
+    while obj2 not in ancestors:
+        obj2 = obj2.parent
+    return obj2
+
+
+def random_tree(size, seed=0):
+    rng = random.Random(seed)
+    root = glObject(0.0, 0.0, 0.0, 0.0)
+    nodes = [root]
+    for _ in range(size):
+        node = CubeHitbox(0.0, 0.0, 0.0, 1.0) if rng.random() < 0.4 else glObject(
+            0.0, 0.0, 0.0, 0.0
+        )
+        rng.choice(nodes).add_child(node)
+        nodes.append(node)
+    return root, nodes
+
+
+class TestSceneIndex:
+    def test_common_ancestor_matches_naive(self):
+        root, nodes = random_tree(200)
+        index = SceneIndex(root)
+        rng = random.Random(1)
+        for _ in range(500):
+            obj1, obj2 = rng.choice(nodes), rng.choice(nodes)
+            expected = naive_common_ancestor(obj1, obj2)
+            assert index.common_ancestor(obj1, obj2) is expected
+
+    def test_hitboxes_in_pre_order(self):
+        root, nodes = random_tree(100, seed=2)
+        index = SceneIndex(root)
+        expected = [node for node in root.descendants() if isinstance(node, CubeHitbox)]
+        assert index.hitboxes == expected
+
+    def test_attach_and_detach_track_handlers(self):
+        root = World(0.0, 0.0, 0.0, 0.0)
+        outer_hitbox = CubeHitbox(0.0, 0.0, 0.0, 1.0)
+        root.add_child(outer_hitbox)
+        index = SceneIndex(root)
+
+        inner = World(0.0, 0.0, 0.0, 0.0)
+        body = glObject(0.0, 0.0, 0.0, 0.0)
+        inner_hitbox = CubeHitbox(0.0, 0.0, 0.0, 1.0)
+        body.add_child(inner_hitbox)
+        inner.add_child(body)
+        root.add_child(inner)
+        index.attach(inner)
+
+        assert index.handlers == {outer_hitbox: root, inner_hitbox: inner}
+        assert index.common_ancestor(outer_hitbox, inner_hitbox) is root
+
+        root.remove_child(inner)
+        index.detach(inner)
+
+        assert index.hitboxes == [outer_hitbox]
+
+    def test_engine_keeps_index_in_sync(self):
+        from simplephysicsengine import Engine
+
+        engine = Engine(0, 0, -50, headless=True)
+        world = World(0.0, 0.0, 0.0, 0.0)
+        body = glObject(0.0, 0.0, 0.0, 0.0)
+        hitbox = CubeHitbox(0.0, 0.0, 0.0, 1.0)
+        world.add_child(body)
+        engine.add_child(world)
+        assert engine.scene_index.hitboxes == []
+
+        body.add_child(hitbox)
+        assert engine.scene_index.handlers == {hitbox: world}
+
+        world.remove_child(body)
+        assert engine.scene_index.hitboxes == []
@@ -0,0 +1,148 @@
+import asyncio
+
+import numpy as np
+
+from simplephysicsengine import CubeHitbox, Engine, World, glObject
+from simplephysicsengine.server import (
+    Batch,
+    CommandError,
+    ControlClient,
+    ControlServer,
+    decode_replies,
+)
+
+
+def make_engine():
+    engine = Engine(0, 0, headless=True)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    arm = glObject(1.0, 0.0, 0.0, 0.0)
+    arm.add_child(glObject(0.0, -2.0, 0.0, 0.0))
+    world.add_child(arm)
+    engine.add_child(world)
+    return engine
+
+
+def serve(scenario, engine=None):
+    async def main():
+        nonlocal engine
+        engine = engine if engine is not None else make_engine()
+        server = ControlServer(engine)
+        host, port = await server.start_tcp()
+        try:
+            return engine, await scenario(host, port)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+class TestControlServer:
+    def test_batched_commands_round_trip(self):
+        async def scenario(host, port):
+            client = await ControlClient.connect_tcp(host, port)
+            replies = await client.send(
+                Batch()
+                .apply_velocity(2, (0.0, 0.0, 90.0))
+                .step(10, 0.1)
+                .query_subtree(2)
+            )
+            await client.close()
+            return replies
+
+        engine, (applied, collisions, (ids, matrices)) = serve(scenario)
+        arm = engine.nodes[1]
+
+        assert applied is None
+        assert collisions == 0
+        assert np.isclose(arm.rotation_deg[2], 90.0)
+        assert ids.tolist() == [2, 3]
+        assert np.allclose(matrices[0], arm.get_matrix_within(engine), atol=1e-5)
+        # The tip of the arm swung from (1, -2) to (3, 0)
+        assert np.allclose(matrices[1][:3, 3], (3.0, 0.0, 0.0), atol=1e-5)
+
+    def test_set_state(self):
+        async def scenario(host, port):
+            client = await ControlClient.connect_tcp(host, port)
+            replies = await client.send(
+                Batch().set_state(3, (5.0, 0.0, 0.0), (0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+            )
+            await client.close()
+            return replies
+
+        engine, replies = serve(scenario)
+        assert replies == [None]
+        assert engine.nodes[2].x == 5.0
+
+    def test_errors_are_reported_per_command(self):
+        async def scenario(host, port):
+            client = await ControlClient.connect_tcp(host, port)
+            replies = await client.send(
+                Batch().query_subtree(99).step(1, -1.0).step(1, 0.1)
+            )
+            await client.close()
+            return replies
+
+        _, (missing, bad_dt, stepped) = serve(scenario)
+        assert isinstance(missing, CommandError)
+        assert isinstance(bad_dt, CommandError)
+        assert stepped == 0
+
+    def test_engine_failures_are_reported_per_command(self):
+        # Overlapping hitboxes without a collision handler make every step raise
+        engine = Engine(0, 0, headless=True)
+        engine.add_children(
+            [CubeHitbox(0.0, 0.0, 0.0, 1.0), CubeHitbox(0.5, 0.0, 0.0, 1.0)]
+        )
+
+        async def scenario(host, port):
+            client = await ControlClient.connect_tcp(host, port)
+            replies = await client.send(Batch().step(1, 0.1).step(1, float("nan")))
+            replies += await client.send(Batch().query_subtree(1))
+            await client.close()
+            return replies
+
+        _, (failed, bad_dt, (ids, _)) = serve(scenario, engine)
+        assert isinstance(failed, CommandError)
+        assert "No collision handler" in str(failed)
+        assert isinstance(bad_dt, CommandError)
+        assert ids.tolist() == [1]
+
+    def test_long_error_messages_are_truncated(self):
+        engine = make_engine()
+
+        def step(dt):
+            raise RuntimeError("x" * 70000)
+
+        engine.step = step
+        reply = ControlServer(engine).execute(Batch().step(1, 0.1).encode())
+        (error,) = decode_replies(reply)
+        assert isinstance(error, CommandError)
+        assert len(str(error)) == 65535
+
+    def test_malformed_batches_run_nothing(self):
+        engine = make_engine()
+        server = ControlServer(engine)
+        valid = Batch().apply_velocity(2, (0.0, 0.0, 90.0)).step(1, 0.1).encode()
+        unknown = bytearray(valid)
+        unknown[0] += 1
+        unknown += b"\xff"
+
+        for request in (bytes(unknown), valid[:-1], valid + b"\x00"):
+            (error,) = decode_replies(server.execute(request))
+            assert isinstance(error, CommandError)
+            assert "Malformed request" in str(error)
+        assert engine.nodes[1].rotation_deg[2] == 0.0
+        assert engine.nodes[1]._state[3, 2] == 0.0
+
+    def test_concurrent_clients(self):
+        async def scenario(host, port):
+            clients = [await ControlClient.connect_tcp(host, port) for _ in range(8)]
+            replies = await asyncio.gather(
+                *(client.send(Batch().step(5, 0.01)) for client in clients)
+            )
+            for client in clients:
+                await client.close()
+            return replies
+
+        engine, replies = serve(scenario)
+        assert replies == [[0]] * 8
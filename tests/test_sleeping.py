@@ -0,0 +1,107 @@
+import pytest
+
+from conftest import make_body
+from simplephysicsengine import Engine, World
+
+
+def make_engine(*xs, **kwargs):
+    engine = Engine(0, 0, headless=True, sleeping=True, **kwargs)
+    engine.sleep_manager.time_to_sleep = 0.5
+    world = World(0.0, 0.0, 0.0, 0.0)
+    bodies = [make_body(x) for x in xs]
+    world.add_children(bodies)
+    engine.add_child(world)
+    return engine, world, bodies
+
+
+class TestSleeping:
+    def test_resting_body_falls_asleep_and_is_skipped(self):
+        engine, _, (body,) = make_engine(0.0)
+        engine.step_many(30, 0.02)
+        assert body.sleeping
+
+        # Bypasses assign_angular_velocity, nothing wakes the body
+        body._state[3] = (0.0, 0.0, 90.0)
+        engine.step_many(5, 0.02)
+        assert body.rotation_deg[2] == 0.0
+
+    def test_spinning_body_stays_awake(self):
+        engine, _, (body,) = make_engine(0.0)
+        body.assign_angular_velocity((0.0, 0.0, 90.0))
+        engine.step_many(60, 0.02)
+        assert not body.sleeping
+
+    def test_assign_wakes_the_whole_island(self):
+        # Touching bodies form one island
+        engine, _, (body1, body2) = make_engine(0.0, 1.0)
+        engine.step_many(30, 0.02)
+        assert body1.sleeping and body2.sleeping
+
+        body1.assign_angular_velocity((0.0, 0.0, 90.0))
+        assert not body1.sleeping and not body2.sleeping
+        engine.step(0.02)
+        assert body1.rotation_deg[2] != 0.0
+
+    def test_separate_islands_sleep_independently(self):
+        engine, _, (resting, spinning) = make_engine(0.0, 10.0)
+        spinning.assign_angular_velocity((0.0, 0.0, 90.0))
+        engine.step_many(30, 0.02)
+        assert resting.sleeping
+        assert not spinning.sleeping
+
+    def test_contact_wakes_sleeping_body(self):
+        engine, world, (resting,) = make_engine(0.0)
+        engine.step_many(30, 0.02)
+        assert resting.sleeping
+
+        spinning = make_body(1.0)
+        spinning.assign_angular_velocity((0.0, 0.0, 90.0))
+        world.add_child(spinning)
+        collisions = engine.step(0.02)
+
+        assert collisions
+        assert not resting.sleeping
+        # The velocity World.on_collision handed over was not dropped
+        assert resting._state[3, 2] == 90.0
+
+    def test_sleeping_pairs_skip_collision_tests(self):
+        engine, _, _ = make_engine(0.0, 1.0)
+        engine.step_many(30, 0.02)
+        assert engine.step(0.02) == []
+
+    def test_detached_body_is_woken(self):
+        engine, world, (body,) = make_engine(0.0)
+        engine.step_many(30, 0.02)
+        world.remove_child(body)
+        assert not body.sleeping
+        assert engine.sleep_manager.sleeping_bodies == []
+
+    @pytest.mark.parametrize(
+        "disturb",
+        [
+            lambda body: body._children[0].assign_angular_velocity((0.0, 0.0, 90.0)),
+            lambda body: setattr(body._children[0]._children[0], "x", 0.5),
+            lambda body: setattr(body, "angular_velocity", (0.0, 0.0, 90.0)),
+            lambda body: setattr(body._children[0], "rotation_deg", (0.0, 0.0, 10.0)),
+        ],
+    )
+    def test_disturbing_a_descendant_wakes_the_body(self, disturb):
+        engine, _, (body1, body2) = make_engine(0.0, 1.0)
+        engine.step_many(30, 0.02)
+        assert body1.sleeping and body2.sleeping
+
+        disturb(body1)
+        assert not body1.sleeping and not body2.sleeping
+
+    @pytest.mark.parametrize("body_store", [False, True])
+    def test_subtrees_of_sleeping_bodies_stay_put(self, body_store):
+        # The string spins around the hitbox's center, the body still rests
+        engine, _, (body,) = make_engine(0.0, body_store=body_store)
+        string = body._children[0]
+        string.assign_angular_velocity((0.0, 0.0, 90.0))
+        engine.step_many(30, 0.02)
+        assert body.sleeping
+
+        rotation = string.rotation_deg.copy()
+        engine.step_many(5, 0.02)
+        assert string.rotation_deg.tolist() == rotation.tolist()
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from conftest import make_body
+from simplephysicsengine import Engine, SnapshotRing, World, glObject
+
+
+def make_scene(body_store=False):
+    engine = Engine(0, 0, -50, headless=True, body_store=body_store)
+    world = World(0.0, 0.0, 0.0, 0.0)
+    for i in range(4):
+        body = make_body(i * 2.0, size=1.0)
+        body.assign_angular_velocity((10.0 * i, 0.0, -35.0))
+        world.add_child(body)
+    world.assign_angular_velocity((0.0, 5.0, 0.0))
+    engine.add_child(world)
+    return engine
+
+
+def positions(engine):
+    return np.array([node.get_position_within(engine) for node in engine.nodes])
+
+
+class TestSnapshots:
+    @pytest.mark.parametrize("body_store", [False, True])
+    def test_restore_replays_the_same_trajectory(self, body_store):
+        engine = make_scene(body_store)
+        engine.step_many(5, 0.05)
+        snapshot = engine.snapshot()
+        engine.step_many(10, 0.05)
+        expected = positions(engine)
+
+        engine.restore(snapshot)
+        engine.step_many(10, 0.05)
+        assert positions(engine) == pytest.approx(expected)
+
+    def test_restore_moves_cached_transforms_back(self):
+        engine = make_scene()
+        start = positions(engine)
+        snapshot = engine.snapshot()
+        engine.step_many(10, 0.05)
+        assert positions(engine) != pytest.approx(start)
+
+        engine.restore(snapshot)
+        assert positions(engine) == pytest.approx(start)
+
+    @pytest.mark.parametrize("body_store", [False, True])
+    def test_restore_recomputes_bounds_of_resized_nodes(self, body_store):
+        engine = make_scene(body_store)
+        engine.step(0.05)
+        world = engine._children[0]
+        radius = world.get_bounding_radius()
+        snapshot = engine.snapshot()
+
+        ball = world._children[3]._children[0]._children[0]
+        ball.size = 9.0
+        assert world.get_bounding_radius() > radius
+
+        engine.restore(snapshot)
+        assert world.get_bounding_radius() == pytest.approx(radius)
+
+    def test_restore_rejects_other_nodes(self):
+        engine = make_scene()
+        snapshot = engine.snapshot()
+        engine.add_child(glObject(0.0, 0.0, 0.0, 0.0))
+        with pytest.raises(ValueError):
+            engine.restore(snapshot)
+
+    def test_ring_evicts_oldest(self):
+        engine = make_scene()
+        ring = SnapshotRing(3)
+        ids = []
+        for _ in range(5):
+            ids.append(ring.push(engine))
+            engine.step(0.05)
+        assert ring.ids == ids[2:]
+        assert ids[0] not in ring
+
+    def test_ring_branches_from_an_earlier_snapshot(self):
+        engine = make_scene()
+        ring = SnapshotRing(4)
+        first = ring.push(engine)
+        engine.step_many(3, 0.05)
+        ring.push(engine)
+        engine.step_many(3, 0.05)
+        ring.push(engine)
+
+        ring.restore(engine, first)
+        ring.discard_after(first)
+        assert ring.ids == [first]
+
+        # The freed slots are reused without touching the kept snapshot
+        start = ring.get(first).state.copy()
+        engine.nodes[1].assign_angular_velocity((0.0, 0.0, 200.0))
+        engine.step_many(2, 0.05)
+        branch = ring.push(engine)
+        assert ring.ids == [first, branch]
+        assert ring.get(first).state == pytest.approx(start)
+
+    def test_ring_is_cleared_by_tree_changes(self):
+        engine = make_scene()
+        ring = SnapshotRing(2)
+        ring.push(engine)
+        engine.add_child(glObject(0.0, 0.0, 0.0, 0.0))
+        ring.push(engine)
+        assert len(ring) == 1
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from simplephysicsengine import (
+    BVHBroadPhase,
+    CubeHitbox,
+    Engine,
+    HasCollisionMixin,
+    glObject,
+)
+from simplephysicsengine.broadphase import BVH, SweepAndPruneBroadPhase
+
+
+class Holder(glObject, HasCollisionMixin):
+    def on_collision(self, other1, other2):
+        pass
+
+
+def make_engine(positions, sizes, **kwargs):
+    engine = Engine(0, 0, -50, headless=True, **kwargs)
+    world = Holder(0.0, 0.0, 0.0, 0.0)
+    world.add_children(
+        [CubeHitbox(*position, size) for position, size in zip(positions, sizes)]
+    )
+    engine.add_child(world)
+    return engine, world._children
+
+
+def random_scene(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-20, 20, size=(n, 3)), rng.uniform(0.2, 2.0, size=n)
+
+
+class TestSpatialIndex:
+    def test_refitted_tree_finds_the_same_pairs(self):
+        positions, sizes = random_scene()
+        bvh = BVH(positions, sizes / 2)
+        moved = positions + np.random.default_rng(1).normal(0, 3, size=positions.shape)
+        bvh.refit(moved, sizes / 2)
+
+        expected = SweepAndPruneBroadPhase().find_pairs(moved, sizes / 2)
+        assert np.array_equal(bvh.find_pairs(), expected)
+
+    def test_queries_match_a_scan(self):
+        positions, sizes = random_scene()
+        engine, hitboxes = make_engine(positions, sizes)
+        index = engine.spatial_index
+        point = np.array([1.0, -2.0, 3.0])
+        gaps = np.maximum(np.linalg.norm(positions - point, axis=1) - sizes / 2, 0.0)
+
+        assert index.within(point, 5.0) == [
+            hitbox for hitbox, gap in zip(hitboxes, gaps) if gap <= 5.0
+        ]
+
+        nearest = index.nearest(point, k=5)
+        assert [distance for _, distance in nearest] == pytest.approx(np.sort(gaps)[:5])
+        assert nearest[0][0] is hitboxes[np.argmin(gaps)]
+
+        # Along +x from far on the left, through every sphere crossing the line
+        origin = np.array([-50.0, *positions[0, 1:]])
+        offsets = np.linalg.norm(positions[:, 1:] - origin[1:], axis=1)
+        crossed = [
+            hitbox
+            for hitbox, offset, size in zip(hitboxes, offsets, sizes)
+            if offset < size / 2
+        ]
+        hits = index.raycast(origin, (2.0, 0.0, 0.0))
+        assert {hitbox for hitbox, _ in hits} == set(crossed)
+        distances = [distance for _, distance in hits]
+        assert distances == sorted(distances)
+        first = index.raycast(origin, (2.0, 0.0, 0.0), max_distance=distances[0])
+        assert first == hits[:1]
+
+    def test_queries_follow_steps_and_tree_changes(self):
+        engine, (hitbox,) = make_engine([(0.0, 0.0, 0.0)], [1.0])
+        assert engine.spatial_index.within((0.0, 0.0, 0.0), 0.1) == [hitbox]
+
+        hitbox.x = 10.0
+        engine.step(0.01)
+        assert engine.spatial_index.within((0.0, 0.0, 0.0), 0.1) == []
+        assert engine.spatial_index.nearest((10.0, 0.0, 0.0))[0][0] is hitbox
+
+        other = CubeHitbox(0.0, 0.0, 0.0, 1.0)
+        hitbox.parent.add_child(other)
+        assert engine.spatial_index.within((0.0, 0.0, 0.0), 0.1) == [other]
+
+    def test_shares_the_broad_phase_tree(self):
+        positions, sizes = random_scene()
+        engine, _ = make_engine(positions, sizes, broad_phase=BVHBroadPhase())
+        engine.step(0.01)
+        engine.spatial_index.nearest((0.0, 0.0, 0.0))
+        assert engine.spatial_index._tree is engine.broad_phase.bvh
+
+    def test_pick(self):
+        engine, (near, far, aside) = make_engine(
+            [(0.0, 0.0, 10.0), (0.0, 0.0, -10.0), (15.0, 0.0, 0.0)], [2.0, 2.0, 2.0]
+        )
+        width, height = engine.display
+        assert engine.pick((width / 2, height / 2)) is near
+        assert engine.pick((0, 0)) is None
+
+        # Turned towards +x, the one aside is straight ahead
+        engine.rotation_deg = (0.0, 90.0, 0.0)
+        engine.z = 0.0
+        assert engine.pick((width / 2, height / 2)) is aside